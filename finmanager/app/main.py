@@ -1,8 +1,10 @@
 import asyncio
 import datetime
+import json
 import time
 import sys
 import os
+from operator import attrgetter
 
 # Add project root to sys.path to allow imports from core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -12,8 +14,9 @@ import pandas as pd
 
 from core.domain import Transaction
 from core.frp import Event, StateEventBus, check_budget_handler, on_transaction_added
-from core.lazy import iter_transactions, lazy_top_categories
-from core.memo import forecast_expenses
+from core.lazy import iter_transactions, lazy_top_k
+from core.predicates import select
+from core.memo import default_engine, memoize_on_state
 from core.recursion import flatten_categories, sum_expenses_recursive
 from core.service import BudgetService, ReportService
 from core.transforms import (
@@ -22,9 +25,17 @@ from core.transforms import (
     check_budget,
     load_seed,
     validate_transaction,
+    validate_transactions,
 )
+from core.frames import COLUMNS, TransactionFrames
+from core.ledger import Ledger
+from core.sqlite_store import SqliteStore
+from core.persistent import pvector
+from core.snapshot import snapshot_state
+from core.state_index import state_index
 from core.auth import verify_credentials, get_user_role, get_user_accounts
-from core.state_utils import update_account_balance, update_transaction, delete_transaction, create_transaction
+from core.views import register_view, user_view
+from core.state_utils import attach_derived, update_account_balance, update_transaction, delete_transaction, create_transaction
 
 # Configuration
 st.set_page_config(page_title="Financial Manager", layout="wide", page_icon="💸")
@@ -79,24 +90,92 @@ if st.sidebar.button("Logout", key="logout_btn"):
 
 st.sidebar.markdown("---")
 
-# Load Data (Simulated Global State for now, usually would be in session state)
-if "state" not in st.session_state:
-    accs, cats, trans, buds = load_seed("data/seed.json")
-    st.session_state.state = {
-        "accounts": accs,
-        "categories": cats,
-        "transactions": trans,
-        "budgets": buds,
-        "alerts": [],
-    }
-
-    # Init Event Bus
+# Load Data: one process-wide ledger shared by every session
+SNAPSHOT_PATH = "data/seed.snap"
+DB_PATH = "data/finmanager.db"
+
+
+@st.cache_resource
+def get_db():
+    # SQLite backend (python -m core.sqlite_store data/seed.json data/finmanager.db):
+    # when present it is the source of truth and every write is persisted to it.
+    return SqliteStore(DB_PATH) if os.path.exists(DB_PATH) else None
+
+
+def persist(mutator):
+    db = get_db()
+    return db.mirror(mutator) if db is not None else mutator
+
+
+def load_initial_state():
+    db = get_db()
+    if db is None and os.path.exists(SNAPSHOT_PATH):
+        # Memory-mapped columnar snapshot (python -m core.snapshot data/seed.json data/seed.snap):
+        # opens without parsing rows; budget totals and the fingerprint are built from
+        # its columns, the indexes from its id and account-code columns.
+        state = snapshot_state(SNAPSHOT_PATH)
+    else:
+        accs, cats, trans, buds = db.load() if db is not None else load_seed("data/seed.json")
+        state = {
+            # Persistent vectors: inserts and edits share structure instead of copying
+            "accounts": pvector(accs),
+            "categories": cats,
+            "transactions": pvector(trans),
+            "budgets": buds,
+            "alerts": [],
+        }
+    # Running budget totals (updated per event instead of rescanning history), id-keyed
+    # indexes and the content hash keying the memoized reports below, all kept
+    # consistent by the state_utils mutators. Seeded on every load path, or each
+    # memoized call would rehash the state
+    return attach_derived(state)
+
+
+@st.cache_resource
+def get_ledger() -> Ledger:
+    # Sessions read immutable snapshots; writes go through ledger.update
+    return Ledger(load_initial_state())
+
+
+@st.cache_resource
+def get_bus() -> StateEventBus:
     bus = StateEventBus()
     bus.subscribe("TRANSACTION_ADDED", on_transaction_added)
     bus.subscribe("TRANSACTION_ADDED", check_budget_handler)
-    st.session_state.bus = bus
+    return bus
+
+
+@st.cache_resource
+def get_budget_report():
+    # One memo for all sessions and reruns, keyed on the ledger's content
+    # fingerprint: equal contents reuse a report, whichever writes led to them
+    @memoize_on_state(maxsize=32)
+    def budget_report(state, account_ids):
+        trans = state["transactions"] if account_ids is None else user_view(state, account_ids).transactions
+        return BudgetService([], []).monthly_report(state["budgets"], trans)
 
-state = st.session_state.state
+    return budget_report
+
+
+@st.cache_resource
+def get_frames() -> TransactionFrames:
+    # One DataFrame of the ledger for all sessions, extended in place of a
+    # rebuild when transactions are appended
+    return TransactionFrames()
+
+
+ledger = get_ledger()
+bus = get_bus()
+frames = get_frames()
+
+# Consistent snapshot for the whole rerun, even if other sessions write meanwhile
+state = ledger.snapshot()
+
+
+@st.cache_data
+def records_frame(records: tuple) -> pd.DataFrame:
+    # Small collections (accounts, categories, budgets); recomputed only when they change
+    return pd.DataFrame([r.__dict__ for r in records])
 
 # Filter Data based on User Role
 allowed_accounts = get_user_accounts(st.session_state.username)
@@ -106,9 +185,12 @@ if allowed_accounts is None:
     accounts = state["accounts"]
     transactions = state["transactions"]
 else:
-    # User sees only their accounts
-    accounts = tuple(a for a in state["accounts"] if a.id in allowed_accounts)
-    transactions = tuple(t for t in state["transactions"] if t.account_id in allowed_accounts)
+    # User sees only their accounts: a view maintained by the state mutators
+    # (registered once per session; a no-op afterwards)
+    state = ledger.update(register_view, allowed_accounts)
+    view = user_view(state, allowed_accounts)
+    accounts = view.accounts
+    transactions = view.transactions
 
 categories = state["categories"]
 budgets = state["budgets"] # Budgets might need filtering too but for now shared or all visible
@@ -182,16 +264,12 @@ if menu == "Overview":
         st.subheader("Expense by Category")
         # Prepare data for chart
         if transactions:
-            df_trans = pd.DataFrame([t.__dict__ for t in transactions])
-            
-            # Join with categories to get names
-            cat_map = {c.id: c.name for c in categories}
-            df_trans['category_name'] = df_trans['cat_id'].map(cat_map)
+            # Shared frame, already joined with category names
+            df_trans = frames.for_accounts(state, allowed_accounts)
             
-            df_expenses = df_trans[df_trans['amount'] < 0].copy()
+            df_expenses = df_trans[df_trans['amount'] < 0]
             if not df_expenses.empty:
-                df_expenses['abs_amount'] = df_expenses['amount'].abs()
-                chart_data = df_expenses.groupby('category_name')['abs_amount'].sum()
+                chart_data = df_expenses['amount'].abs().groupby(df_expenses['category_name']).sum()
                 st.bar_chart(chart_data, color="#00ADB5")
             else:
                 st.info("No expenses found to chart.")
@@ -200,7 +278,7 @@ if menu == "Overview":
     st.subheader("Recent Transactions")
     
     if transactions:
-        df_all_trans = pd.DataFrame([t.__dict__ for t in transactions])
+        df_all_trans = frames.for_accounts(state, allowed_accounts)[COLUMNS]
         st.dataframe(
             df_all_trans,
             column_config={
@@ -240,7 +318,7 @@ elif menu == "Manage Users":
                     col_bal1, col_bal2 = st.columns([3, 1])
                     new_bal = col_bal1.number_input(f"Balance for {acc.id}", value=acc.balance, key=f"bal_{acc.id}")
                     if col_bal2.button(f"Update", key=f"btn_{acc.id}"):
-                        st.session_state.state = update_account_balance(st.session_state.state, acc.id, new_bal)
+                        ledger.update(persist(update_account_balance), acc.id, new_bal)
                         st.success("Balance Updated")
                         st.rerun()
 
@@ -249,7 +327,7 @@ elif menu == "Manage Users":
         
         with admin_tab2:
             st.write("### Edit Transactions")
-            st.dataframe(pd.DataFrame([t.__dict__ for t in target_trans]), hide_index=True, use_container_width=True)
+            st.dataframe(frames.for_accounts(state, target_acc_ids)[COLUMNS], hide_index=True, use_container_width=True)
             
             st.divider()
             st.write("#### Modify Transaction")
@@ -257,7 +335,7 @@ elif menu == "Manage Users":
             if target_trans:
                 t_id_to_edit = st.selectbox("Select Transaction ID", [t.id for t in target_trans])
                 if t_id_to_edit:
-                    curr_t = next(t for t in target_trans if t.id == t_id_to_edit)
+                    curr_t = state["transactions"][state_index(state).tx_pos[t_id_to_edit]]
                     
                     with st.form("edit_trans_form"):
                         edit_amt = st.number_input("Amount", value=curr_t.amount, key="edit_amt")
@@ -270,12 +348,12 @@ elif menu == "Manage Users":
                             delete_submitted = st.form_submit_button("Delete Transaction", type="primary", use_container_width=True)
 
                         if update_submitted:
-                            st.session_state.state = update_transaction(st.session_state.state, t_id_to_edit, {"amount": edit_amt, "note": edit_note})
+                            ledger.update(persist(update_transaction), t_id_to_edit, {"amount": edit_amt, "note": edit_note})
                             st.success("Transaction Updated")
                             st.rerun()
                         
                         if delete_submitted:
-                            st.session_state.state = delete_transaction(st.session_state.state, t_id_to_edit)
+                            ledger.update(persist(delete_transaction), t_id_to_edit)
                             st.success("Transaction Deleted")
                             st.rerun()
             else:
@@ -295,7 +373,7 @@ elif menu == "Manage Users":
                     new_id = f"tx_{len(state['transactions'])}_{uuid.uuid4().hex[:4]}"
                     # Default category general
                     new_t = Transaction(new_id, new_acc_id, "cat_general", int(new_amt), datetime.datetime.now().isoformat(), new_note)
-                    st.session_state.state = create_transaction(st.session_state.state, new_t)
+                    ledger.update(persist(create_transaction), new_t)
                     st.success("Transaction Created")
                     st.rerun()
 
@@ -308,17 +386,14 @@ elif menu == "Data":
         with tab1:
             st.subheader("Transactions")
             if transactions:
-                df = pd.DataFrame([t.__dict__ for t in transactions])
+                df = frames.for_accounts(state, allowed_accounts)
                 
                 # Interactive Filters
                 col_f1, col_f2 = st.columns(2)
                 with col_f1:
-                    f_acc = st.multiselect("Filter by Account", options=list(set(df['account_id'])))
+                    f_acc = st.multiselect("Filter by Account", options=list(df['account_id'].unique()))
                 with col_f2:
-                    # Need category names map
-                    cat_map = {c.id: c.name for c in categories}
-                    df['category_name'] = df['cat_id'].map(cat_map)
-                    f_cat = st.multiselect("Filter by Category", options=list(set(df['category_name'])))
+                    f_cat = st.multiselect("Filter by Category", options=list(df['category_name'].dropna().unique()))
                 
                 if f_acc:
                     df = df[df['account_id'].isin(f_acc)]
@@ -344,15 +419,15 @@ elif menu == "Data":
 
         with tab2:
             st.subheader("Accounts")
-            st.dataframe(pd.DataFrame([a.__dict__ for a in accounts]), hide_index=True, use_container_width=True)
+            st.dataframe(records_frame(tuple(accounts)), hide_index=True, use_container_width=True)
 
         with tab3:
             st.subheader("Categories")
-            st.dataframe(pd.DataFrame([c.__dict__ for c in categories]), hide_index=True, use_container_width=True)
+            st.dataframe(records_frame(tuple(categories)), hide_index=True, use_container_width=True)
 
         with tab4:
             st.subheader("Budgets")
-            st.dataframe(pd.DataFrame([b.__dict__ for b in budgets]), hide_index=True, use_container_width=True)
+            st.dataframe(records_frame(tuple(budgets)), hide_index=True, use_container_width=True)
 
 elif menu == "About":
     st.title("About")
@@ -378,14 +453,19 @@ elif menu == "Functional Core":
                 min_amt = st.number_input("Min Amount (Abs)", 0, 10000, 0)
                 max_amt = st.number_input("Max Amount (Abs)", 0, 100000, 10000)
 
-        # Apply Filters
-        filtered_trans = transactions
+        # Apply Filters: combined into one predicate and evaluated in a single pass
+        pred = by_amount_range(min_amt, max_amt)
 
         if selected_cat != "All":
             cat_id = next(c.id for c in categories if c.name == selected_cat)
-            filtered_trans = tuple(filter(by_category(cat_id), filtered_trans))
+            pred = by_category(cat_id) & pred
 
-        filtered_trans = tuple(filter(by_amount_range(min_amt, max_amt), filtered_trans))
+        db = get_db()
+        if db is not None and allowed_accounts is None:
+            # The database is the source of truth: the filter runs as a WHERE clause on its indexes
+            filtered_trans = tuple(db.transactions(pred))
+        else:
+            filtered_trans = select(transactions, pred)
 
         st.write(f"Filtered Transactions: {len(filtered_trans)}")
         st.dataframe(filtered_trans, use_container_width=True)
@@ -410,7 +490,10 @@ elif menu == "Functional Core":
                 # Create a dummy transaction
                 t_cand = Transaction("new", v_acc, v_cat, int(v_amt), "2023-01-01", "cand")
 
-                result = validate_transaction(t_cand, accounts, categories)
+                # Admins validate against the id index (O(1) lookups)
+                index = state_index(state)
+                valid_accs = index.accounts if allowed_accounts is None else accounts
+                result = validate_transaction(t_cand, valid_accs, index.categories)
 
                 if result.is_right():
                     st.success("Transaction is Valid!")
@@ -428,6 +511,37 @@ elif menu == "Functional Core":
                 else:
                     st.error(f"Validation Failed: {result.unwrap()['error']}")
 
+        # Bulk check of a bank statement before importing it
+        statement = st.file_uploader("Check a statement (NDJSON, one transaction per line)", type=["ndjson", "jsonl"])
+        if statement is not None:
+            # Each line is parsed on its own: a malformed line or a missing
+            # field fails that row instead of the whole statement
+            rows, line_nos, failures = [], [], []
+            lines = statement.getvalue().decode("utf-8", errors="replace").splitlines()
+            for line_no, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(Transaction(**json.loads(line)))
+                    line_nos.append(line_no)
+                except (ValueError, TypeError) as e:
+                    failures.append({"row": line_no, "id": None, "errors": f"Unreadable line: {e}"})
+            index = state_index(state)
+            valid_accs = index.accounts if allowed_accounts is None else accounts
+            results, summary = validate_transactions(rows, valid_accs, index.categories, existing_ids=index.tx_pos)
+            summary["unreadable"] = len(failures)
+            summary["rows"] += len(failures)
+            st.write(f"{summary['valid']} of {summary['rows']} rows are valid")
+            st.dataframe(pd.DataFrame([summary]), use_container_width=True)
+            failures += [
+                {"row": line_no, "id": t.id, "errors": "; ".join(r.unwrap()["errors"])}
+                for line_no, t, r in zip(line_nos, rows, results)
+                if r.is_left()
+            ]
+            failures.sort(key=lambda f: f["row"])
+            if failures:
+                st.dataframe(pd.DataFrame(failures), use_container_width=True)
+
 elif menu == "Pipelines":
     st.title("Pipelines & Recursion")
 
@@ -435,17 +549,32 @@ elif menu == "Pipelines":
         st.subheader("Lazy Top Categories")
 
         k = st.slider("Top K", 1, 10, 3)
+        col_key, col_method = st.columns(2)
+        group_by = col_key.radio("Group by", ["Category", "Note"], horizontal=True)
+        method = col_method.selectbox(
+            "Counter",
+            ["exact", "space_saving", "count_min"],
+            help="Approximate counters keep memory bounded for high-cardinality keys such as notes.",
+        )
 
         if st.button("Compute Top K (Lazy)"):
             # Create an iterator
             tx_iter = iter_transactions(transactions)
-
-            # Compute
-            top_k = list(lazy_top_categories(tx_iter, categories, k))
-
-            st.write("Top Categories by Expense:")
-            for name, amount in top_k:
-                st.write(f"**{name}**: {amount}")
+            names = state_index(state).category_names
+
+            # Progressive results: the current top K every 100k rows of the stream
+            st.write("Top Categories by Expense:" if group_by == "Category" else "Top Notes by Expense:")
+            placeholder = st.empty()
+            for top_k in lazy_top_k(
+                tx_iter,
+                k,
+                key=attrgetter("cat_id" if group_by == "Category" else "note"),
+                every=100_000,
+                method=method,
+            ):
+                placeholder.markdown(
+                    "\n".join(f"- **{names.get(key, key)}**: {amount}" for key, amount in top_k)
+                )
 
     st.divider()
 
@@ -460,12 +589,14 @@ elif menu == "Pipelines":
             root_id = next(c.id for c in root_cats if c.name == selected_root)
 
             # Flatten
-            flat_cats = flatten_categories(categories, root_id)
+            flat_cats = flatten_categories(categories, root_id, tree=state_index(state).category_tree)
             st.write(f"Flattened Hierarchy for {selected_root}:")
             st.write(" > ".join([c.name for c in flat_cats]))
 
             # Recursive Sum
-            total_expenses = sum_expenses_recursive(categories, transactions, root_id)
+            total_expenses = sum_expenses_recursive(
+                categories, transactions, root_id, tree=state_index(state).category_tree
+            )
             st.metric(f"Total Expenses for {selected_root} (Tree)", f"{total_expenses}")
 
 elif menu == "Async/FRP":
@@ -504,10 +635,18 @@ elif menu == "Async/FRP":
                         payload={"transaction": new_t},
                     )
 
+                    db = get_db()
+
+                    def publish(s):
+                        new_s = bus.publish(evt, s)
+                        # The bus adds the transaction through create_transaction;
+                        # mirror it under the ledger lock, as persist() does
+                        if db is not None and len(new_s["transactions"]) != len(s["transactions"]):
+                            db.create_transaction(new_t)
+                        return new_s
+
                     # Publish and Update State
-                    st.session_state.state = st.session_state.bus.publish(
-                        evt, st.session_state.state
-                    )
+                    ledger.update(publish)
                     st.success("Event Published!")
                     st.rerun()
 
@@ -596,7 +735,6 @@ elif menu == "Reports":
     # Lab 7 Services
     st.subheader("Services & Composition")
 
-    bs = BudgetService([], [])
     rs = ReportService({})
 
     with st.container(border=True):
@@ -605,7 +743,7 @@ elif menu == "Reports":
         with tab1:
             st.write("### Budget vs Actuals")
             if st.button("Generate Budget Report"):
-                report = bs.monthly_report(budgets, transactions)
+                report = get_budget_report()(state, None if allowed_accounts is None else tuple(allowed_accounts))
                 
                 # Enrich report with category names and format for display
                 report_data = []
@@ -655,7 +793,12 @@ elif menu == "Reports":
             c_name = st.selectbox("Category", [c.name for c in categories], key="rep_cat")
             if st.button("Generate Category Report"):
                 cid = next(c.id for c in categories if c.name == c_name)
-                rep = rs.category_report(cid, transactions)
+                db = get_db()
+                if db is not None and allowed_accounts is None:
+                    # Aggregated in SQL from the (cat_id, ts) index
+                    rep = db.category_report(cid)
+                else:
+                    rep = rs.category_report(cid, transactions)
                 
                 # Display metrics instead of JSON
                 col_m1, col_m2 = st.columns(2)
@@ -677,6 +820,12 @@ elif menu == "Reports":
             periods = st.slider("Periods to forecast", 1, 12, 3)
         
         with col_fc2:
+            method = st.selectbox(
+                "Method",
+                ["average", "moving_average", "seasonal"],
+                format_func=lambda m: m.replace("_", " ").title(),
+                key="fc_method",
+            )
             st.write("Click below to forecast expenses using historical data.")
 
         if st.button("Calculate Forecast"):
@@ -684,20 +833,25 @@ elif menu == "Reports":
 
             # Measure time
             start = time.perf_counter()
-            prediction = forecast_expenses(cat_id, transactions, periods)
+            prediction = default_engine.forecast(cat_id, transactions, periods, method=method)
             end = time.perf_counter()
 
             elapsed_ms = (end - start) * 1000
 
             metric_card("Forecasted Expense", f"${prediction}", st)
-            st.caption(f"Calculation time: {elapsed_ms:.2f} ms")
-            
-            # Visualize Forecast vs History (Mock visualization since forecast returns a single number)
-            # We can show a bar with "Average History" and "Forecast"
-            st.bar_chart({"Forecast": prediction}, color="#00ADB5")
-            
+            st.caption(
+                f"Calculation time: {elapsed_ms:.2f} ms "
+                f"(cache hits: {default_engine.hits}, misses: {default_engine.misses}, "
+                f"incremental updates: {default_engine.incremental})"
+            )
+
+            # Monthly history of the category next to the forecast
+            history = default_engine.monthly_totals(cat_id, transactions)
+            if history:
+                st.bar_chart(dict(sorted(history.items())), color="#00ADB5")
+
             st.info(
-                "Try clicking again to see the cache effect (time should drop close to 0)."
+                "Statistics are cached per ledger version; adding transactions updates them incrementally."
             )
 
 elif menu == "Tests":
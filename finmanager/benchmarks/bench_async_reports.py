@@ -0,0 +1,59 @@
+"""
+Benchmark: ReportService.expenses_by_month / balance_forecast over n
+transactions in one partition, in a thread pool, and in the default
+shared process pool (one partition per worker).
+
+    python benchmarks/bench_async_reports.py [n] [workers]
+"""
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.domain import Account, Transaction
+from core.service import ReportService
+
+
+def _data(n):
+    accounts = [Account(f"acc_{i}", "A", 0, "USD") for i in range(10)]
+    trans = [
+        Transaction(
+            f"tx_{i}",
+            f"acc_{i % 10}",
+            "cat",
+            (i % 200) - 150,
+            f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T12:00:00",
+            "bench",
+        )
+        for i in range(n)
+    ]
+    return accounts, trans
+
+
+async def _run(rs, accounts, trans, months):
+    return await asyncio.gather(
+        rs.expenses_by_month(trans, months), rs.balance_forecast(accounts, trans)
+    )
+
+
+def _timed(label, rs, accounts, trans, months):
+    start = time.perf_counter()
+    asyncio.run(_run(rs, accounts, trans, months))
+    print(f"{label:<34} {time.perf_counter() - start:8.3f}s")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    accounts, trans = _data(n)
+    months = [f"2024-{m:02d}" for m in range(1, 13)]
+    print(f"{n} transactions, {workers} workers")
+
+    _timed("single partition", ReportService({}, partitions=1), accounts, trans, months)
+    with ThreadPoolExecutor(workers) as pool:
+        rs = ReportService({}, executor=pool, partitions=workers)
+        _timed("thread pool", rs, accounts, trans, months)
+    _timed("process pool (default)", ReportService({}, partitions=workers), accounts, trans, months)
@@ -0,0 +1,71 @@
+"""
+Benchmark: budget report for b budgets over n transactions.
+
+Compares the one-pass report engine (tuple and TransactionStore inputs)
+against the old per-budget rescan, which is O(B x N) and is timed on a
+sample of budgets and extrapolated.
+
+    python benchmarks/bench_budget_report.py [n] [b]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.budget_report import budget_report
+from core.domain import Budget, Transaction
+from core.store import TransactionStore
+
+SAMPLE = 5
+
+
+def _data(n, b):
+    cats = [f"cat_{i}" for i in range(max(b // 2, 1))]
+    trans = tuple(
+        Transaction(
+            f"tx_{i}",
+            f"acc_{i % 10}",
+            cats[i % len(cats)],
+            (i % 200) - 150,
+            f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T12:00:00",
+            "bench",
+        )
+        for i in range(n)
+    )
+    periods = ("month", "week", "all")
+    budgets = tuple(
+        Budget(f"b_{i}", cats[i % len(cats)], 10_000, periods[i % 3]) for i in range(b)
+    )
+    return trans, budgets
+
+
+def _per_budget_scan(budgets, trans):
+    # The previous BudgetService.monthly_report: one full scan per budget
+    return {
+        b.id: sum(abs(t.amount) for t in trans if t.cat_id == b.cat_id and t.amount < 0)
+        for b in budgets
+    }
+
+
+def _timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.3f}s")
+    return result, elapsed
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    b = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    trans, budgets = _data(n, b)
+    store = TransactionStore.from_transactions(trans)
+    print(f"{n} transactions, {b} budgets")
+
+    _, elapsed = _timed(
+        f"per-budget scan ({SAMPLE} budgets)", lambda: _per_budget_scan(budgets[:SAMPLE], trans)
+    )
+    print(f"{'  extrapolated to all budgets':<34} {elapsed / SAMPLE * b:8.3f}s")
+    _timed("one-pass report (tuple)", lambda: budget_report(budgets, trans))
+    _timed("one-pass report (store)", lambda: budget_report(budgets, store))
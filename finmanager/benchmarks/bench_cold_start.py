@@ -0,0 +1,60 @@
+"""
+Benchmark: cold start from seed JSON (load_seed) vs. binary snapshot
+(open_snapshot), for a synthetic ledger of n transactions.
+
+    python benchmarks/bench_cold_start.py [n]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.snapshot import convert_seed, open_snapshot
+from core.transforms import account_balance, load_seed
+
+
+def _write_seed(path, n):
+    with open("data/seed.json") as f:
+        seed = json.load(f)
+    accounts = [a["id"] for a in seed["accounts"]]
+    cats = [c["id"] for c in seed["categories"]]
+    seed["transactions"] = [
+        {
+            "id": f"tx_{i}",
+            "account_id": accounts[i % len(accounts)],
+            "cat_id": cats[i % len(cats)],
+            "amount": (i % 200) - 150,
+            "ts": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T12:00:00",
+            "note": f"Transaction {i % 1000}",
+        }
+        for i in range(n)
+    ]
+    with open(path, "w") as f:
+        json.dump(seed, f)
+
+
+def _timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<28} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_path = os.path.join(tmp, "seed.json")
+        snap_path = os.path.join(tmp, "seed.snap")
+        _write_seed(seed_path, n)
+        _timed("convert seed -> snapshot", lambda: convert_seed(seed_path, snap_path))
+        print(f"{n} transactions")
+
+        _, _, trans, _ = _timed("load_seed (JSON)", lambda: load_seed(seed_path))
+        _timed("  account_balance (tuple)", lambda: account_balance(trans, "acc1"))
+        del trans
+
+        _, _, store, _ = _timed("open_snapshot (mmap)", lambda: open_snapshot(snap_path))
+        _timed("  account_balance (store)", lambda: account_balance(store, "acc1"))
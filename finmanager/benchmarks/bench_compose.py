@@ -0,0 +1,77 @@
+"""
+Microbenchmark: core.compose against the previous reduce-based compose/pipe,
+applied per row to transactions, and the batch forms compose_map/pipe_batch.
+
+    python benchmarks/bench_compose.py [n]
+"""
+import os
+import sys
+import time
+from functools import reduce
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.compose import compose, compose_map, pipe, pipe_batch
+from core.domain import Transaction
+
+
+def reduce_compose(*funcs):
+    return lambda x: reduce(lambda v, f: f(v), reversed(funcs), x)
+
+
+def reduce_pipe(x, *funcs):
+    return reduce(lambda v, f: f(v), funcs, x)
+
+
+def amount(t):
+    return t.amount
+
+
+def spent(a):
+    return -a if a < 0 else 0
+
+
+def cents(a):
+    return a * 100
+
+
+def rounded(a):
+    return a // 1000 * 1000
+
+
+def capped(a):
+    return min(a, 5000)
+
+
+def _time(label, fn, n, baseline=None):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    speedup = f"  ({baseline / elapsed:.1f}x)" if baseline else ""
+    print(f"{label:34s} {n / elapsed:12,.0f} rows/s{speedup}")
+    return result, elapsed
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    trans = [Transaction(f"t{i}", "a", "c", i % 200 - 100, "2024-01-01", "n") for i in range(n)]
+
+    cases = {
+        "3 steps": lambda make: make(cents, spent, amount),
+        "5 steps, nested": lambda make: make(capped, make(rounded, cents), make(spent, amount)),
+    }
+    for label, build in cases.items():
+        print(f"-- compose, {label}")
+        old, new = build(reduce_compose), build(compose)
+        expected, base = _time("reduce compose, per row", lambda: [old(t) for t in trans], n)
+        got, _ = _time("compose, per row", lambda: [new(t) for t in trans], n, base)
+        assert got == expected
+        got, _ = _time("compose_map, whole batch", lambda: compose_map(new)(trans), n, base)
+        assert got == expected
+
+    print("-- pipe, 3 steps")
+    expected, base = _time("reduce pipe, per row", lambda: [reduce_pipe(t, amount, spent, cents) for t in trans], n)
+    got, _ = _time("pipe, per row", lambda: [pipe(t, amount, spent, cents) for t in trans], n, base)
+    assert got == expected
+    got, _ = _time("pipe_batch, whole batch", lambda: pipe_batch(trans, amount, spent, cents), n, base)
+    assert got == expected
@@ -0,0 +1,77 @@
+"""
+Benchmark: TRANSACTION_ADDED throughput, per-event publish vs publish_batch.
+
+Both paths run on_transaction_added and check_budget_handler over the same
+events and end in the same state; the batch path appends once, adjusts each
+account balance once and evaluates the budgets once per batch.
+
+    python benchmarks/bench_event_batch.py [n] [batch_size]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.budget_spend import build_budget_spend
+from core.domain import Account, Budget, Event, Transaction
+from core.frp import StateEventBus, check_budget_handler, on_transaction_added
+
+
+def _state():
+    budgets = tuple(Budget(f"b{i}", f"cat_{i}", 10_000, "month") for i in range(20))
+    return {
+        "accounts": tuple(Account(f"acc{i}", "A", 0, "USD") for i in range(10)),
+        "transactions": (),
+        "budgets": budgets,
+        "alerts": [],
+        "budget_spend": build_budget_spend(budgets, ()),
+    }
+
+
+def _events(n):
+    return [
+        Event(
+            f"e{i}", "2024-01-01", "TRANSACTION_ADDED",
+            {"transaction": Transaction(f"tx_{i}", f"acc{i % 10}", f"cat_{i % 20}", -(i % 50) - 1, f"2024-{1 + i % 12:02d}-01", "bench")},
+        )
+        for i in range(n)
+    ]
+
+
+def _bus():
+    bus = StateEventBus()
+    bus.subscribe("TRANSACTION_ADDED", on_transaction_added)
+    bus.subscribe("TRANSACTION_ADDED", check_budget_handler)
+    return bus
+
+
+def bench_per_event(events):
+    bus, state = _bus(), _state()
+    start = time.perf_counter()
+    for e in events:
+        state = bus.publish(e, state)
+    return time.perf_counter() - start, state
+
+
+def bench_batch(events, batch_size):
+    bus, state = _bus(), _state()
+    start = time.perf_counter()
+    for i in range(0, len(events), batch_size):
+        state = bus.publish_batch(events[i:i + batch_size], state)
+    return time.perf_counter() - start, state
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    events = _events(n)
+
+    elapsed, per_event = bench_per_event(events)
+    print(f"publish:       {n} events in {elapsed:.3f}s ({n / elapsed:,.0f}/s)")
+
+    elapsed, batched = bench_batch(events, batch_size)
+    print(f"publish_batch: {n} events in {elapsed:.3f}s ({n / elapsed:,.0f}/s, batches of {batch_size})")
+
+    assert tuple(batched["accounts"]) == tuple(per_event["accounts"])
+    assert batched["alerts"] == per_event["alerts"]
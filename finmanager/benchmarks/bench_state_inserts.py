@@ -0,0 +1,55 @@
+"""
+Benchmark: sequential inserts through state_utils.create_transaction.
+
+Compares the persistent-vector state against the old tuple-copy approach
+(`transactions + (t,)`), which is quadratic in the number of inserts.
+
+    python benchmarks/bench_state_inserts.py [n] [baseline_n]
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.domain import Account, Transaction
+from core.state_utils import create_transaction
+
+
+def _transactions(n):
+    return [
+        Transaction(f"tx_{i}", "acc1", "cat_general", -1, "2024-01-01", "bench")
+        for i in range(n)
+    ]
+
+
+def bench_persistent(n):
+    state = {"transactions": (), "accounts": (Account("acc1", "A", 0, "USD"),)}
+    start = time.perf_counter()
+    for t in _transactions(n):
+        state = create_transaction(state, t)
+    elapsed = time.perf_counter() - start
+    assert len(state["transactions"]) == n
+    return elapsed
+
+
+def bench_tuple(n):
+    trans = ()
+    start = time.perf_counter()
+    for t in _transactions(n):
+        trans = trans + (t,)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    baseline_n = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+
+    elapsed = bench_persistent(n)
+    print(f"PVector state:  {n} inserts in {elapsed:.3f}s ({n / elapsed:,.0f}/s)")
+
+    elapsed = bench_tuple(baseline_n)
+    print(
+        f"tuple baseline: {baseline_n} inserts in {elapsed:.3f}s "
+        f"({baseline_n / elapsed:,.0f}/s)"
+    )
@@ -0,0 +1,65 @@
+"""
+Benchmark: a filter -> map -> monthly group report, as chained generators
+(one generator frame per row per stage) vs core.lazy.Stream (fused stages,
+64k-row chunks) over a list and over a TransactionStore.
+
+    python benchmarks/bench_stream.py [n]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.dates import period_key
+from core.domain import Transaction
+from core.lazy import Stream
+from core.store import TransactionStore
+from core.transforms import by_amount_range, by_category
+
+
+def _transactions(n, seed=3):
+    rng = random.Random(seed)
+    return [
+        Transaction(
+            f"tx_{i}", f"acc{i % 10}", f"cat_{rng.randrange(20)}", rng.randint(-500, 200),
+            f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00", "bench",
+        )
+        for i in range(n)
+    ]
+
+
+def _generators(trans, pred):
+    rows = (t for t in trans if pred(t))
+    rows = (t for t in rows if t.amount < 0)
+    keyed = ((period_key(t.ts, "month"), t.cat_id, -t.amount) for t in rows)
+    out = {}
+    for month, cat_id, spent in keyed:
+        by_cat = out.setdefault(month, {})
+        by_cat[cat_id] = by_cat.get(cat_id, 0) + spent
+    return out
+
+
+def _stream(trans, pred):
+    return Stream(trans).filter(pred).window("month").group_reduce("cat_id", "spent")
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    trans = _transactions(n)
+    store = TransactionStore.from_transactions(trans)
+    pred = ~by_category("cat_0") & by_amount_range(10, 400)
+
+    expected, t_gen = _time(_generators, trans, pred)
+    print(f"generators      {n / t_gen:12,.0f} rows/s")
+    for label, source in (("stream (list)", trans), ("stream (store)", store)):
+        result, elapsed = _time(_stream, source, pred)
+        assert result == expected
+        print(f"{label:15s} {n / elapsed:12,.0f} rows/s  ({t_gen / elapsed:.1f}x)")
@@ -0,0 +1,61 @@
+"""
+Benchmark: streaming top-K over expense notes (high-cardinality keys).
+
+Compares the exact counter (one total per distinct note) with the bounded
+Space-Saving and Count-Min counters: rows/sec, counters kept in memory and
+how many of the exact top K each approximate mode found.
+
+    python benchmarks/bench_topk.py [n] [distinct_notes] [k]
+"""
+import os
+import random
+import sys
+import time
+from operator import attrgetter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.domain import Transaction
+from core.lazy import lazy_top_k
+from core.topk import CountMinTopK, SpaceSaving, TopK
+
+
+def _transactions(n, distinct, seed=7):
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) ** 1.1 for i in range(distinct)]
+    notes = rng.choices(range(distinct), weights, k=n)
+    for i, note in enumerate(notes):
+        yield Transaction(f"tx_{i}", "acc1", "cat", -rng.randint(1, 100), "2024-01-01", f"merchant {note}")
+
+
+def _size(acc):
+    if isinstance(acc, TopK):
+        return len(acc.totals)
+    if isinstance(acc, SpaceSaving):
+        return len(acc.counts)
+    return len(acc.table) * acc.width + len(acc.candidates)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    trans = list(_transactions(n, distinct))
+
+    results = {}
+    for method, capacity in (("exact", None), ("space_saving", 20 * k), ("count_min", 4096)):
+        start = time.perf_counter()
+        snapshots = list(lazy_top_k(trans, k, key=attrgetter("note"), every=n // 10, method=method, capacity=capacity))
+        elapsed = time.perf_counter() - start
+        results[method] = snapshots[-1]
+        print(f"{method:13s} {n} rows in {elapsed:.2f}s ({n / elapsed:,.0f}/s), {len(snapshots)} snapshots")
+
+    exact = {key for key, _ in results["exact"]}
+    for method in ("space_saving", "count_min"):
+        found = len(exact & {key for key, _ in results[method]})
+        print(f"{method:13s} recall of exact top {k}: {found}/{k}")
+
+    for acc in (TopK(k), SpaceSaving(k, 20 * k), CountMinTopK(k, 4096)):
+        for t in trans[:200_000]:
+            acc.add(t.note, -t.amount)
+        print(f"{type(acc).__name__:13s} counters after 200k rows: {_size(acc):,}")
@@ -0,0 +1,51 @@
+"""
+Benchmark: validating an imported batch, validate_transaction per row
+(tuple scans and id mappings) vs validate_transactions (id sets built once,
+column-wise checks), over a list and a TransactionStore.
+
+    python benchmarks/bench_validation.py [n]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.domain import Account, Category, Transaction
+from core.store import TransactionStore
+from core.transforms import validate_transaction, validate_transactions
+
+
+def _batch(n, seed=5):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        cat = rng.randrange(22)  # 20 known categories, ids 20/21 are unknown
+        amount = rng.randint(1, 500) * (1 if cat == 0 else -1)
+        ts = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T09:30:00"
+        rows.append(Transaction(f"tx_{i}", f"acc{rng.randrange(11)}", f"cat_{cat}", amount, ts, "import"))
+    return rows
+
+
+def _time(label, fn, n):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:36s} {n / elapsed:12,.0f} rows/s")
+    return result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    accs = tuple(Account(f"acc{i}", "n", 0, "USD") for i in range(10))
+    cats = tuple(Category(f"cat_{i}", "n", None, "income" if i == 0 else "expense") for i in range(20))
+    batch = _batch(n)
+    store = TransactionStore.from_transactions(batch)
+    acc_map, cat_map = {a.id: a for a in accs}, {c.id: c for c in cats}
+
+    _time("validate_transaction, tuples", lambda: [validate_transaction(t, accs, cats) for t in batch], n)
+    _time("validate_transaction, id mappings", lambda: [validate_transaction(t, acc_map, cat_map) for t in batch], n)
+    _, summary = _time("validate_transactions, list", lambda: validate_transactions(batch, accs, cats), n)
+    _time("validate_transactions, store", lambda: validate_transactions(store, accs, cats), n)
+    print(summary)
@@ -1,7 +1,48 @@
 """
-Configures pytest to add the project root to sys.path.
+Configures pytest to add the project root to sys.path, and defines the
+fixtures shared by the event and budget tests.
 """
 import sys
 import os
 
+import pytest
+
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+
+from core.budget_spend import build_budget_spend  # noqa: E402
+from core.frp import StateEventBus, check_budget_handler, on_transaction_added  # noqa: E402
+
+
+@pytest.fixture
+def make_bus():
+    """
+    Factory for a StateEventBus with the transaction and budget handlers.
+    """
+
+    def make(log=None):
+        bus = StateEventBus(log)
+        bus.subscribe("TRANSACTION_ADDED", on_transaction_added)
+        bus.subscribe("TRANSACTION_ADDED", check_budget_handler)
+        return bus
+
+    return make
+
+
+@pytest.fixture
+def make_state():
+    """
+    Factory for a state dict with running budget totals over transactions.
+    """
+
+    def make(budgets, accounts, transactions=()):
+        transactions = tuple(transactions)
+        return {
+            "accounts": tuple(accounts),
+            "categories": (),
+            "transactions": transactions,
+            "budgets": budgets,
+            "alerts": [],
+            "budget_spend": build_budget_spend(budgets, transactions),
+        }
+
+    return make
@@ -0,0 +1,249 @@
+"""
+Asynchronous event bus.
+
+core.frp.EventBus runs every handler inline, so a slow subscriber (a
+notification, an export) holds up the publisher and every later handler.
+AsyncEventBus gives each subscriber its own bounded queue and worker
+tasks instead: publish() only enqueues, and subscribers drain their queues
+independently of each other.
+
+    bus = AsyncEventBus()
+    bus.subscribe("TRANSACTION_ADDED", notify, maxsize=100, policy=DROP_OLDEST)
+    bus.subscribe("TRANSACTION_ADDED", export, policy=COALESCE, key=lambda e: e.payload["account_id"])
+    await bus.publish(event)
+    await bus.join()
+
+Coroutine handlers run as asyncio tasks; plain functions run in the bus
+executor (the loop's default thread pool unless one is given), so they do
+not block the event loop. A handler that raises is counted in its stats and
+reported to on_error; its worker and the other subscribers carry on, even
+if on_error itself raises.
+
+Backpressure, when a subscriber's queue is full:
+  BLOCK        publish() waits until the subscriber makes room
+  DROP_OLDEST  the oldest queued event is discarded
+  COALESCE     an event whose key (default: the event name) is already
+               queued replaces it in place; a new key waits as with BLOCK
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from core.domain import Event
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+@dataclass
+class HandlerStats:
+    """
+    Counters of one subscription. Latency is the handler's own run time.
+    """
+
+    delivered: int = 0
+    errors: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    # on_error calls that raised (the error is swallowed)
+    report_errors: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        handled = self.delivered + self.errors
+        return self.total_latency / handled if handled else 0.0
+
+
+class _Subscription:
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Event], Any],
+        maxsize: int,
+        policy: str,
+        concurrency: int,
+        key: Optional[Callable[[Event], Hashable]],
+    ):
+        self.name = name
+        self.handler = handler
+        self.maxsize = maxsize
+        self.policy = policy
+        self.concurrency = concurrency
+        self.key = key or (lambda e: e.name)
+        self.is_async = asyncio.iscoroutinefunction(handler)
+        # Queued events in arrival order; keyed so COALESCE can replace in place
+        self.queue: "OrderedDict[Any, Event]" = OrderedDict()
+        self.seq = 0
+        self.running = 0
+        self.changed = asyncio.Condition()
+        self.stats = HandlerStats()
+        self.workers: List[asyncio.Task] = []
+
+    def _slot(self, event: Event) -> Any:
+        if self.policy == COALESCE:
+            return ("key", self.key(event))
+        self.seq += 1
+        return ("seq", self.seq)
+
+    async def put(self, event: Event):
+        async with self.changed:
+            slot = self._slot(event)
+            if slot in self.queue:
+                self.queue[slot] = event
+                self.stats.coalesced += 1
+                return
+            if self.policy == DROP_OLDEST:
+                while len(self.queue) >= self.maxsize:
+                    self.queue.popitem(last=False)
+                    self.stats.dropped += 1
+            else:
+                while len(self.queue) >= self.maxsize:
+                    await self.changed.wait()
+                    if slot in self.queue:
+                        # Coalesced while waiting for room
+                        self.queue[slot] = event
+                        self.stats.coalesced += 1
+                        return
+            self.queue[slot] = event
+            self._depth_changed()
+            self.changed.notify_all()
+
+    async def get(self) -> Event:
+        async with self.changed:
+            while not self.queue:
+                await self.changed.wait()
+            _, event = self.queue.popitem(last=False)
+            self.running += 1
+            self._depth_changed()
+            self.changed.notify_all()
+            return event
+
+    async def done(self):
+        async with self.changed:
+            self.running -= 1
+            self.changed.notify_all()
+
+    async def join(self):
+        async with self.changed:
+            while self.queue or self.running:
+                await self.changed.wait()
+
+    def _depth_changed(self):
+        self.stats.depth = len(self.queue)
+        self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+
+
+class AsyncEventBus:
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        on_error: Optional[Callable[[str, Event, BaseException], None]] = None,
+    ):
+        self.executor = executor
+        self.on_error = on_error
+        self._subscribers: Dict[str, List[_Subscription]] = {}
+
+    def subscribe(
+        self,
+        name: str,
+        handler: Callable[[Event], Any],
+        maxsize: int = 1000,
+        policy: str = BLOCK,
+        concurrency: int = 1,
+        key: Optional[Callable[[Event], Hashable]] = None,
+    ):
+        """
+        Registers handler with its own queue of at most maxsize events,
+        drained by `concurrency` workers (events are handled in order only
+        with a single worker). key selects what COALESCE merges on.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy!r}")
+        if maxsize < 1 or concurrency < 1:
+            raise ValueError("maxsize and concurrency must be positive")
+        sub = _Subscription(name, handler, maxsize, policy, concurrency, key)
+        self._subscribers.setdefault(name, []).append(sub)
+
+    async def publish(self, event: Event):
+        """
+        Enqueues event for every subscriber of its name. Returns once it is
+        queued everywhere; waits only on BLOCK / COALESCE queues that are full.
+        """
+        for sub in self._subscribers.get(event.name, ()):
+            self._start(sub)
+            await sub.put(event)
+
+    async def join(self):
+        """
+        Waits until every queued event has been handled.
+        """
+        for subs in self._subscribers.values():
+            for sub in subs:
+                await sub.join()
+
+    async def close(self):
+        """
+        Handles the queued events, then stops the workers.
+        """
+        await self.join()
+        workers = [w for subs in self._subscribers.values() for sub in subs for w in sub.workers]
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for subs in self._subscribers.values():
+            for sub in subs:
+                sub.workers = []
+
+    def stats(self) -> Dict[Tuple[str, int, str], HandlerStats]:
+        """
+        HandlerStats per subscription, keyed by (event name, position among
+        that event's subscriptions, handler name): two handlers with the
+        same __name__ (lambdas, or one function subscribed twice) stay apart.
+        """
+        return {
+            (sub.name, i, getattr(sub.handler, "__name__", repr(sub.handler))): sub.stats
+            for subs in self._subscribers.values()
+            for i, sub in enumerate(subs)
+        }
+
+    def _start(self, sub: _Subscription):
+        # Workers are created on first use, inside the running loop
+        if not sub.workers:
+            sub.workers = [asyncio.create_task(self._work(sub)) for _ in range(sub.concurrency)]
+
+    async def _work(self, sub: _Subscription):
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await sub.get()
+            start = time.perf_counter()
+            try:
+                if sub.is_async:
+                    await sub.handler(event)
+                else:
+                    await loop.run_in_executor(self.executor, sub.handler, event)
+                sub.stats.delivered += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Isolated: the worker and the other subscribers keep going
+                sub.stats.errors += 1
+                if self.on_error is not None:
+                    try:
+                        self.on_error(sub.name, event, exc)
+                    except Exception:
+                        # A failing reporter must not stop the worker
+                        sub.stats.report_errors += 1
+            finally:
+                latency = time.perf_counter() - start
+                sub.stats.total_latency += latency
+                sub.stats.max_latency = max(sub.stats.max_latency, latency)
+                await sub.done()
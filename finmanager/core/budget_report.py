@@ -0,0 +1,198 @@
+import calendar
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from core.dates import (
+    MISSING_EPOCH,
+    datetime_period_key,
+    parse_ts,
+    period_key,
+)
+from core.domain import Budget, Category, Transaction
+from core.recursion import category_tree
+from core.store import TransactionStore
+from core.time_index import TimeIndex, indexable, period_window, time_index
+
+WINDOWED = ("month", "week")
+
+# period -> cat_id -> period key -> spent (abs of expenses)
+Buckets = Dict[str, Dict[str, Dict[str, int]]]
+
+
+def _period(b: Budget) -> str:
+    # Same rule as period_key: unknown periods cover all time
+    return b.period if b.period in WINDOWED else "all"
+
+
+def _add(buckets: Buckets, period: str, cat_id: str, key: str, spent: int):
+    by_key = buckets[period].setdefault(cat_id, {})
+    by_key[key] = by_key.get(key, 0) + spent
+
+
+def _bucket_rows(
+    trans: Iterable[Transaction], periods: Set[str]
+) -> Tuple[Buckets, Optional[str]]:
+    buckets: Buckets = {p: {} for p in periods}
+    windowed = [p for p in WINDOWED if p in periods]
+    latest_ts, latest_epoch = None, MISSING_EPOCH
+    for t in trans:
+        # Each timestamp is parsed once, whatever the number of budgets
+        dt = parse_ts(t.ts) if windowed else None
+        if dt is not None:
+            # Wall clock, like period_key and the store/index paths
+            epoch = calendar.timegm(dt.timetuple())
+            if epoch > latest_epoch:
+                latest_ts, latest_epoch = t.ts, epoch
+        if t.amount >= 0:
+            continue
+        spent = -t.amount
+        if "all" in periods:
+            _add(buckets, "all", t.cat_id, "all", spent)
+        if dt is not None:
+            for p in windowed:
+                _add(buckets, p, t.cat_id, datetime_period_key(dt, p), spent)
+    return buckets, latest_ts
+
+
+def _group(store: TransactionStore, mask: np.ndarray, keys: np.ndarray) -> Dict:
+    # (cat code, period index) -> spent for the masked rows
+    codes = store.cat_codes[mask].astype(np.int64)
+    keys = keys[mask]
+    if not len(keys):
+        return {}
+    low = keys.min()
+    span = int(keys.max() - low) + 1
+    uniq, inverse = np.unique(codes * span + (keys - low), return_inverse=True)
+    sums = np.rint(np.bincount(inverse, weights=-store.amounts[mask])).astype(np.int64)
+    return {
+        (int(u // span), int(u % span + low)): int(s) for u, s in zip(uniq, sums)
+    }
+
+
+def _bucket_store(
+    store: TransactionStore, periods: Set[str]
+) -> Tuple[Buckets, Optional[str]]:
+    """
+    Vectorized bucketing over the wall-clock epoch column, which matches
+    period_key for naive and offset timestamps alike.
+    """
+    buckets: Buckets = {p: {} for p in periods}
+    cat_ids = store.category_ids
+    epochs = store.wall_epochs
+    valid = epochs != MISSING_EPOCH
+    latest_ts = str(np.datetime64(int(epochs[valid].max()), "s")) if valid.any() else None
+
+    expense = store.expense_mask()
+    if "all" in periods:
+        for cat_id, spent in store.expense_by_category().items():
+            buckets["all"][cat_id] = {"all": spent}
+
+    days = np.where(valid, epochs, 0) // 86400
+    if "month" in periods:
+        months = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        for (code, m), spent in _group(store, expense & valid, months).items():
+            _add(buckets, "month", cat_ids[code], str(np.datetime64(m, "M")), spent)
+    if "week" in periods:
+        # 1970-01-01 was a Thursday (weekday 3)
+        mondays = days - (days + 3) % 7
+        for (code, d), spent in _group(store, expense & valid, mondays).items():
+            _add(buckets, "week", cat_ids[code], str(np.datetime64(d, "D")), spent)
+    return buckets, latest_ts
+
+
+def bucket_expenses(
+    trans: Iterable[Transaction], periods: Iterable[str] = ("all",) + WINDOWED
+) -> Tuple[Buckets, Optional[str]]:
+    """
+    Groups expenses by (category, period key) for every requested period in
+    one pass over trans. Also returns the latest parseable timestamp.
+    Rows whose timestamp cannot be parsed only count towards "all".
+    """
+    periods = set(periods)
+    if isinstance(trans, TransactionStore):
+        return _bucket_store(trans, periods)
+    return _bucket_rows(trans, periods)
+
+
+def _window_spend(
+    trans: Sequence[Transaction], index: TimeIndex, lo: int, hi: int
+) -> Dict[str, int]:
+    # Expenses per category over the rows with lo <= epoch < hi only
+    positions = index.window(lo, hi)
+    if isinstance(trans, TransactionStore):
+        amounts = trans.amounts[positions]
+        expense = amounts < 0
+        sums = np.bincount(
+            trans.cat_codes[positions][expense],
+            weights=-amounts[expense],
+            minlength=len(trans.category_ids),
+        )
+        return {
+            cat_id: int(v)
+            for cat_id, v in zip(trans.category_ids, np.rint(sums).astype(np.int64))
+            if v
+        }
+    sums: Dict[str, int] = {}
+    for p in positions:
+        t = trans[int(p)]
+        if t.amount < 0:
+            sums[t.cat_id] = sums.get(t.cat_id, 0) - t.amount
+    return sums
+
+
+def budget_report(
+    budgets: Tuple[Budget, ...],
+    trans: Iterable[Transaction],
+    as_of: Optional[str] = None,
+    categories: Optional[Tuple[Category, ...]] = None,
+) -> Dict[str, Dict]:
+    """
+    Evaluates every budget from one bucketing pass over trans.
+
+    "month"/"week" budgets are evaluated for the period containing as_of
+    (default: the latest transaction); other periods sum all time. When
+    categories are given, a budget also counts expenses of its subcategories.
+    Cost is O(N + B + categories x periods) instead of O(B x N).
+
+    For immutable sequences the windowed budgets read only the rows of their
+    period from the cached time index (O(log N + k)); a full pass is then
+    needed only for all-time budgets.
+    """
+    periods = {_period(b) for b in budgets}
+    index = time_index(trans) if indexable(trans) and periods - {"all"} else None
+    if index is not None:
+        buckets, _ = bucket_expenses(trans, {"all"}) if "all" in periods else ({}, None)
+        latest = index.latest_epoch
+        latest_ts = str(np.datetime64(latest, "s")) if latest is not None else None
+    else:
+        buckets, latest_ts = bucket_expenses(trans, periods)
+    as_of = as_of if as_of is not None else latest_ts
+    tree = category_tree(categories) if categories is not None else None
+
+    # Spent per category for one (period, key), rolled up once if needed
+    spent_cache: Dict[Tuple[str, Optional[str]], Dict[str, int]] = {}
+
+    def spent_by_cat(period: str, key: Optional[str]) -> Dict[str, int]:
+        if (period, key) not in spent_cache:
+            if index is not None and period != "all":
+                direct = _window_spend(trans, index, *period_window(key, period))
+            else:
+                direct = {
+                    cat_id: by_key.get(key, 0)
+                    for cat_id, by_key in buckets[period].items()
+                }
+            spent_cache[period, key] = tree.rollup_sums(direct) if tree else direct
+        return spent_cache[period, key]
+
+    report = {}
+    for b in budgets:
+        period = _period(b)
+        key = period_key(as_of, period) if as_of is not None else None
+        if period == "all":
+            key = "all"
+        # A windowed budget without a datable as_of has no current period
+        spent = spent_by_cat(period, key).get(b.cat_id, 0) if key is not None else 0
+        status = "OK" if spent <= b.limit else "OVER"
+        report[b.id] = {"limit": b.limit, "spent": spent, "status": status, "period": key}
+    return report
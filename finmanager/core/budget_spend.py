@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Tuple
+
+from core.budget_report import WINDOWED, bucket_expenses
+from core.dates import period_key
+from core.domain import Budget, Transaction
+from core.persistent import PMap, pmap
+from core.store import TransactionStore
+
+
+_EMPTY = pmap()
+
+
+@dataclass(frozen=True)
+class BudgetSpend:
+    """
+    Running expense totals per (budget, period), kept in the state dict under
+    "budget_spend" so budget checks do not rescan the transaction history.
+    totals maps budget id -> period key -> spent (abs of expenses); both
+    levels are PMaps, so an update shares everything it does not touch.
+    """
+
+    budgets: Tuple[Budget, ...]
+    by_cat: Dict[str, Tuple[Budget, ...]]
+    totals: PMap
+
+    def spent(self, b: Budget, ts: str) -> int:
+        key = period_key(ts, b.period)
+        return self.totals.get(b.id, _EMPTY).get(key, 0)
+
+
+def empty_budget_spend(budgets: Tuple[Budget, ...]) -> BudgetSpend:
+    by_cat: Dict[str, Tuple[Budget, ...]] = {}
+    for b in budgets:
+        by_cat[b.cat_id] = by_cat.get(b.cat_id, ()) + (b,)
+    return BudgetSpend(budgets=budgets, by_cat=by_cat, totals=pmap())
+
+
+def apply_transaction(spend: BudgetSpend, t: Transaction, sign: int = 1) -> BudgetSpend:
+    """
+    Adds (sign=1) or removes (sign=-1) one transaction from the running totals.
+    Only the budgets of t's category are touched; cost does not depend on the
+    number of transactions.
+    """
+    if t.amount >= 0 or t.cat_id not in spend.by_cat:
+        return spend
+
+    totals = spend.totals
+    for b in spend.by_cat[t.cat_id]:
+        key = period_key(t.ts, b.period)
+        if key is None:
+            continue
+        periods = totals.get(b.id, _EMPTY)
+        value = periods.get(key, 0) + sign * abs(t.amount)
+        periods = periods.set(key, value) if value else periods.discard(key)
+        totals = totals.set(b.id, periods)
+    return BudgetSpend(budgets=spend.budgets, by_cat=spend.by_cat, totals=totals)
+
+
+def apply_transactions(spend: BudgetSpend, trans: Iterable[Transaction]) -> BudgetSpend:
+    """
+    Adds a batch of transactions: the deltas are summed per (budget, period)
+    first, so every touched total is written once.
+    """
+    deltas: Dict[Tuple[str, str], int] = {}
+    for t in trans:
+        if t.amount >= 0:
+            continue
+        for b in spend.by_cat.get(t.cat_id, ()):
+            key = period_key(t.ts, b.period)
+            if key is not None:
+                deltas[b.id, key] = deltas.get((b.id, key), 0) - t.amount
+    if not deltas:
+        return spend
+
+    totals = spend.totals
+    for (b_id, key), delta in deltas.items():
+        periods = totals.get(b_id, _EMPTY)
+        value = periods.get(key, 0) + delta
+        totals = totals.set(b_id, periods.set(key, value) if value else periods.discard(key))
+    return BudgetSpend(budgets=spend.budgets, by_cat=spend.by_cat, totals=totals)
+
+
+def build_budget_spend(
+    budgets: Tuple[Budget, ...], trans: Iterable[Transaction]
+) -> BudgetSpend:
+    """
+    Rebuilds the running totals from scratch in one pass over trans. A
+    TransactionStore is bucketed on its code and wall-clock epoch columns
+    (see core.budget_report.bucket_expenses), without decoding rows.
+    """
+    spend = empty_budget_spend(budgets)
+    if not spend.by_cat:
+        return spend
+    totals: Dict[str, Dict[str, int]] = {}
+    if isinstance(trans, TransactionStore):
+        # Unknown periods cover all time, as in period_key
+        period = {b.id: b.period if b.period in WINDOWED else "all" for b in budgets}
+        buckets, _ = bucket_expenses(trans, set(period.values()))
+        for b in budgets:
+            periods = buckets[period[b.id]].get(b.cat_id)
+            if periods:
+                totals[b.id] = dict(periods)
+    else:
+        for t in trans:
+            if t.amount >= 0:
+                continue
+            for b in spend.by_cat.get(t.cat_id, ()):
+                key = period_key(t.ts, b.period)
+                if key is None:
+                    continue
+                periods = totals.setdefault(b.id, {})
+                periods[key] = periods.get(key, 0) + abs(t.amount)
+    return BudgetSpend(
+        budgets=budgets,
+        by_cat=spend.by_cat,
+        totals=pmap((b_id, pmap(periods)) for b_id, periods in totals.items()),
+    )
+
+
+def current_budget_spend(state: Dict[str, Any]) -> BudgetSpend:
+    """
+    Returns the state's running totals, rebuilding them if they are missing
+    or were built for a different budgets tuple.
+    """
+    budgets = state.get("budgets", ())
+    spend = state.get("budget_spend")
+    if spend is None or spend.budgets is not budgets:
+        spend = build_budget_spend(budgets, state.get("transactions", ()))
+    return spend
+
+
+def verify_budget_spend(state: Dict[str, Any]) -> bool:
+    """
+    Checks the incrementally maintained totals against a full rebuild.
+    """
+    spend = state.get("budget_spend")
+    if spend is None:
+        return True
+    rebuilt = build_budget_spend(spend.budgets, state.get("transactions", ()))
+    return {k: v for k, v in spend.totals.items() if v} == dict(rebuilt.totals.items())
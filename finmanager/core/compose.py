@@ -1,12 +1,58 @@
-from functools import reduce
+from typing import Any, Callable, Iterable, List, Tuple
+
+Fn = Callable[[Any], Any]
+
+
+def _identity(x):
+    return x
+
+
+def _steps(funcs: Iterable[Fn]) -> Tuple[Fn, ...]:
+    # Application order; compositions are spliced in rather than nested
+    out: List[Fn] = []
+    for f in funcs:
+        out.extend(getattr(f, "_composed", (f,)))
+    return tuple(out)
+
+
+def _fuse(steps: Tuple[Fn, ...]) -> Fn:
+    """
+    One function applying steps in order. Built once per composition, so a
+    call is a plain loop (or a direct call for short pipelines) instead of a
+    reduce with a lambda per step.
+    """
+    if len(steps) == 1:
+        return steps[0]
+    if len(steps) == 2:
+        f, g = steps
+
+        def run(x):
+            return g(f(x))
+    elif len(steps) == 3:
+        f, g, h = steps
+
+        def run(x):
+            return h(g(f(x)))
+    else:
+
+        def run(x):
+            for f in steps:
+                x = f(x)
+            return x
+
+    run._composed = steps
+    return run
 
 
 def compose(*funcs):
     """
     Composes functions right to left.
     compose(f, g)(x) = f(g(x))
+    Nested compositions are flattened: compose(f, compose(g, h)) runs
+    exactly like compose(f, g, h), with no call per nesting level.
     """
-    return lambda x: reduce(lambda v, f: f(v), reversed(funcs), x)
+    steps = _steps(reversed(funcs))
+    return _fuse(steps) if steps else _identity
 
 
 def pipe(x, *funcs):
@@ -14,4 +60,29 @@ def pipe(x, *funcs):
     Pipes value x through functions left to right.
     pipe(x, f, g) = g(f(x))
     """
-    return reduce(lambda v, f: f(v), funcs, x)
+    for f in funcs:
+        x = f(x)
+    return x
+
+
+def compose_map(*funcs) -> Callable[[Iterable[Any]], List[Any]]:
+    """
+    compose over a whole batch: compose_map(f, g)(xs) = [f(g(x)) for x in xs].
+    Each step is mapped over the batch with the built-in map, so elements
+    go through C-level iteration with no Python frame for the composition.
+    """
+    steps = _steps(reversed(funcs))
+
+    def run(xs: Iterable[Any]) -> List[Any]:
+        for f in steps:
+            xs = map(f, xs)
+        return list(xs)
+
+    return run
+
+
+def pipe_batch(xs: Iterable[Any], *funcs) -> List[Any]:
+    """
+    pipe over a whole batch: pipe_batch(xs, f, g) = [g(f(x)) for x in xs].
+    """
+    return compose_map(*reversed(funcs))(xs)
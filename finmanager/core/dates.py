@@ -0,0 +1,88 @@
+import calendar
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Epoch value used for timestamps that cannot be parsed (e.g. placeholder "ts"
+# strings in tests). It sorts before every real timestamp.
+MISSING_EPOCH = -(2**63)
+
+
+def parse_ts(ts: str) -> Optional[datetime]:
+    """
+    Parses an ISO-8601 timestamp string. Returns None if it is not a date.
+    """
+    try:
+        return datetime.fromisoformat(ts)
+    except (TypeError, ValueError):
+        return None
+
+
+def ts_to_epoch(ts: str) -> int:
+    """
+    Converts an ISO-8601 timestamp to integer epoch seconds.
+    Naive timestamps are treated as UTC.
+    """
+    dt = parse_ts(ts)
+    if dt is None:
+        return MISSING_EPOCH
+    return datetime_to_epoch(dt)
+
+
+def datetime_to_epoch(dt: datetime) -> int:
+    return calendar.timegm(dt.utctimetuple())
+
+
+def utc_offset(dt: datetime) -> int:
+    """
+    UTC offset of dt in seconds; 0 for naive timestamps.
+    Epoch + offset is the wall-clock time of dt read as UTC, which is what
+    period_key buckets on.
+    """
+    offset = dt.utcoffset()
+    return int(offset.total_seconds()) if offset is not None else 0
+
+
+def ts_offset(ts: str) -> int:
+    """
+    utc_offset of a timestamp string; 0 if it cannot be parsed.
+    """
+    dt = parse_ts(ts)
+    return utc_offset(dt) if dt is not None else 0
+
+
+def wall_epoch(ts: str) -> int:
+    """
+    Wall-clock time of ts as epoch seconds (the clock reading as if it were
+    UTC), MISSING_EPOCH if ts cannot be parsed. Agrees with period_key for
+    naive and offset timestamps alike.
+    """
+    dt = parse_ts(ts)
+    if dt is None:
+        return MISSING_EPOCH
+    return calendar.timegm(dt.timetuple())
+
+
+def period_key(ts: str, period: str) -> Optional[str]:
+    """
+    Returns the key of the budget period that contains ts:
+    "YYYY-MM" for "month", the ISO date of the Monday for "week".
+    Other periods cover all time and share the key "all".
+    Returns None if the period is windowed but ts cannot be parsed.
+    """
+    if period not in ("month", "week"):
+        return "all"
+    dt = parse_ts(ts)
+    if dt is None:
+        return None
+    return datetime_period_key(dt, period)
+
+
+def datetime_period_key(dt: datetime, period: str) -> str:
+    """
+    period_key for an already parsed timestamp.
+    """
+    if period not in ("month", "week"):
+        return "all"
+    if period == "month":
+        return f"{dt.year:04d}-{dt.month:02d}"
+    return (dt.date() - timedelta(days=dt.weekday())).isoformat()
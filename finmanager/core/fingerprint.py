@@ -0,0 +1,139 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.domain import Transaction
+from core.store import TransactionStore
+
+_MASK = (1 << 64) - 1
+
+
+def _h(obj: Any) -> int:
+    return hash(obj) & _MASK
+
+
+@dataclass(frozen=True, eq=False)
+class Fingerprint:
+    """
+    Order-independent content hash of a state, kept under
+    state["fingerprint"] and maintained by the state_utils mutators once a
+    state carries one:
+
+        value = sum of hash(t) over transactions + sum of hash(a) over
+                accounts + hash(categories) + hash(budgets)   (mod 2**64)
+
+    A mutation adds and subtracts the hashes of the rows it replaces, so
+    the fingerprint is updated in O(changed rows) and equal contents give
+    equal fingerprints, whichever sequence of mutations produced them.
+    Unlike state["version"], it can key caches shared by states on
+    different branches (sessions, replays, snapshots). Hashes of str are
+    randomized per process, so fingerprints are only comparable within one
+    process.
+
+    source holds the (transactions, accounts, categories, budgets) objects
+    it was computed for; a state whose collections were replaced by other
+    code is detected and re-hashed, as with core.state_index.
+    """
+
+    source: Tuple[Any, Any, Any, Any]
+    value: int
+    count: int
+
+    def matches(self, state: Dict[str, Any]) -> bool:
+        t, a, c, b = self.source
+        return (
+            t is state.get("transactions", ())
+            and a is state.get("accounts", ())
+            and c is state.get("categories", ())
+            and b is state.get("budgets", ())
+        )
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return self.value, self.count
+
+
+def _source(state: Dict[str, Any]) -> Tuple[Any, Any, Any, Any]:
+    return (
+        state.get("transactions", ()),
+        state.get("accounts", ()),
+        state.get("categories", ()),
+        state.get("budgets", ()),
+    )
+
+
+def _row_hashes(trans: Iterable[Transaction]) -> Iterable[int]:
+    if isinstance(trans, TransactionStore):
+        # hash(Transaction) is the hash of its field tuple, so the tuples are
+        # hashed straight from the columns instead of decoding each row
+        ids, ts, notes = trans.string_columns()
+        acc = np.array(trans.account_ids, dtype=object)[trans.account_codes]
+        cat = np.array(trans.category_ids, dtype=object)[trans.cat_codes]
+        rows = zip(ids, acc.tolist(), cat.tolist(), trans.amounts.tolist(), ts, notes)
+        return map(_h, rows)
+    return map(_h, trans)
+
+
+def build_fingerprint(state: Dict[str, Any]) -> Fingerprint:
+    """
+    Hashes every row once: O(N).
+    """
+    trans, accounts, categories, budgets = source = _source(state)
+    value = sum(_row_hashes(trans)) + sum(map(_h, accounts))
+    value += _h(tuple(categories)) + _h(tuple(budgets))
+    return Fingerprint(source=source, value=value & _MASK, count=len(trans))
+
+
+def state_fingerprint(state: Dict[str, Any]) -> Fingerprint:
+    """
+    Returns the state's fingerprint, computing it if it is missing or stale.
+    """
+    fp = state.get("fingerprint")
+    if fp is None or not fp.matches(state):
+        fp = build_fingerprint(state)
+    return fp
+
+
+def update_fingerprint(
+    state: Dict[str, Any],
+    new_state: Dict[str, Any],
+    removed: Optional[Transaction] = None,
+    added: Optional[Transaction] = None,
+    appended: Sequence[Transaction] = (),
+    acc_ids: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """
+    Carries the fingerprint of state over to new_state after one mutation:
+    removed/added transactions, a batch of appended ones, and the accounts
+    they (or acc_ids) touched. States that do not carry a fingerprint are
+    left without one (the first build is O(N), see build_fingerprint).
+    """
+    fp = state.get("fingerprint")
+    if fp is None:
+        return new_state
+    if not fp.matches(state):
+        fp = build_fingerprint(state)
+    value = fp.value
+    if removed is not None:
+        value -= _h(removed)
+    if added is not None:
+        value += _h(added)
+    value += sum(map(_h, appended))
+
+    touched = set(acc_ids)
+    touched.update(t.account_id for t in (removed, added) if t is not None)
+    touched.update(t.account_id for t in appended)
+    # state_utils never adds or removes accounts, so positions are shared
+    acc_pos = new_state["index"].acc_pos
+    old_accounts, new_accounts = state.get("accounts", ()), new_state["accounts"]
+    for acc_id in touched:
+        i = acc_pos.get(acc_id)
+        if i is not None and old_accounts[i] is not new_accounts[i]:
+            value += _h(new_accounts[i]) - _h(old_accounts[i])
+
+    trans = new_state["transactions"]
+    return {
+        **new_state,
+        "fingerprint": Fingerprint(source=_source(new_state), value=value & _MASK, count=len(trans)),
+    }
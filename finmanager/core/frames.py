@@ -0,0 +1,106 @@
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.domain import Category, Transaction
+from core.memo import extends
+from core.store import TransactionStore
+
+COLUMNS = ["id", "account_id", "cat_id", "amount", "ts", "note"]
+
+
+def _rows_frame(trans: Sequence[Transaction]) -> pd.DataFrame:
+    if isinstance(trans, TransactionStore):
+        # Built from the columns: no Transaction objects are created
+        ids, ts, notes = trans.string_columns()
+        return pd.DataFrame(
+            {
+                "id": list(ids),
+                "account_id": np.asarray(trans.account_ids, dtype=object)[trans.account_codes],
+                "cat_id": np.asarray(trans.category_ids, dtype=object)[trans.cat_codes],
+                "amount": np.asarray(trans.amounts),
+                "ts": list(ts),
+                "note": list(notes),
+            },
+            columns=COLUMNS,
+        )
+    return pd.DataFrame(
+        {
+            "id": [t.id for t in trans],
+            "account_id": [t.account_id for t in trans],
+            "cat_id": [t.cat_id for t in trans],
+            "amount": np.fromiter((t.amount for t in trans), np.int64, len(trans)),
+            "ts": [t.ts for t in trans],
+            "note": [t.note for t in trans],
+        },
+        columns=COLUMNS,
+    )
+
+
+class TransactionFrames:
+    """
+    One cached DataFrame of state["transactions"] (COLUMNS plus
+    "category_name"), shared by every page of the app.
+
+    The cache key is the state version (bumped by every state_utils
+    mutation) and the transactions object. When the new transactions extend
+    the cached ones by appends (PVector / TransactionStore), only the new
+    rows are converted and concatenated; any other change rebuilds. Callers
+    must treat the returned frame as read-only. Safe to share between
+    sessions (threads).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[Any, int]] = None
+        self._trans: Optional[Sequence[Transaction]] = None
+        self._categories: Optional[Tuple[Category, ...]] = None
+        self._frame: Optional[pd.DataFrame] = None
+        self.hits = 0
+        self.appends = 0
+        self.rebuilds = 0
+
+    def _with_names(self, df: pd.DataFrame, categories: Tuple[Category, ...]) -> pd.DataFrame:
+        names = {c.id: c.name for c in categories}
+        return df.assign(category_name=df["cat_id"].map(names))
+
+    def frame(self, state: Dict[str, Any]) -> pd.DataFrame:
+        with self._lock:
+            return self._frame_for(state)
+
+    def _frame_for(self, state: Dict[str, Any]) -> pd.DataFrame:
+        trans = state.get("transactions", ())
+        categories = state.get("categories", ())
+        key = (state.get("version"), id(trans))
+        if self._frame is not None and key == self._key and trans is self._trans:
+            if categories is not self._categories:
+                self._frame = self._with_names(self._frame, categories)
+                self._categories = categories
+            self.hits += 1
+            return self._frame
+
+        if (
+            self._frame is not None
+            and categories is self._categories
+            and extends(self._trans, trans)
+        ):
+            self.appends += 1
+            new_rows = self._with_names(_rows_frame(trans[len(self._trans):]), categories)
+            self._frame = pd.concat([self._frame, new_rows], ignore_index=True)
+        else:
+            self.rebuilds += 1
+            self._frame = self._with_names(_rows_frame(trans), categories)
+
+        self._key, self._trans, self._categories = key, trans, categories
+        return self._frame
+
+    def for_accounts(self, state: Dict[str, Any], account_ids: Optional[Sequence[str]]) -> pd.DataFrame:
+        """
+        The shared frame restricted to account_ids (None means all rows).
+        """
+        df = self.frame(state)
+        if account_ids is None:
+            return df
+        return df[df["account_id"].isin(list(account_ids))]
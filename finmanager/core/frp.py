@@ -1,6 +1,11 @@
-from typing import Callable, Dict, List
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from core.budget_spend import current_budget_spend
+from core.dates import period_key
 from core.domain import Event
+from core.event_log import EventLog
+from core.state_utils import create_transaction, create_transactions
 
 
 class EventBus:
@@ -19,8 +24,16 @@ class EventBus:
 
 
 class StateEventBus:
-    def __init__(self):
+    """
+    With a log (core.event_log.EventLog), every published event is appended
+    to it once its handlers have succeeded, and the resulting state is
+    offered to log.checkpoint for a periodic snapshot. An event whose
+    handler raises is not logged, so replay never re-raises it.
+    """
+
+    def __init__(self, log: Optional[EventLog] = None):
         self._subscribers: Dict[str, List[Callable[[Event, Dict], Dict]]] = {}
+        self.log = log
 
     def subscribe(self, name: str, handler: Callable[[Event, Dict], Dict]):
         if name not in self._subscribers:
@@ -35,61 +48,130 @@ class StateEventBus:
         if event.name in self._subscribers:
             for handler in self._subscribers[event.name]:
                 current_state = handler(event, current_state)
+        if self.log is not None:
+            self.log.append(event)
+            self.log.checkpoint(current_state)
         return current_state
 
+    def publish_batch(self, events: Iterable[Event], state: Dict) -> Dict:
+        """
+        Publishes many events (see dispatch_batch), logging them as one append
+        after all their handlers have succeeded.
+        """
+        if self.log is None:
+            return self.dispatch_batch(events, state)
+        events = list(events)
+        new_state = self.dispatch_batch(events, state)
+        self.log.append_batch(events)
+        self.log.checkpoint(new_state)
+        return new_state
+
+    def dispatch_batch(self, events: Iterable[Event], state: Dict) -> Dict:
+        """
+        Runs the handlers for many events without logging them (replay uses
+        this directly), threading the state. Consecutive events with
+        the same name are handed to each handler together: a handler with a
+        batch form (a `batch` attribute taking (events, state), see
+        on_transaction_added) is called once per run, others once per event.
+
+        Each handler sees the whole run before the next handler starts, so
+        the result equals publishing the events one by one as long as a
+        handler only reads what the earlier handlers wrote for the same
+        events (true for the handlers below).
+        """
+        current_state = state
+        for name, run in groupby(events, key=lambda e: e.name):
+            run = list(run)
+            for handler in self._subscribers.get(name, ()):
+                batch = getattr(handler, "batch", None)
+                if batch is not None:
+                    current_state = batch(run, current_state)
+                else:
+                    for event in run:
+                        current_state = handler(event, current_state)
+        return current_state
 
 
 def on_transaction_added(event: Event, state: Dict) -> Dict:
     """
     Updates the list of transactions and potentially account balances in the state.
     Payload: {"transaction": Transaction}
+    Delegates to state_utils.create_transaction, which appends to the persistent
+    transactions vector and updates the account balance in O(log N).
     """
     t = event.payload["transaction"]
-
-    # Update transactions list
-    trans = state.get("transactions", ())
-    new_trans = trans + (t,)
-
-    # Update account balance (simplified, if we store balances in state)
-    # The Seed accounts are immutable, so we replace the account list with updated one.
-    accs = state.get("accounts", ())
-    new_accs = tuple(
-        acc
-        if acc.id != t.account_id
-        # Updating balance assuming it's mutable or replacing it.
-        # account_balance function calculates from scratch, but if we want to update the cached balance:
-        else acc.__class__(acc.id, acc.name, acc.balance + t.amount, acc.currency)
-        for acc in accs
-    )
-
-    return {**state, "transactions": new_trans, "accounts": new_accs}
+    return create_transaction(state, t)
 
 
 def check_budget_handler(event: Event, state: Dict) -> Dict:
     """
     Checks if the added transaction causes a budget overflow.
     If so, adds a notification (alert) to state.
+    Reads the per-(budget, period) running totals instead of rescanning
+    transactions; they are built once if the state does not carry them yet.
     """
     t = event.payload["transaction"]
-    budgets = state.get("budgets", ())
-    trans = state.get(
-        "transactions", ()
-    )  # This includes the new one if run after on_transaction_added
 
-    alerts = state.get("alerts", [])
+    # Includes the new transaction if run after on_transaction_added
+    spend = current_budget_spend(state)
 
-    # We need to find relevant budget
-    relevant_budgets = [b for b in budgets if b.cat_id == t.cat_id]
+    alerts = state.get("alerts", [])
 
     new_alerts = list(alerts)
-    for b in relevant_budgets:
-        # Calculate spent for this budget category
-        spent = sum(
-            abs(tx.amount) for tx in trans if tx.cat_id == b.cat_id and tx.amount < 0
-        )
+    for b in spend.by_cat.get(t.cat_id, ()):
+        # Spent in the budget period that contains this transaction
+        spent = spend.spent(b, t.ts)
         if spent > b.limit:
             new_alerts.append(
                 f"Budget Alert: {b.id} exceeded! Limit {b.limit}, Spent {spent}"
             )
 
-    return {**state, "alerts": new_alerts}
+    return {**state, "alerts": new_alerts, "budget_spend": spend}
+
+
+def on_transactions_added(events: Sequence[Event], state: Dict) -> Dict:
+    """
+    Batch form of on_transaction_added: one append of all the transactions,
+    one balance change per account (state_utils.create_transactions).
+    """
+    return create_transactions(state, [e.payload["transaction"] for e in events])
+
+
+def check_budget_batch(events: Sequence[Event], state: Dict) -> Dict:
+    """
+    Batch form of check_budget_handler, producing the same alerts.
+    The running totals are read once: the period totals before the batch
+    are recovered by subtracting the batch's own expenses, and the batch is
+    then replayed over plain per-(budget, period) sums.
+    """
+    spend = current_budget_spend(state)
+    trans = [e.payload["transaction"] for e in events]
+
+    def _periods(t):
+        for b in spend.by_cat.get(t.cat_id, ()):
+            yield b, period_key(t.ts, b.period)
+
+    running: Dict[Tuple[str, str], int] = {}
+    for t in trans:
+        for b, key in _periods(t):
+            if (b.id, key) not in running:
+                running[b.id, key] = spend.spent(b, t.ts)
+            if t.amount < 0 and key is not None:
+                running[b.id, key] += t.amount
+
+    new_alerts = list(state.get("alerts", []))
+    for t in trans:
+        for b, key in _periods(t):
+            if t.amount < 0 and key is not None:
+                running[b.id, key] -= t.amount
+            spent = running[b.id, key]
+            if spent > b.limit:
+                new_alerts.append(
+                    f"Budget Alert: {b.id} exceeded! Limit {b.limit}, Spent {spent}"
+                )
+
+    return {**state, "alerts": new_alerts, "budget_spend": spend}
+
+
+on_transaction_added.batch = on_transactions_added
+check_budget_handler.batch = check_budget_batch
@@ -1,13 +1,28 @@
-from typing import Callable, Generic, TypeVar, Union
+from typing import Callable, Generic, Iterable, List, Optional, Tuple, TypeVar, Union
 
 T = TypeVar("T")
 E = TypeVar("E")
 R = TypeVar("R")
 
+# Both types are immutable: Nothing is one shared instance, and map/bind on
+# Nothing or a Left return the receiver instead of allocating a copy.
+_NOTHING: Optional["Maybe"] = None
+_new = object.__new__
+
 
 class Maybe(Generic[T]):
-    def __init__(self, value: Union[T, None]):
+    __slots__ = ("_value",)
+
+    def __new__(cls, value: Union[T, None] = None) -> "Maybe[T]":
+        if value is None and _NOTHING is not None:
+            return _NOTHING
+        self = _new(cls)
         self._value = value
+        return self
+
+    def __reduce__(self):
+        # Unpickling goes through __new__, so Nothing stays the singleton
+        return Maybe, (self._value,)
 
     @staticmethod
     def just(value: T) -> "Maybe[T]":
@@ -15,19 +30,25 @@ class Maybe(Generic[T]):
 
     @staticmethod
     def nothing() -> "Maybe[T]":
-        return Maybe(None)
+        return Nothing
 
     def is_present(self) -> bool:
         return self._value is not None
 
     def map(self, func: Callable[[T], R]) -> "Maybe[R]":
         if self._value is None:
-            return Maybe.nothing()
-        return Maybe.just(func(self._value))
+            return self
+        value = func(self._value)
+        if value is None:
+            return Nothing
+        # Skips the __new__ call: value is known not to be None
+        just = _new(Maybe)
+        just._value = value
+        return just
 
     def bind(self, func: Callable[[T], "Maybe[R]"]) -> "Maybe[R]":
         if self._value is None:
-            return Maybe.nothing()
+            return self
         return func(self._value)
 
     def get_or_else(self, default: T) -> T:
@@ -40,18 +61,24 @@ class Maybe(Generic[T]):
         return isinstance(other, Maybe) and self._value == other._value
 
 
+Nothing: Maybe = Maybe(None)
+_NOTHING = Nothing
+
+
 class Either(Generic[E, T]):
+    __slots__ = ("_value", "_is_right")
+
     def __init__(self, value: Union[E, T], is_right: bool):
         self._value = value
         self._is_right = is_right
 
     @staticmethod
     def left(error: E) -> "Either[E, T]":
-        return Either(error, is_right=False)
+        return Either(error, False)
 
     @staticmethod
     def right(value: T) -> "Either[E, T]":
-        return Either(value, is_right=True)
+        return Either(value, True)
 
     def is_right(self) -> bool:
         return self._is_right
@@ -60,17 +87,17 @@ class Either(Generic[E, T]):
         return not self._is_right
 
     def map(self, func: Callable[[T], R]) -> "Either[E, R]":
-        if self.is_left():
-            return Either(self._value, is_right=False)
-        return Either.right(func(self._value))
+        if not self._is_right:
+            return self
+        return Either(func(self._value), True)
 
     def bind(self, func: Callable[[T], "Either[E, R]"]) -> "Either[E, R]":
-        if self.is_left():
-            return Either(self._value, is_right=False)
+        if not self._is_right:
+            return self
         return func(self._value)
 
     def get_or_else(self, default: T) -> T:
-        return self._value if self.is_right() else default
+        return self._value if self._is_right else default
 
     def unwrap(self) -> Union[E, T]:
         return self._value
@@ -84,3 +111,39 @@ class Either(Generic[E, T]):
             and self._value == other._value
             and self._is_right == other._is_right
         )
+
+
+# --- Batches ---
+
+
+def partition(results: Iterable[Either[E, T]]) -> Tuple[List[T], List[E]]:
+    """
+    Splits results into (Right values, Left errors) in one pass, each in order.
+    """
+    rights: List[T] = []
+    lefts: List[E] = []
+    add_right, add_left = rights.append, lefts.append
+    for r in results:
+        if r._is_right:
+            add_right(r._value)
+        else:
+            add_left(r._value)
+    return rights, lefts
+
+
+def sequence(results: Iterable[Either[E, T]]) -> Either[List[E], List[T]]:
+    """
+    Right(all values) if every result is a Right, otherwise Left(every
+    error): all the errors of a batch are reported, not only the first.
+    """
+    rights, lefts = partition(results)
+    return Either(lefts, False) if lefts else Either(rights, True)
+
+
+def traverse(
+    items: Iterable[T], func: Callable[[T], Either[E, R]]
+) -> Either[List[E], List[R]]:
+    """
+    sequence(map(func, items)): validates a collection in one pass.
+    """
+    return sequence(map(func, items))
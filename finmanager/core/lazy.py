@@ -1,43 +1,469 @@
-from collections import defaultdict
-from typing import Callable, Iterable, Iterator, Tuple
+import heapq
+import operator
+from itertools import islice
+from operator import attrgetter, itemgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
+import numpy as np
+
+from core.compose import compose
+from core.dates import MISSING_EPOCH, period_key
+from core.memo import by_identity
 from core.domain import Category, Transaction
+from core.predicates import (
+    AllOf,
+    AnyOf,
+    Not,
+    Opaque,
+    Predicate,
+    as_predicate,
+    indexed_positions,
+)
+from core.seed_stream import stream_transactions
+from core.store import TransactionStore
+from core.topk import stream_top_k
 
 
 def iter_transactions(
-    trans: Tuple[Transaction, ...], pred: Callable[[Transaction], bool] = None
+    trans: Iterable[Transaction], pred: Callable[[Transaction], bool] = None
 ) -> Iterable[Transaction]:
     """
     Generator that yields transactions, optionally filtered by a predicate.
+    trans can be any iterable, including a streaming source such as
+    iter_transactions_from_file. Predicate objects (core.predicates) are
+    evaluated as one vectorized mask over a TransactionStore, or compiled into
+    one function per row otherwise.
     """
+    if isinstance(pred, Predicate):
+        indexed = indexed_positions(trans, pred)
+        if indexed is not None:
+            positions, rest = indexed
+            yield from iter_transactions((trans[int(i)] for i in positions), rest)
+            return
+        if isinstance(trans, TransactionStore):
+            for i in np.flatnonzero(pred.mask(trans)):
+                yield trans[int(i)]
+            return
+        pred = pred.compile()
     for t in trans:
         if pred is None or pred(t):
             yield t
 
 
+def iter_transactions_from_file(
+    path: str,
+    pred: Callable[[Transaction], bool] = None,
+    limit: Optional[int] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Iterable[Transaction]:
+    """
+    Streams transactions from a seed JSON / NDJSON file without loading it.
+    limit and the start/end date window are applied while parsing;
+    pred runs on the rows that remain.
+    """
+    return iter_transactions(
+        stream_transactions(path, limit=limit, start=start, end=end), pred
+    )
+
+
+@by_identity(maxsize=8)
+def category_names(cats: Iterable[Category]) -> Dict[str, str]:
+    """
+    Category id -> name, built once per categories object (a repeat call
+    with the same object is O(1)). A state carries it as
+    state_index(state).category_names.
+    """
+    return {c.id: c.name for c in cats}
+
+
+def _expense_pairs(
+    trans: Iterable[Transaction], key: Callable[[Transaction], Hashable]
+) -> Iterator[Optional[Tuple[Hashable, int]]]:
+    # (key, spent) per expense row; None for other rows, so they still count as seen
+    for t in trans:
+        yield (key(t), -t.amount) if t.amount < 0 else None
+
+
+def lazy_top_k(
+    trans: Iterable[Transaction],
+    k: int,
+    key: Callable[[Transaction], Hashable] = attrgetter("cat_id"),
+    every: Optional[int] = None,
+    method: str = "exact",
+    capacity: Optional[int] = None,
+) -> Iterator[List[Tuple[Hashable, int]]]:
+    """
+    Streams the expenses of trans into a top-K counter (core.topk) and
+    yields the current top K (key, spent) list every `every` rows and once
+    at the end, so a caller can show progressive results over a long stream.
+    method="space_saving" or "count_min" bounds memory for high-cardinality
+    keys (e.g. key=attrgetter("note")) at the cost of approximate totals.
+    """
+    return stream_top_k(_expense_pairs(trans, key), k, every, method, capacity)
+
+
 def lazy_top_categories(
-    trans: Iterable[Transaction], cats: Tuple[Category, ...], k: int
+    trans: Iterable[Transaction],
+    cats: Tuple[Category, ...],
+    k: int,
+    names: Optional[Mapping[str, str]] = None,
 ) -> Iterator[Tuple[str, int]]:
     """
-    Lazily computes top k categories by expense.
-    Actually, to sort top K we generally need to see all data (unless using approximate streaming algos).
-    But we can consume the iterator fully here (materialization step) or yield incrementally if the logic allows.
-    The prompt says "lazy top categories... streaming count".
-    Let's consume the stream into a dict, then sort.
-    This is "lazy processing" until the sort happens.
+    Top k categories by expense, as (name, spent), largest first.
+    The stream is consumed once into per-category totals and the top k are
+    selected with a heap (O(C log k)) rather than by sorting every category.
+    A TransactionStore is aggregated in one vectorized pass.
+    names (category id -> name, e.g. StateIndex.category_names) defaults to
+    category_names(cats).
     """
-    expenses = defaultdict(int)
+    if isinstance(trans, TransactionStore):
+        top = heapq.nlargest(k, trans.expense_by_category().items(), key=itemgetter(1))
+    else:
+        top = next(lazy_top_k(trans, k))
 
-    # Consume the iterator
-    for t in trans:
-        if t.amount < 0:
-            expenses[t.cat_id] += abs(t.amount)
+    if names is None:
+        names = category_names(cats)
+    for cat_id, amount in top:
+        yield (names.get(cat_id, cat_id), amount)
+
+
+# --- Streams ---
+
+CHUNK_SIZE = 65536
+WINDOWS = ("month", "week")
+
+# Keys and values that group_reduce / sum compute on the columns of a store
+_KEY_CODES = {
+    "cat_id": ("cat_codes", "category_ids"),
+    "account_id": ("account_codes", "account_ids"),
+}
+_VALUES = (None, "amount", "spent")
+
+
+def _vectorizable(pred: Predicate) -> bool:
+    # Opaque parts make Predicate.mask fall back to building every row
+    if isinstance(pred, Opaque):
+        return False
+    if isinstance(pred, (AllOf, AnyOf)):
+        return all(map(_vectorizable, pred.parts))
+    if isinstance(pred, Not):
+        return _vectorizable(pred.part)
+    return True
+
+
+def _fuse(stages: List[Tuple[str, Any]]) -> Optional[Callable[[List[Any]], List[Any]]]:
+    """
+    One function for a run of filter/map stages. Consecutive filters become
+    one compiled predicate (Predicate.compile) and consecutive maps one
+    composition, each applied with the built-in filter/map: rows go through
+    C-level iteration with no generator frame per stage.
+    """
+    if not stages:
+        return None
+    runs: List[Tuple[str, List[Any]]] = []
+    for kind, fn in stages:
+        if runs and runs[-1][0] == kind:
+            runs[-1][1].append(fn)
+        else:
+            runs.append((kind, [fn]))
+    plan = [
+        (filter, AllOf(fns).compile()) if kind == "filter" else (map, compose(*reversed(fns)))
+        for kind, fns in runs
+    ]
+
+    def run(rows: List[Any]) -> List[Any]:
+        for apply, fn in plan:
+            rows = apply(fn, rows)
+        return list(rows)
+
+    return run
+
+
+class _Columnar:
+    """
+    A chunk that is still column-backed: rows sel (None: all) of a store.
+    """
+
+    __slots__ = ("store", "sel")
+
+    def __init__(self, store: TransactionStore, sel: Optional[np.ndarray] = None):
+        self.store = store
+        self.sel = sel
+
+    def __len__(self) -> int:
+        return len(self.store) if self.sel is None else len(self.sel)
+
+    def column(self, name: str) -> np.ndarray:
+        arr = getattr(self.store, name)
+        return arr if self.sel is None else arr[self.sel]
+
+    def rows(self) -> List[Transaction]:
+        store = self.store
+        if self.sel is None:
+            return list(store)
+        return [store[i] for i in self.sel.tolist()]
+
+
+def _rows(chunk: Union[_Columnar, List[Any]]) -> List[Any]:
+    return chunk.rows() if isinstance(chunk, _Columnar) else chunk
+
+
+def _window_codes(epochs: np.ndarray, period: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Window start as an int (months or days since 1970) and the parseable rows;
+    # epochs are wall-clock, so windows match period_key on the ts strings
+    valid = epochs != MISSING_EPOCH
+    days = np.where(valid, epochs, 0) // 86400
+    if period == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64), valid
+    # 1970-01-01 was a Thursday (weekday 3)
+    return days - (days + 3) % 7, valid
+
+
+def _window_label(code: int, period: str) -> str:
+    return str(np.datetime64(int(code), "M" if period == "month" else "D"))
+
+
+def _window_keys(chunk: Union[_Columnar, List[Any]], period: str) -> List[Optional[str]]:
+    if not isinstance(chunk, _Columnar):
+        return [period_key(t.ts, period) for t in chunk]
+    codes, valid = _window_codes(chunk.column("wall_epochs"), period)
+    labels = {int(c): _window_label(c, period) for c in np.unique(codes[valid])}
+    return [labels[c] if v else None for c, v in zip(codes.tolist(), valid.tolist())]
+
+
+def _group_columnar(
+    chunk: _Columnar, key: str, value: Optional[str], period: Optional[str]
+) -> Dict[Hashable, int]:
+    # Sum (or count) per key code, and per window code for a windowed stream
+    codes_name, vocab_name = _KEY_CODES[key]
+    codes = chunk.column(codes_name).astype(np.int64)
+    amounts = chunk.column("amounts")
+    keep = amounts < 0 if value == "spent" else np.ones(len(codes), dtype=bool)
+    if period is not None:
+        windows, valid = _window_codes(chunk.column("wall_epochs"), period)
+        keep &= valid
+        windows = windows[keep]
+    codes = codes[keep]
+    if not len(codes):
+        return {}
+    weights = None if value is None else amounts[keep]
+    if value == "spent":
+        weights = -weights
+    low, span = 0, 1
+    if period is not None:
+        low = int(windows.min())
+        span = int(windows.max()) - low + 1
+        codes = codes * span + (windows - low)
+    uniq, inverse = np.unique(codes, return_inverse=True)
+    sums = np.bincount(inverse, weights=weights)
+    if weights is not None:
+        sums = np.rint(sums).astype(np.int64)
+    vocab = getattr(chunk.store, vocab_name)
+    if period is None:
+        return {vocab[u]: int(s) for u, s in zip(uniq.tolist(), sums.tolist())}
+    return {
+        (_window_label(u % span + low, period), vocab[u // span]): int(s)
+        for u, s in zip(uniq.tolist(), sums.tolist())
+    }
+
+
+def _value_getter(value: Union[None, str, Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    if value is None:
+        return lambda t: 1
+    if value == "spent":
+        return lambda t: -t.amount
+    if isinstance(value, str):
+        return attrgetter(value)
+    return value
+
+
+class Stream:
+    """
+    Lazy, chunked pipeline over transactions (or any records):
+
+        Stream(trans).filter(by_category("food")).map(f).window("month").group_reduce("cat_id", "spent")
+
+    Stages only record the plan; nothing runs until a terminal operation
+    (iteration, chunks, collect, count, sum, group_reduce). The source is
+    read chunk_size records at a time, so memory holds one chunk plus the
+    result whatever the length of the source: a generator such as
+    iter_transactions_from_file can be streamed (once) like a list.
+
+    Per chunk, consecutive stages are fused:
+      * a TransactionStore is cut into column-backed slices. The leading
+        filters run as one NumPy mask (Predicate.mask) and group_reduce,
+        count and sum over cat_id/account_id and amounts are vectorized, so
+        rows are only built for the row-wise stages that need them
+      * the remaining filter/map stages run as compiled predicates and
+        composed maps over the built-in filter/map per chunk (see _fuse)
+        instead of one generator per stage
+
+    window(period) keys each transaction by its "month" or "week" budget
+    window (core.dates.period_key; rows whose ts cannot be parsed are
+    dropped) and must be the last stage: iteration then yields
+    (window, record) pairs and group_reduce returns {window: {key: value}}.
+    """
+
+    def __init__(self, source: Iterable[Any], chunk_size: int = CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self._source = source
+        self.chunk_size = chunk_size
+        self._stages: Tuple[Tuple[str, Any], ...] = ()
+        self._window: Optional[str] = None
+
+    def _with(self, stage: Optional[Tuple[str, Any]] = None, window: Optional[str] = None) -> "Stream":
+        if self._window is not None:
+            raise ValueError("window() must be the last stage of a stream")
+        stream = Stream(self._source, self.chunk_size)
+        stream._stages = self._stages + ((stage,) if stage else ())
+        stream._window = window
+        return stream
+
+    # --- Stages ---
+
+    def filter(self, pred: Callable[[Any], bool]) -> "Stream":
+        return self._with(("filter", as_predicate(pred)))
+
+    def map(self, fn: Callable[[Any], Any]) -> "Stream":
+        return self._with(("map", fn))
+
+    def window(self, period: str) -> "Stream":
+        if period not in WINDOWS:
+            raise ValueError(f"Unknown window: {period!r}")
+        return self._with(window=period)
+
+    # --- Execution ---
+
+    def _chunks(self) -> Iterator[Union[_Columnar, List[Any]]]:
+        stages = list(self._stages)
+        source, size = self._source, self.chunk_size
+        if not isinstance(source, TransactionStore):
+            run = _fuse(stages)
+            it = iter(source)
+            while True:
+                rows = list(islice(it, size))
+                if not rows:
+                    return
+                if run is not None:
+                    rows = run(rows)
+                if rows:
+                    yield rows
+
+        # Leading filters: vectorizable conjuncts become the chunk mask, the
+        # others are checked row by row with the later stages
+        lead: List[Predicate] = []
+        while stages and stages[0][0] == "filter":
+            lead.append(stages.pop(0)[1])
+        parts = AllOf(lead).parts
+        mask = AllOf(p for p in parts if _vectorizable(p))
+        rest = [p for p in parts if not _vectorizable(p)]
+        run = _fuse(([("filter", AllOf(rest))] if rest else []) + stages)
+        for start in range(0, len(source), size):
+            chunk = _Columnar(source.slice(start, start + size))
+            if mask.parts:
+                chunk.sel = np.flatnonzero(mask.mask(chunk.store))
+            out = chunk if run is None else run(chunk.rows())
+            if len(out):
+                yield out
+
+    def chunks(self) -> Iterator[List[Any]]:
+        """
+        The records of the stream as one list per chunk.
+        """
+        for chunk in self._chunks():
+            rows = _rows(chunk)
+            if self._window is None:
+                yield rows
+            else:
+                keys = _window_keys(chunk, self._window)
+                yield [(w, t) for w, t in zip(keys, rows) if w is not None]
+
+    def __iter__(self) -> Iterator[Any]:
+        for rows in self.chunks():
+            yield from rows
+
+    def collect(self) -> List[Any]:
+        return list(self)
 
-    # Now sort and take top K
-    # Convert cat_id to name for better output
-    cat_map = {c.id: c.name for c in cats}
+    def count(self) -> int:
+        if self._window is not None:
+            return sum(map(len, self.chunks()))
+        return sum(map(len, self._chunks()))
 
-    sorted_expenses = sorted(expenses.items(), key=lambda x: x[1], reverse=True)
+    def sum(self, value: Union[str, Callable[[Any], Any]] = "amount") -> int:
+        """
+        Total of value over the records; "spent" sums the expenses
+        (-amount of the rows with amount < 0).
+        """
+        if self._window is not None:
+            raise ValueError("Use group_reduce to aggregate a windowed stream")
+        get_value = _value_getter(value)
+        total = 0
+        for chunk in self._chunks():
+            if isinstance(chunk, _Columnar) and value in ("amount", "spent"):
+                amounts = chunk.column("amounts")
+                total += int(amounts.sum() if value == "amount" else -amounts[amounts < 0].sum())
+                continue
+            rows = chunk if value != "spent" else [t for t in chunk if t.amount < 0]
+            total += sum(map(get_value, rows))
+        return total
 
-    for cat_id, amount in sorted_expenses[:k]:
-        yield (cat_map.get(cat_id, cat_id), amount)
+    def group_reduce(
+        self,
+        key: Union[str, Callable[[Any], Hashable]],
+        value: Union[None, str, Callable[[Any], Any]] = None,
+        op: Callable[[Any, Any], Any] = operator.add,
+    ) -> Dict[Hashable, Any]:
+        """
+        Folds the values of the records per key with op:
+        {key: op(op(v1, v2), ...)}, in one pass and O(keys) memory.
+        key and value are attribute names or functions of a record; value
+        None counts records and "spent" takes the expenses only (-amount).
+        Store chunks are reduced with NumPy for key "cat_id"/"account_id",
+        those values and op=operator.add.
+        A windowed stream returns {window: {key: value}}.
+        """
+        get_key = attrgetter(key) if isinstance(key, str) else key
+        get_value = _value_getter(value)
+        vectorized = (
+            isinstance(key, str) and key in _KEY_CODES
+            and (value is None or isinstance(value, str)) and value in _VALUES
+            and op is operator.add
+        )
+        period = self._window
+        acc: Dict[Hashable, Any] = {}
+        for chunk in self._chunks():
+            if vectorized and isinstance(chunk, _Columnar):
+                items = _group_columnar(chunk, key, value, period).items()
+            else:
+                rows = _rows(chunk)
+                if period is None:
+                    keyed = ((get_key(t), t) for t in rows)
+                else:
+                    windows = _window_keys(chunk, period)
+                    keyed = (((w, get_key(t)), t) for w, t in zip(windows, rows) if w is not None)
+                if value == "spent":
+                    keyed = ((k, t) for k, t in keyed if t.amount < 0)
+                items = ((k, get_value(t)) for k, t in keyed)
+            for k, v in items:
+                acc[k] = op(acc[k], v) if k in acc else v
+        if period is None:
+            return acc
+        nested: Dict[Hashable, Dict[Hashable, Any]] = {}
+        for (w, k), v in acc.items():
+            nested.setdefault(w, {})[k] = v
+        return nested
@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+State = Dict[str, Any]
+
+
+class Ledger:
+    """
+    Process-wide, copy-on-write holder of the application state.
+
+    State dicts are never mutated: readers take the current snapshot (a
+    plain reference read) and keep using it while writers publish new
+    versions. Writers are serialized by a lock and apply pure
+    state -> state functions (core.state_utils mutators, StateEventBus
+    publishes), so concurrent sessions share one dataset and see each
+    other's writes on their next read. Because the collections are
+    persistent, consecutive versions share almost all of their memory.
+
+    state["version"] increases with every published change. The last
+    `history` versions stay addressable through snapshot(version).
+    """
+
+    def __init__(self, state: State, history: int = 8):
+        self._lock = threading.Lock()
+        self._history = history
+        state = {**state, "version": state.get("version", 0)}
+        self._versions: "OrderedDict[int, State]" = OrderedDict([(state["version"], state)])
+        self._state = state
+
+    @property
+    def version(self) -> int:
+        return self._state["version"]
+
+    def snapshot(self, version: Optional[int] = None) -> State:
+        """
+        The current state, or the retained state of an earlier version.
+        Raises KeyError if that version is no longer retained.
+        """
+        if version is None:
+            return self._state
+        with self._lock:
+            return self._versions[version]
+
+    def update(self, fn: Callable[..., State], *args, **kwargs) -> State:
+        """
+        Atomically replaces the state with fn(state, *args, **kwargs) and
+        returns the new state. A function that returns the state unchanged
+        does not create a version.
+        """
+        with self._lock:
+            old = self._state
+            new = fn(old, *args, **kwargs)
+            if new is old:
+                return old
+            if new.get("version", 0) <= old["version"]:
+                new = {**new, "version": old["version"] + 1}
+            self._versions[new["version"]] = new
+            while len(self._versions) > self._history:
+                self._versions.popitem(last=False)
+            self._state = new
+            return new
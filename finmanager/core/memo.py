@@ -1,28 +1,337 @@
-from functools import lru_cache
-from typing import Tuple
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
 
+import numpy as np
+
+from core.dates import MISSING_EPOCH, period_key
 from core.domain import Transaction
+from core.fingerprint import state_fingerprint
+from core.persistent import PVector
+from core.store import TransactionStore
+
+
+class ExpenseStats:
+    """
+    Expense statistics per category: overall (sum, count) and per-month totals.
+    Built once per transaction sequence and extended when rows are appended.
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, Tuple[int, int]] = {}
+        self.monthly: Dict[str, Dict[str, int]] = {}
+        self.last_month: Optional[str] = None
+
+    def copy(self) -> "ExpenseStats":
+        # Cost depends on categories x months, not on the number of transactions
+        stats = ExpenseStats()
+        stats.totals = dict(self.totals)
+        stats.monthly = {c: dict(m) for c, m in self.monthly.items()}
+        stats.last_month = self.last_month
+        return stats
+
+    def _add(self, cat_id: str, month: Optional[str], spent: int, count: int):
+        total, n = self.totals.get(cat_id, (0, 0))
+        self.totals[cat_id] = (total + spent, n + count)
+        if month is not None:
+            months = self.monthly.setdefault(cat_id, {})
+            months[month] = months.get(month, 0) + spent
+
+    def _see_month(self, month: Optional[str]):
+        if month is not None and (self.last_month is None or month > self.last_month):
+            self.last_month = month
+
+    def ingest(self, trans: Iterable[Transaction]):
+        for t in trans:
+            month = period_key(t.ts, "month")
+            self._see_month(month)
+            if t.amount < 0:
+                self._add(t.cat_id, month, -t.amount, 1)
+
+    def ingest_store(self, store: TransactionStore, start: int = 0):
+        """
+        Vectorized ingest of store rows [start:], grouped by (category, month).
+        """
+        amounts = store.amounts[start:]
+        # Wall-clock months, as period_key gives on the row path
+        epochs = store.slice(start, len(store)).wall_epochs
+        # MISSING_EPOCH (int64 min) converts to NaT
+        months = epochs.astype("datetime64[s]").astype("datetime64[M]")
+        valid = ~np.isnat(months)
+        if valid.any():
+            self._see_month(str(months[valid].max()))
+
+        expense = amounts < 0
+        codes = store.cat_codes[start:][expense]
+        # Months before 1970 are negative, so unparseable rows get an explicit sentinel
+        month_idx = np.where(valid[expense], months[expense].astype(np.int64), MISSING_EPOCH)
+        spent = -amounts[expense]
+        keys = np.stack([codes.astype(np.int64), month_idx])
+        uniq, inverse = np.unique(keys, axis=1, return_inverse=True)
+        sums = np.zeros(uniq.shape[1], dtype=np.int64)
+        counts = np.zeros(uniq.shape[1], dtype=np.int64)
+        np.add.at(sums, inverse.ravel(), spent)
+        np.add.at(counts, inverse.ravel(), 1)
+
+        cat_ids = store.category_ids
+        for (code, m), s, n in zip(uniq.T, sums, counts):
+            month = str(np.datetime64(int(m), "M")) if m != MISSING_EPOCH else None
+            self._add(cat_ids[code], month, int(s), int(n))
+
+
+def _next_months(month: str, n: int) -> Iterable[str]:
+    year, mon = int(month[:4]), int(month[5:7])
+    for _ in range(n):
+        mon += 1
+        if mon > 12:
+            year, mon = year + 1, 1
+        yield f"{year:04d}-{mon:02d}"
+
+
+def _prev_months(month: str, n: int) -> Iterable[str]:
+    year, mon = int(month[:4]), int(month[5:7])
+    for _ in range(n):
+        yield f"{year:04d}-{mon:02d}"
+        mon -= 1
+        if mon < 1:
+            year, mon = year - 1, 12
+
+
+def extends(old: Sequence, new: Sequence) -> bool:
+    """
+    True if new is old plus appended rows. Only persistent sequences
+    (PVector / TransactionStore) can prove this cheaply; others return False.
+    """
+    if isinstance(old, (PVector, TransactionStore)):
+        return old.is_prefix_of(new)
+    return False
+
+
+def by_identity(maxsize: int = 8) -> Callable[[Callable[[Any], Any]], Callable[[Any], Any]]:
+    """
+    Caches fn(obj) by the identity of obj, for values derived from
+    immutable collections (e.g. a name map per categories tuple). A hit
+    is O(1) whatever the size of obj, unlike lru_cache, which hashes the
+    whole tuple on every call. Entries keep obj alive, so its id cannot be
+    reused while cached.
+    """
+
+    def decorate(fn: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        cache: "OrderedDict[int, Tuple[Any, Any]]" = OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(fn)
+        def cached(obj):
+            with lock:
+                entry = cache.get(id(obj))
+                if entry is not None and entry[0] is obj:
+                    cache.move_to_end(id(obj))
+                    return entry[1]
+            value = fn(obj)
+            with lock:
+                cache[id(obj)] = (obj, value)
+                while len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return value
+
+        cached.cache_clear = cache.clear
+        return cached
+
+    return decorate
 
-# To make caching work with immutable args, they must be hashable.
-# Tuples of Frozen DataClasses are hashable.
 
+class ForecastEngine:
+    """
+    Forecasts category expenses from per-category, per-month statistics.
 
-@lru_cache
-def forecast_expenses(cat_id: str, trans: Tuple[Transaction, ...], period: int) -> int:
+    Statistics are memoized per transaction sequence. The key is the sequence
+    object itself (immutable, compared by identity, so lookup is O(1) instead
+    of hashing every transaction). When a new sequence extends the most
+    recently seen one by appends (PVector / TransactionStore), only the new
+    rows are ingested. The cache is a bounded LRU with an optional TTL.
+    It is guarded by a lock, so one engine can be shared across threads;
+    rows are ingested outside the lock, as fn runs in StateMemo.
     """
-    Simulates a heavy calculation to forecast expenses.
-    Calculates average expense for the category over the provided transactions,
-    then multiplies by period.
+
+    def __init__(self, maxsize: int = 8, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache: "OrderedDict[int, Tuple[Sequence, ExpenseStats, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.incremental = 0
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = self.incremental = 0
+
+    def _evict(self, now: float):
+        # Called with self._lock held
+        if self.ttl is not None:
+            for key in [k for k, (_, _, ts) in self._cache.items() if now - ts > self.ttl]:
+                del self._cache[key]
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def stats(self, trans: Sequence[Transaction]) -> ExpenseStats:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._cache.get(id(trans))
+            if entry is not None and entry[0] is trans:
+                self.hits += 1
+                self._cache.move_to_end(id(trans))
+                return entry[1]
+            self.misses += 1
+            base = next(reversed(self._cache.values()), None)
+            if base is not None and extends(base[0], trans):
+                self.incremental += 1
+            else:
+                base = None
+
+        if base is not None:
+            # Appended rows only: extend a copy of the previous statistics
+            # (cached statistics are never mutated, so copying needs no lock)
+            stats = base[1].copy()
+            start = len(base[0])
+        else:
+            stats = ExpenseStats()
+            start = 0
+
+        if isinstance(trans, TransactionStore):
+            stats.ingest_store(trans, start)
+        else:
+            stats.ingest(trans[start:] if start else trans)
+
+        with self._lock:
+            # The entry keeps trans alive, so its id cannot be reused while cached
+            self._cache[id(trans)] = (trans, stats, now)
+            self._cache.move_to_end(id(trans))
+            self._evict(now)
+        return stats
+
+    def monthly_totals(self, cat_id: str, trans: Sequence[Transaction]) -> Dict[str, int]:
+        return dict(self.stats(trans).monthly.get(cat_id, {}))
+
+    def forecast(
+        self,
+        cat_id: str,
+        trans: Sequence[Transaction],
+        periods: int,
+        method: str = "average",
+        window: int = 3,
+    ) -> int:
+        """
+        Forecasts total expense for cat_id over the next `periods` months.
+          "average":        mean expense per transaction * periods
+          "moving_average": mean of the last `window` monthly totals * periods
+          "seasonal":       for each future month, mean of that calendar month
+                            in past years (moving average if never seen)
+        """
+        stats = self.stats(trans)
+        if method == "average":
+            total, count = stats.totals.get(cat_id, (0, 0))
+            return int(total / count * periods) if count else 0
+
+        monthly = stats.monthly.get(cat_id, {})
+        if not monthly or stats.last_month is None:
+            return 0
+        recent = [monthly.get(m, 0) for m in _prev_months(stats.last_month, window)]
+        moving = sum(recent) / len(recent)
+        if method == "moving_average":
+            return int(moving * periods)
+        if method == "seasonal":
+            forecast = 0.0
+            for m in _next_months(stats.last_month, periods):
+                same_month = [v for k, v in monthly.items() if k[5:7] == m[5:7]]
+                forecast += sum(same_month) / len(same_month) if same_month else moving
+            return int(forecast)
+        raise ValueError(f"Unknown forecast method: {method}")
+
+
+default_engine = ForecastEngine()
+
+
+def forecast_expenses(cat_id: str, trans: Sequence[Transaction], period: int) -> int:
     """
-    # Simulate work
-    import time
+    Forecasts expenses for a category: average expense per transaction over the
+    provided transactions, multiplied by period. Backed by the memoized
+    ForecastEngine, so repeated calls over the same transactions are O(1).
+    """
+    return default_engine.forecast(cat_id, trans, period, method="average")
+
+
+class StateMemo:
+    """
+    Memoizes fn(state, *args, **kwargs) on the state's content fingerprint
+    (core.fingerprint) and the other arguments, which must be hashable.
+    A state that carries a fingerprint is keyed in O(1); equal contents
+    reached through different mutations share an entry. A state without
+    one is hashed in full (O(N)) on every call.
+
+    The cache is a bounded LRU with an optional TTL (seconds); hits,
+    misses and evictions are counted. fn runs outside the lock, so
+    concurrent misses on the same key each compute the result (the last
+    one to finish is cached); fn must be pure for this to be harmless.
+    """
+
+    def __init__(self, fn: Callable[..., Any], maxsize: int = 128, ttl: Optional[float] = None):
+        functools.update_wrapper(self, fn)
+        self.fn = fn
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
-    time.sleep(0.1)  # Simulate 100ms delay per call to make it "expensive"
+    def __call__(self, state: Dict[str, Any], *args, **kwargs):
+        key = (state_fingerprint(state).key, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and (self.ttl is None or now - entry[1] <= self.ttl):
+                self.hits += 1
+                self._cache.move_to_end(key)
+                return entry[0]
+            self.misses += 1
 
-    filtered = [t for t in trans if t.cat_id == cat_id and t.amount < 0]
-    if not filtered:
-        return 0
+        result = self.fn(state, *args, **kwargs)
+        with self._lock:
+            self._cache[key] = (result, now)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def memoize_on_state(maxsize: int = 128, ttl: Optional[float] = None) -> Callable[[Callable], StateMemo]:
+    """
+    Decorator form of StateMemo:
+
+        @memoize_on_state(maxsize=32, ttl=60)
+        def monthly_report(state, as_of=None): ...
+    """
+    def decorate(fn: Callable) -> StateMemo:
+        return StateMemo(fn, maxsize=maxsize, ttl=ttl)
 
-    total = sum(abs(t.amount) for t in filtered)
-    avg = total / len(filtered)
-    return int(avg * period)
+    return decorate
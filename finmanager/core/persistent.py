@@ -0,0 +1,469 @@
+"""
+Persistent (structurally shared) immutable collections.
+
+PVector is a 32-way bit-partitioned trie with a tail buffer (as in Clojure):
+append, lookup and point update are O(log32 N) and share all untouched nodes
+with the previous version. PMap is a hash array mapped trie (HAMT) with the
+same guarantees for set/get/remove.
+"""
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+_EMPTY_NODE: Tuple = ()
+
+
+class PVector(Sequence):
+    """
+    Immutable vector. Behaves like a tuple (len, indexing, iteration, ==, +).
+    """
+
+    __slots__ = ("_count", "_shift", "_root", "_tail")
+
+    def __init__(self, items: Iterable = ()):
+        vec = _EMPTY_VECTOR.extend(items) if items else None
+        if vec is None:
+            self._init(0, _BITS, _EMPTY_NODE, ())
+        else:
+            self._init(vec._count, vec._shift, vec._root, vec._tail)
+
+    def _init(self, count: int, shift: int, root: Tuple, tail: Tuple):
+        self._count = count
+        self._shift = shift
+        self._root = root
+        self._tail = tail
+
+    @staticmethod
+    def _make(count: int, shift: int, root: Tuple, tail: Tuple) -> "PVector":
+        vec = PVector.__new__(PVector)
+        vec._init(count, shift, root, tail)
+        return vec
+
+    # --- Reads ---
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _tail_offset(self) -> int:
+        return (self._count - 1) & ~_MASK if self._count else 0
+
+    def _leaf_for(self, i: int) -> Tuple:
+        if i >= self._tail_offset():
+            return self._tail
+        node = self._root
+        for level in range(self._shift, 0, -_BITS):
+            node = node[(i >> level) & _MASK]
+        return node
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(self._count)))
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("PVector index out of range")
+        return self._leaf_for(i)[i & _MASK]
+
+    def __iter__(self) -> Iterator:
+        tail_off = self._tail_offset()
+        for start in range(0, tail_off, _WIDTH):
+            yield from self._leaf_for(start)
+        yield from self._tail
+
+    def __eq__(self, other):
+        if not isinstance(other, (tuple, PVector)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __add__(self, other):
+        return self.extend(other)
+
+    def __radd__(self, other):
+        return tuple(other) + tuple(self)
+
+    def __repr__(self):
+        return f"PVector({list(self)!r})"
+
+    # --- Persistent updates ---
+
+    def append(self, value: Any) -> "PVector":
+        count = self._count
+        if count - self._tail_offset() < _WIDTH:
+            return PVector._make(count + 1, self._shift, self._root, self._tail + (value,))
+
+        # Tail is full: push it into the tree
+        shift = self._shift
+        if (count >> _BITS) > (1 << shift):
+            # Root overflow: grow the tree by one level
+            root = (self._root, _new_path(shift, self._tail))
+            shift += _BITS
+        else:
+            root = _push_tail(count, shift, self._root, self._tail)
+        return PVector._make(count + 1, shift, root, (value,))
+
+    def extend(self, items: Iterable) -> "PVector":
+        # Fills the tail a chunk at a time: one new tail tuple per 32 items
+        # instead of one per item
+        vec = self
+        it = iter(items)
+        while True:
+            room = _WIDTH - (vec._count - vec._tail_offset())
+            if not room:
+                # Full tail: append pushes it into the trie
+                for item in it:
+                    vec = vec.append(item)
+                    break
+                else:
+                    return vec
+                continue
+            chunk = tuple(islice(it, room))
+            if chunk:
+                vec = PVector._make(vec._count + len(chunk), vec._shift, vec._root, vec._tail + chunk)
+            if len(chunk) < room:
+                return vec
+
+    def set(self, i: int, value: Any) -> "PVector":
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("PVector index out of range")
+        if i >= self._tail_offset():
+            tail = list(self._tail)
+            tail[i & _MASK] = value
+            return PVector._make(self._count, self._shift, self._root, tuple(tail))
+        return PVector._make(
+            self._count, self._shift, _assoc_path(self._shift, self._root, i, value), self._tail
+        )
+
+    def is_prefix_of(self, other: "PVector") -> bool:
+        """
+        True if other starts with this vector's items because it was derived
+        from it by appends. Shared trie nodes are compared by identity, so this
+        is O(log N); False only means the prefix could not be proven cheaply.
+        """
+        n = self._count
+        if not isinstance(other, PVector) or n > other._count:
+            return False
+        tail_off = self._tail_offset()
+        if tail_off:
+            # Appends that grow the trie keep the old root at index 0
+            node, level = other._root, other._shift
+            while level > self._shift:
+                node = node[0]
+                level -= _BITS
+            if not _same_prefix(self._root, node, level, tail_off - 1):
+                return False
+        return all(self._tail[i - tail_off] is other[i] for i in range(tail_off, n))
+
+    def delete(self, i: int) -> "PVector":
+        """
+        Removes the item at i. Shifts every later item, so it is O(N).
+        """
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("PVector index out of range")
+        return PVector(item for j, item in enumerate(self) if j != i)
+
+
+def _new_path(level: int, node: Tuple) -> Tuple:
+    while level > 0:
+        node = (node,)
+        level -= _BITS
+    return node
+
+
+def _push_tail(count: int, level: int, parent: Tuple, tail: Tuple) -> Tuple:
+    sub_idx = ((count - 1) >> level) & _MASK
+    if level == _BITS:
+        child = tail
+    elif sub_idx < len(parent):
+        child = _push_tail(count, level - _BITS, parent[sub_idx], tail)
+    else:
+        child = _new_path(level - _BITS, tail)
+    if sub_idx < len(parent):
+        return parent[:sub_idx] + (child,) + parent[sub_idx + 1 :]
+    return parent + (child,)
+
+
+def _assoc_path(level: int, node: Tuple, i: int, value: Any) -> Tuple:
+    if level == 0:
+        idx = i & _MASK
+        return node[:idx] + (value,) + node[idx + 1 :]
+    sub_idx = (i >> level) & _MASK
+    child = _assoc_path(level - _BITS, node[sub_idx], i, value)
+    return node[:sub_idx] + (child,) + node[sub_idx + 1 :]
+
+
+def _same_prefix(a: Tuple, b: Tuple, level: int, last: int) -> bool:
+    # True if node b holds the same items as node a for every index <= last
+    if a is b:
+        return True
+    if level == 0:
+        return len(b) > (last & _MASK) and all(
+            x is y for x, y in zip(a[: (last & _MASK) + 1], b)
+        )
+    k = (last >> level) & _MASK
+    if len(b) <= k or any(a[j] is not b[j] for j in range(k)):
+        return False
+    return _same_prefix(a[k], b[k], level - _BITS, last)
+
+
+_EMPTY_VECTOR = PVector._make(0, _BITS, _EMPTY_NODE, ())
+
+
+def pvector(items: Iterable = ()) -> PVector:
+    """
+    Returns items as a PVector, reusing it if it already is one.
+    """
+    if isinstance(items, PVector):
+        return items
+    return _EMPTY_VECTOR.extend(items)
+
+
+# --- HAMT ---
+
+_HASH_MASK = (1 << 64) - 1
+_MISSING = object()
+
+
+class _Leaf:
+    __slots__ = ("hash", "key", "value")
+
+    def __init__(self, h: int, key: Any, value: Any):
+        self.hash = h
+        self.key = key
+        self.value = value
+
+
+class _Collision:
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, h: int, leaves: Tuple[_Leaf, ...]):
+        self.hash = h
+        self.leaves = leaves
+
+
+class _Node:
+    __slots__ = ("bitmap", "children")
+
+    def __init__(self, bitmap: int, children: Tuple):
+        self.bitmap = bitmap
+        self.children = children
+
+
+_EMPTY_HAMT = _Node(0, ())
+
+
+def _merge(a, b: _Leaf, shift: int):
+    # a is a _Leaf or _Collision whose hash differs from b's (or equals it)
+    if a.hash == b.hash:
+        leaves = a.leaves if isinstance(a, _Collision) else (a,)
+        return _Collision(a.hash, leaves + (b,))
+    ia = (a.hash >> shift) & _MASK
+    ib = (b.hash >> shift) & _MASK
+    if ia == ib:
+        return _Node(1 << ia, (_merge(a, b, shift + _BITS),))
+    children = (a, b) if ia < ib else (b, a)
+    return _Node((1 << ia) | (1 << ib), children)
+
+
+def _hamt_set(node: _Node, shift: int, leaf: _Leaf) -> Tuple[_Node, bool]:
+    bit = 1 << ((leaf.hash >> shift) & _MASK)
+    idx = (node.bitmap & (bit - 1)).bit_count()
+    children = node.children
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, children[:idx] + (leaf,) + children[idx:]), True
+
+    child = children[idx]
+    added = False
+    if isinstance(child, _Node):
+        new_child, added = _hamt_set(child, shift + _BITS, leaf)
+    elif isinstance(child, _Leaf):
+        if child.hash == leaf.hash and child.key == leaf.key:
+            new_child = leaf
+        else:
+            new_child, added = _merge(child, leaf, shift + _BITS), True
+    elif child.hash == leaf.hash:
+        leaves = child.leaves
+        for j, existing in enumerate(leaves):
+            if existing.key == leaf.key:
+                new_child = _Collision(child.hash, leaves[:j] + (leaf,) + leaves[j + 1 :])
+                break
+        else:
+            new_child, added = _Collision(child.hash, leaves + (leaf,)), True
+    else:
+        new_child, added = _merge(child, leaf, shift + _BITS), True
+    return _Node(node.bitmap, children[:idx] + (new_child,) + children[idx + 1 :]), added
+
+
+def _hamt_remove(node: _Node, shift: int, h: int, key: Any):
+    # Returns the new node (None if it became empty), or node itself if key is absent
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node
+    idx = (node.bitmap & (bit - 1)).bit_count()
+    child = node.children[idx]
+    if isinstance(child, _Node):
+        new_child = _hamt_remove(child, shift + _BITS, h, key)
+    elif isinstance(child, _Leaf):
+        if child.hash != h or child.key != key:
+            return node
+        new_child = None
+    else:
+        leaves = tuple(lf for lf in child.leaves if lf.key != key)
+        if len(leaves) == len(child.leaves):
+            return node
+        new_child = leaves[0] if len(leaves) == 1 else _Collision(child.hash, leaves)
+    if new_child is child:
+        return node
+    if new_child is None:
+        children = node.children[:idx] + node.children[idx + 1 :]
+        return _Node(node.bitmap & ~bit, children) if children else None
+    return _Node(node.bitmap, node.children[:idx] + (new_child,) + node.children[idx + 1 :])
+
+
+def _hamt_get(node: _Node, h: int, key: Any) -> Any:
+    shift = 0
+    while True:
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        child = node.children[(node.bitmap & (bit - 1)).bit_count()]
+        if isinstance(child, _Node):
+            node = child
+            shift += _BITS
+        elif isinstance(child, _Leaf):
+            return child.value if child.hash == h and child.key == key else _MISSING
+        else:
+            for leaf in child.leaves:
+                if leaf.key == key:
+                    return leaf.value
+            return _MISSING
+
+
+def _hamt_build(leaves: List[_Leaf], shift: int):
+    # Bottom-up build from distinct keys: one node per trie node instead of
+    # a path copy per insert
+    if shift and len(leaves) == 1:
+        return leaves[0]
+    if shift and all(lf.hash == leaves[0].hash for lf in leaves):
+        return _Collision(leaves[0].hash, tuple(leaves))
+    groups: Dict[int, List[_Leaf]] = {}
+    for lf in leaves:
+        groups.setdefault((lf.hash >> shift) & _MASK, []).append(lf)
+    bitmap = 0
+    for i in groups:
+        bitmap |= 1 << i
+    children = tuple(_hamt_build(groups[i], shift + _BITS) for i in sorted(groups))
+    return _Node(bitmap, children)
+
+
+def _hamt_leaves(node) -> Iterator[_Leaf]:
+    for child in node.children:
+        if isinstance(child, _Node):
+            yield from _hamt_leaves(child)
+        elif isinstance(child, _Leaf):
+            yield child
+        else:
+            yield from child.leaves
+
+
+class PMap(Mapping):
+    """
+    Immutable hash map. Reads like a dict; set/remove return a new PMap.
+    """
+
+    __slots__ = ("_root", "_count")
+
+    def __init__(self, items: Mapping | Iterable[Tuple[Any, Any]] = ()):
+        pm = _EMPTY_PMAP.update(items) if items else None
+        self._root = _EMPTY_HAMT if pm is None else pm._root
+        self._count = 0 if pm is None else pm._count
+
+    @staticmethod
+    def _make(root: _Node, count: int) -> "PMap":
+        pm = PMap.__new__(PMap)
+        pm._root = root
+        pm._count = count
+        return pm
+
+    def __getitem__(self, key):
+        value = _hamt_get(self._root, hash(key) & _HASH_MASK, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = _hamt_get(self._root, hash(key) & _HASH_MASK, key)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key) -> bool:
+        return _hamt_get(self._root, hash(key) & _HASH_MASK, key) is not _MISSING
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator:
+        for leaf in _hamt_leaves(self._root):
+            yield leaf.key
+
+    def items(self):
+        return ((leaf.key, leaf.value) for leaf in _hamt_leaves(self._root))
+
+    def values(self):
+        return (leaf.value for leaf in _hamt_leaves(self._root))
+
+    def __repr__(self):
+        return f"PMap({dict(self.items())!r})"
+
+    __hash__ = None
+
+    def set(self, key, value) -> "PMap":
+        leaf = _Leaf(hash(key) & _HASH_MASK, key, value)
+        root, added = _hamt_set(self._root, 0, leaf)
+        return PMap._make(root, self._count + 1 if added else self._count)
+
+    def remove(self, key) -> "PMap":
+        root = _hamt_remove(self._root, 0, hash(key) & _HASH_MASK, key)
+        if root is self._root:
+            raise KeyError(key)
+        return PMap._make(root or _EMPTY_HAMT, self._count - 1)
+
+    def discard(self, key) -> "PMap":
+        try:
+            return self.remove(key)
+        except KeyError:
+            return self
+
+    def update(self, items: Mapping | Iterable[Tuple[Any, Any]]) -> "PMap":
+        pm = self
+        pairs = items.items() if isinstance(items, Mapping) else items
+        if not self._count:
+            # From empty: dedupe (last value wins, as with repeated set) and build in bulk
+            merged = dict(pairs)
+            if not merged:
+                return self
+            leaves = [_Leaf(hash(k) & _HASH_MASK, k, v) for k, v in merged.items()]
+            return PMap._make(_hamt_build(leaves, 0), len(leaves))
+        for key, value in pairs:
+            pm = pm.set(key, value)
+        return pm
+
+
+_EMPTY_PMAP = PMap._make(_EMPTY_HAMT, 0)
+
+
+def pmap(items: Mapping | Iterable[Tuple[Any, Any]] = ()) -> PMap:
+    """
+    Returns items as a PMap, reusing it if it already is one.
+    """
+    if isinstance(items, PMap):
+        return items
+    return _EMPTY_PMAP.update(items)
@@ -0,0 +1,294 @@
+"""
+Inspectable transaction predicates.
+
+The filter factories in core.transforms (by_category, by_date_range,
+by_amount_range) return Predicate objects. They are still plain callables
+(pred(t) -> bool), but they can also be:
+
+  * combined:  by_category("food") & (by_amount_range(10, 50) | ~by_date_range(a, b))
+  * compiled:  pred.compile() turns the tree into nested closures over its
+               values, with no attribute lookups or method dispatch per row
+  * vectorized: pred.mask(store) evaluates the tree as one NumPy mask over a
+               TransactionStore (category codes, ts and amount columns)
+  * translated: storage backends (core.sqlite_store) turn the tree into SQL
+  * indexed:   a date-range conjunct is answered from the sorted time index
+               (core.time_index) in O(log N + k)
+
+Any other callable is wrapped as Opaque and still works everywhere, just
+without the fast paths. select() is the planner that picks the best one.
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.domain import Transaction
+from core.store import TransactionStore
+from core.time_index import indexable, time_index
+
+
+class Predicate(ABC):
+    @abstractmethod
+    def __call__(self, t: Transaction) -> bool:
+        ...
+
+    def __and__(self, other) -> "Predicate":
+        return AllOf((self, as_predicate(other)))
+
+    def __rand__(self, other) -> "Predicate":
+        return AllOf((as_predicate(other), self))
+
+    def __or__(self, other) -> "Predicate":
+        return AnyOf((self, as_predicate(other)))
+
+    def __ror__(self, other) -> "Predicate":
+        return AnyOf((as_predicate(other), self))
+
+    def __invert__(self) -> "Predicate":
+        return Not(self)
+
+    def mask(self, store: TransactionStore) -> np.ndarray:
+        """
+        Boolean mask over the store rows. Default: evaluate row by row.
+        """
+        return np.fromiter((self(t) for t in store), dtype=bool, count=len(store))
+
+    def compile(self) -> Callable[[Transaction], bool]:
+        """
+        A plain function equivalent to the predicate tree: each node becomes
+        a closure over its values and its compiled children.
+        """
+        return self.__call__
+
+
+class CategoryIs(Predicate):
+    def __init__(self, cat_id: str):
+        self.cat_id = cat_id
+
+    def __call__(self, t: Transaction) -> bool:
+        return t.cat_id == self.cat_id
+
+    def compile(self):
+        cat_id = self.cat_id
+
+        def category_is(t):
+            return t.cat_id == cat_id
+
+        return category_is
+
+    def mask(self, store):
+        return store.category_mask(self.cat_id)
+
+    def __repr__(self):
+        return f"CategoryIs({self.cat_id!r})"
+
+
+class DateBetween(Predicate):
+    """
+    start <= t.ts <= end, comparing ts strings. The vectorized and indexed
+    paths compare the same strings, so every path selects the same rows
+    whatever the timestamp format.
+    """
+
+    def __init__(self, start: str, end: str):
+        self.start = start
+        self.end = end
+
+    def __call__(self, t: Transaction) -> bool:
+        return self.start <= t.ts <= self.end
+
+    def compile(self):
+        start, end = self.start, self.end
+
+        def date_between(t):
+            return start <= t.ts <= end
+
+        return date_between
+
+    def mask(self, store):
+        # From the cached time index: its sorted ts column is built once per
+        # store, not on every call
+        mask = np.zeros(len(store), dtype=bool)
+        if len(store):
+            mask[time_index(store).date_range(self.start, self.end)] = True
+        return mask
+
+    def __repr__(self):
+        return f"DateBetween({self.start!r}, {self.end!r})"
+
+
+class AmountBetween(Predicate):
+    """
+    min_val <= abs(t.amount) <= max_val.
+    """
+
+    def __init__(self, min_val: int, max_val: int):
+        self.min_val = min_val
+        self.max_val = max_val
+
+    def __call__(self, t: Transaction) -> bool:
+        return self.min_val <= abs(t.amount) <= self.max_val
+
+    def compile(self):
+        min_val, max_val = self.min_val, self.max_val
+
+        def amount_between(t):
+            return min_val <= abs(t.amount) <= max_val
+
+        return amount_between
+
+    def mask(self, store):
+        amounts = np.abs(store.amounts)
+        return (amounts >= self.min_val) & (amounts <= self.max_val)
+
+    def __repr__(self):
+        return f"AmountBetween({self.min_val!r}, {self.max_val!r})"
+
+
+class AllOf(Predicate):
+    def __init__(self, parts: Iterable[Predicate]):
+        # Nested AllOf are flattened so planners see every conjunct
+        flat: List[Predicate] = []
+        for p in parts:
+            flat.extend(p.parts if isinstance(p, AllOf) else (p,))
+        self.parts: Tuple[Predicate, ...] = tuple(flat)
+
+    def __call__(self, t):
+        return all(p(t) for p in self.parts)
+
+    def compile(self):
+        fns = tuple(p.compile() for p in self.parts)
+        if len(fns) == 1:
+            return fns[0]
+        if len(fns) == 2:
+            f, g = fns
+            return lambda t: bool(f(t) and g(t))
+
+        def all_of(t):
+            for f in fns:
+                if not f(t):
+                    return False
+            return True
+
+        return all_of
+
+    def mask(self, store):
+        mask = np.ones(len(store), dtype=bool)
+        for p in self.parts:
+            mask &= p.mask(store)
+        return mask
+
+    def __repr__(self):
+        return " & ".join(map(repr, self.parts)) or "AllOf(())"
+
+
+class AnyOf(Predicate):
+    def __init__(self, parts: Iterable[Predicate]):
+        flat: List[Predicate] = []
+        for p in parts:
+            flat.extend(p.parts if isinstance(p, AnyOf) else (p,))
+        self.parts: Tuple[Predicate, ...] = tuple(flat)
+
+    def __call__(self, t):
+        return any(p(t) for p in self.parts)
+
+    def compile(self):
+        fns = tuple(p.compile() for p in self.parts)
+        if len(fns) == 1:
+            return fns[0]
+        if len(fns) == 2:
+            f, g = fns
+            return lambda t: bool(f(t) or g(t))
+
+        def any_of(t):
+            for f in fns:
+                if f(t):
+                    return True
+            return False
+
+        return any_of
+
+    def mask(self, store):
+        mask = np.zeros(len(store), dtype=bool)
+        for p in self.parts:
+            mask |= p.mask(store)
+        return mask
+
+    def __repr__(self):
+        return "(" + " | ".join(map(repr, self.parts)) + ")"
+
+
+class Not(Predicate):
+    def __init__(self, part: Predicate):
+        self.part = part
+
+    def __call__(self, t):
+        return not self.part(t)
+
+    def compile(self):
+        f = self.part.compile()
+        return lambda t: not f(t)
+
+    def mask(self, store):
+        return ~self.part.mask(store)
+
+    def __repr__(self):
+        return f"~{self.part!r}"
+
+
+class Opaque(Predicate):
+    """
+    Wraps an arbitrary callable; evaluated row by row.
+    """
+
+    def __init__(self, fn: Callable[[Transaction], bool]):
+        self.fn = fn
+
+    def __call__(self, t):
+        return bool(self.fn(t))
+
+    def compile(self):
+        return self.fn
+
+    def __repr__(self):
+        return f"Opaque({self.fn!r})"
+
+
+def as_predicate(pred: Optional[Callable[[Transaction], bool]]) -> Predicate:
+    if isinstance(pred, Predicate):
+        return pred
+    if pred is None:
+        return AllOf(())
+    return Opaque(pred)
+
+
+def indexed_positions(trans: Sequence[Transaction], pred: Predicate) -> Optional[Tuple[np.ndarray, Predicate]]:
+    """
+    Uses the time index for a date-range conjunct of pred: returns the
+    candidate row positions (in order, O(log N + k)) and the predicate left
+    to check on them, or None if no index applies.
+    """
+    parts = pred.parts if isinstance(pred, AllOf) else (pred,)
+    ranges = [p for p in parts if isinstance(p, DateBetween)]
+    if not ranges or not indexable(trans):
+        return None
+    positions = time_index(trans).date_range(ranges[0].start, ranges[0].end)
+    return positions, AllOf(p for p in parts if p is not ranges[0])
+
+
+def select(trans: Sequence[Transaction], *preds: Callable[[Transaction], bool]) -> Tuple[Transaction, ...]:
+    """
+    Transactions matching every predicate, in order.
+    The planner uses the time index for a date range, then filters the
+    remaining rows: a TransactionStore with one vectorized mask, other
+    sequences with one compiled function per row.
+    """
+    pred = AllOf(as_predicate(p) for p in preds)
+    indexed = indexed_positions(trans, pred)
+    if indexed is not None:
+        positions, rest = indexed
+        check = rest.compile()
+        return tuple(t for t in (trans[int(i)] for i in positions) if check(t))
+    if isinstance(trans, TransactionStore):
+        return tuple(trans[int(i)] for i in np.flatnonzero(pred.mask(trans)))
+    return tuple(filter(pred.compile(), trans))
@@ -1,57 +1,163 @@
-from typing import Tuple
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+import numpy as np
 
 from core.domain import Category, Transaction
+from core.memo import by_identity
+from core.store import TransactionStore
 
 
-def flatten_categories(
-    cats: Tuple[Category, ...], root_id: str | None = None
-) -> Tuple[Category, ...]:
+class CategoryTree:
     """
-    Recursively finds all categories starting from a root (or None for top-level).
-    If root_id is provided, it returns that category and all its descendants.
-    If root_id is None, it returns all categories (conceptually descendants of a virtual root).
-    Wait, the task says: flatten_categories(cats, root:str).
-    Let's assume root is the ID of the category we want to start flattening from.
+    Precomputed index over the category hierarchy:
+    parent -> children adjacency, Euler-tour (preorder) order with
+    [tin, tout) intervals, and the ancestor chain of every node.
+
+    Built with an explicit stack, so deep trees do not hit Python's
+    recursion limit. Categories whose parent is missing (or that sit on a
+    parent cycle) become extra roots after the real top-level ones.
     """
-    if root_id is None:
-        # Return all top level categories and their children
-        roots = [c for c in cats if c.parent_id is None]
-        result = []
-        for r in roots:
-            result.extend(flatten_categories(cats, r.id))
-        return tuple(result)
 
-    # Find the root category object
-    # This is inefficient O(N) search in recursion, but fits "recursive function" requirement.
-    root_cat = next((c for c in cats if c.id == root_id), None)
-    if not root_cat:
-        return ()
+    def __init__(self, cats: Tuple[Category, ...]):
+        self.by_id: Dict[str, Category] = {c.id: c for c in cats}
+        self.children: Dict[str, List[str]] = {c.id: [] for c in cats}
+        roots = []
+        for c in cats:
+            if c.parent_id is not None and c.parent_id in self.children:
+                self.children[c.parent_id].append(c.id)
+            elif c.parent_id is None:
+                roots.append(c.id)
 
-    children = [c for c in cats if c.parent_id == root_id]
+        self.order: List[str] = []
+        self.tin: Dict[str, int] = {}
+        self.tout: Dict[str, int] = {}
+        self._walk(roots)
+        self.top_level_count = len(self.order)
+        # Orphans and cycle members: start a tour at the first unvisited node
+        self._walk([c.id for c in cats if c.id not in self.tin])
 
-    # Recursive step
-    flat_children = []
-    for child in children:
-        flat_children.extend(flatten_categories(cats, child.id))
+        self.parent: Dict[str, str | None] = {}
+        self.ancestors: Dict[str, Tuple[str, ...]] = {}
+        for cat_id in self.order:
+            p = self.by_id[cat_id].parent_id
+            # A tour root has no parent in the index, even if parent_id is set
+            parent = p if p in self.tin and self.tin[p] < self.tin[cat_id] < self.tout[p] else None
+            self.parent[cat_id] = parent
+            self.ancestors[cat_id] = (cat_id,) + (self.ancestors[parent] if parent else ())
 
-    return (root_cat,) + tuple(flat_children)
+    def _walk(self, starts: Iterable[str]):
+        for start in starts:
+            if start in self.tin:
+                continue
+            stack = [(start, False)]
+            while stack:
+                cat_id, done = stack.pop()
+                if done:
+                    self.tout[cat_id] = len(self.order)
+                    continue
+                if cat_id in self.tin:
+                    continue
+                self.tin[cat_id] = len(self.order)
+                self.order.append(cat_id)
+                stack.append((cat_id, True))
+                # Reversed so the first child is visited first
+                for child in reversed(self.children[cat_id]):
+                    if child not in self.tin:
+                        stack.append((child, False))
 
+    def subtree(self, cat_id: str) -> List[str]:
+        """
+        Ids of cat_id and all its descendants, in preorder.
+        """
+        if cat_id not in self.tin:
+            return []
+        return self.order[self.tin[cat_id] : self.tout[cat_id]]
 
-def sum_expenses_recursive(
-    cats: Tuple[Category, ...], trans: Tuple[Transaction, ...], root_id: str
-) -> int:
+    def is_ancestor(self, ancestor_id: str, cat_id: str) -> bool:
+        """
+        True if ancestor_id is cat_id or one of its ancestors. O(1).
+        """
+        return (
+            ancestor_id in self.tin
+            and cat_id in self.tin
+            and self.tin[ancestor_id] <= self.tin[cat_id] < self.tout[ancestor_id]
+        )
+
+    def rollup_sums(self, direct: Mapping[str, int]) -> Dict[str, int]:
+        """
+        Turns per-category sums into subtree sums (node + all descendants)
+        for every node at once: children are folded into parents in reverse
+        preorder, O(categories). Ids not in the tree keep their direct sum.
+        """
+        totals = dict(direct)
+        for cat_id in reversed(self.order):
+            parent = self.parent[cat_id]
+            if parent is not None and cat_id in totals:
+                totals[parent] = totals.get(parent, 0) + totals[cat_id]
+        return totals
+
+    def rollup(self, trans: Iterable[Transaction]) -> Dict[str, int]:
+        """
+        Subtree sum of amounts for every category from one pass over trans.
+        """
+        return self.rollup_sums(direct_sums(trans))
+
+
+def direct_sums(trans: Iterable[Transaction]) -> Dict[str, int]:
     """
-    Sums expenses for a category and all its subcategories recursively.
+    Sum of amounts per category id (no hierarchy), in one pass.
     """
-    # 1. Sum expenses for current category directly
-    current_expenses = sum(t.amount for t in trans if t.cat_id == root_id)
+    if isinstance(trans, TransactionStore):
+        sums = np.bincount(
+            trans.cat_codes, weights=trans.amounts, minlength=len(trans.category_ids)
+        )
+        return {
+            cat_id: int(v)
+            for cat_id, v in zip(trans.category_ids, np.rint(sums).astype(np.int64))
+        }
+    sums: Dict[str, int] = {}
+    for t in trans:
+        sums[t.cat_id] = sums.get(t.cat_id, 0) + t.amount
+    return sums
 
-    # 2. Find children
-    children = [c for c in cats if c.parent_id == root_id]
 
-    # 3. Recursive step
-    children_expenses = sum(
-        sum_expenses_recursive(cats, trans, child.id) for child in children
-    )
+@by_identity(maxsize=16)
+def category_tree(cats: Iterable[Category]) -> CategoryTree:
+    """
+    CategoryTree for a categories object, built once per object (a repeat
+    call with the same object is O(1)). A state carries it as
+    state_index(state).category_tree.
+    """
+    return CategoryTree(tuple(cats))
 
-    return current_expenses + children_expenses
+
+def flatten_categories(
+    cats: Tuple[Category, ...], root_id: str | None = None, tree: CategoryTree | None = None
+) -> Tuple[Category, ...]:
+    """
+    Finds all categories starting from a root (or None for top-level).
+    If root_id is provided, it returns that category and all its descendants.
+    If root_id is None, it returns all categories (conceptually descendants of a virtual root).
+    Order is depth-first preorder; the result is a slice of the tree's Euler tour.
+    tree (e.g. StateIndex.category_tree) defaults to category_tree(cats).
+    """
+    tree = tree if tree is not None else category_tree(cats)
+    if root_id is None:
+        ids = tree.order[: tree.top_level_count]
+    else:
+        ids = tree.subtree(root_id)
+    return tuple(tree.by_id[i] for i in ids)
+
+
+def sum_expenses_recursive(
+    cats: Tuple[Category, ...],
+    trans: Tuple[Transaction, ...],
+    root_id: str,
+    tree: CategoryTree | None = None,
+) -> int:
+    """
+    Sums expenses for a category and all its subcategories.
+    Uses the precomputed tree: one pass over trans, then a rollup.
+    """
+    tree = tree if tree is not None else category_tree(cats)
+    return tree.rollup(trans).get(root_id, 0)
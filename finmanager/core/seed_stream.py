@@ -0,0 +1,151 @@
+import json
+import re
+from typing import Any, Iterator, Optional, TextIO
+
+from core.domain import Transaction
+
+_CHUNK = 1 << 16
+_TS_FIELD = re.compile(r'"ts"\s*:\s*"([^"]*)"')
+_decoder = json.JSONDecoder()
+
+
+class _IncrementalJson:
+    """
+    Reads JSON values one at a time from a text file, holding only the
+    current chunk (plus one partially read value) in memory.
+    """
+
+    def __init__(self, f: TextIO):
+        self._f = f
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._f.read(_CHUNK)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop the consumed prefix so the buffer stays about one chunk long
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character ("" at EOF).
+        """
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def accept(self, ch: str) -> bool:
+        if self.peek() == ch:
+            self._pos += 1
+            return True
+        return False
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"Expected {ch!r} at offset {self._pos} of JSON stream")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+                # A number may continue in the next chunk
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if not self._fill():
+                value, self._pos = _decoder.raw_decode(self._buf, self._pos)
+                return value
+
+    def array_items(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.accept("]"):
+            return
+        while True:
+            yield self.value()
+            if not self.accept(","):
+                self.expect("]")
+                return
+
+
+def _transactions_array(reader: _IncrementalJson) -> Iterator[Any]:
+    # Either a bare array of transactions or a seed object with a
+    # "transactions" key; other keys are skipped value by value.
+    if reader.peek() == "[":
+        yield from reader.array_items()
+        return
+    reader.expect("{")
+    while not reader.accept("}"):
+        key = reader.value()
+        reader.expect(":")
+        if key == "transactions":
+            yield from reader.array_items()
+            return
+        reader.value()
+        reader.accept(",")
+
+
+def _in_window(ts: str, start: Optional[str], end: Optional[str]) -> bool:
+    return (start is None or start <= ts) and (end is None or ts <= end)
+
+
+def stream_transactions(
+    path: str,
+    limit: Optional[int] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    fmt: Optional[str] = None,
+) -> Iterator[Transaction]:
+    """
+    Lazily yields Transaction objects from a large data file without loading
+    it whole. Supported formats (fmt, or guessed from the file extension):
+      "ndjson" - one transaction object per line (.ndjson / .jsonl)
+      "json"   - a JSON array of transactions, or a seed file whose
+                 "transactions" array is parsed element by element.
+    start/end keep only rows with start <= ts <= end (same as by_date_range).
+    For NDJSON the window is checked on the raw line before JSON decoding.
+    limit stops reading (and closes the file) after that many rows.
+    """
+    if limit is not None and limit <= 0:
+        return
+    if fmt is None:
+        fmt = "ndjson" if path.endswith((".ndjson", ".jsonl")) else "json"
+    windowed = start is not None or end is not None
+
+    count = 0
+    with open(path, "r") as f:
+        if fmt == "ndjson":
+            rows = (line for line in f if line.strip())
+            if windowed:
+                rows = (
+                    line
+                    for line in rows
+                    if (m := _TS_FIELD.search(line)) is None
+                    or _in_window(m.group(1), start, end)
+                )
+            items = map(json.loads, rows)
+        else:
+            items = _transactions_array(_IncrementalJson(f))
+
+        for item in items:
+            if windowed and not _in_window(item["ts"], start, end):
+                continue
+            yield Transaction(**item)
+            count += 1
+            if limit is not None and count >= limit:
+                return
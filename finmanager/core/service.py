@@ -1,8 +1,32 @@
 import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
 
-from core.domain import Budget, Transaction, Account
+from core.budget_report import budget_report
+from core.domain import Budget, Category, Transaction, Account
+from core.store import TransactionStore
+from core.time_index import indexable, time_index
+
+# Rows per partition below which aggregation stays in a single partition
+MIN_PARTITION_ROWS = 50_000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    # One pool per process, started on first use. Spawned workers do not
+    # inherit the locks of the parent's threads (Streamlit is threaded)
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+        return _pool
 
 
 class BudgetService:
@@ -11,25 +35,39 @@ class BudgetService:
         self.calculators = calculators
 
     def monthly_report(
-        self, budgets: tuple[Budget, ...], trans: tuple[Transaction, ...]
+        self,
+        budgets: tuple[Budget, ...],
+        trans: tuple[Transaction, ...],
+        as_of: Optional[str] = None,
+        categories: Optional[tuple[Category, ...]] = None,
     ) -> Dict[str, Any]:
         """
         Calculates status for each budget.
-        Using composition if applicable, or just pure logic.
+        All budgets are evaluated from one bucketing pass over trans; "month"
+        and "week" budgets cover the period containing as_of (default: the
+        latest transaction). Pass categories to include subcategory spend.
         """
-        report = {}
-        for b in budgets:
-            # Simple logic: filter trans for budget category -> sum
-            spent = sum(
-                abs(t.amount) for t in trans if t.cat_id == b.cat_id and t.amount < 0
-            )
-            status = "OK" if spent <= b.limit else "OVER"
-            report[b.id] = {"limit": b.limit, "spent": spent, "status": status}
-        return report
+        return budget_report(budgets, trans, as_of=as_of, categories=categories)
 
 class ReportService:
-    def __init__(self, aggregators: Dict[str, Callable]):
+    """
+    Reports over transactions. The async aggregations split the rows into
+    partitions, reduce each partition with loop.run_in_executor and merge
+    the partial sums. Without an executor, pure-Python reducers over
+    several partitions run in a shared process pool, so they use every
+    core; a single partition and NumPy reducers run in the loop's thread
+    pool, where no pickling is needed.
+    """
+
+    def __init__(
+        self,
+        aggregators: Dict[str, Callable],
+        executor: Optional[Executor] = None,
+        partitions: Optional[int] = None,
+    ):
         self.aggregators = aggregators
+        self.executor = executor
+        self.partitions = partitions or os.cpu_count() or 1
 
     def category_report(
         self, cat_id: str, trans: Tuple["Transaction", ...]
@@ -37,6 +75,14 @@ class ReportService:
         """
         Aggregates data for a category.
         """
+        if isinstance(trans, TransactionStore):
+            mask = trans.category_mask(cat_id) & trans.expense_mask()
+            return {
+                "cat_id": cat_id,
+                "total_expense": -trans.total(mask),
+                "transaction_count": int(mask.sum()),
+            }
+
         # Фильтруем расходы (amount < 0) по категории
         filtered = [t for t in trans if t.cat_id == cat_id and t.amount < 0]
         total = sum(abs(t.amount) for t in filtered)
@@ -44,36 +90,133 @@ class ReportService:
 
         return {"cat_id": cat_id, "total_expense": total, "transaction_count": count}
 
+    def _bounds(self, n: int) -> List[Tuple[int, int]]:
+        # Small inputs are not worth the executor round trips
+        parts = max(1, min(self.partitions, n // MIN_PARTITION_ROWS))
+        step = -(-n // parts) if n else 1
+        return [(i, min(i + step, n)) for i in range(0, n, step)] or [(0, 0)]
+
+    async def _fan_out(
+        self,
+        fn: Callable,
+        partitions: List[Tuple],
+        timeout: Optional[float],
+        cpu_bound: bool = True,
+    ) -> List[Any]:
+        """
+        Runs fn(*args) for every partition in the executor and gathers the
+        results. On timeout (asyncio.TimeoutError) or when the awaiting task
+        is cancelled, partitions that have not started yet are cancelled.
+        cpu_bound marks reducers that hold the GIL (pure-Python loops).
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        if executor is None and cpu_bound and len(partitions) > 1:
+            executor = _process_pool()
+        futures = [loop.run_in_executor(executor, fn, *args) for args in partitions]
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), timeout)
+        finally:
+            for f in futures:
+                f.cancel()
+
     async def expenses_by_month(
-        self, trans: List["Transaction"], months: List[str]
+        self,
+        trans: Sequence["Transaction"],
+        months: List[str],
+        timeout: Optional[float] = None,
     ) -> Dict[str, int]:
-        
-        async def calc_month(m: str) -> int:
-            # Имитация асинхронной работы
-            await asyncio.sleep(0.01)
-            # Суммируем расходы, где дата (строка) начинается с месяца m
-            return sum(
-                abs(t.amount) for t in trans if t.ts.startswith(m) and t.amount < 0
-            )
+        """
+        Expense totals for each month prefix (e.g. "2024-03") of t.ts.
+        Immutable sequences answer each prefix from the cached time index,
+        O(log N) per month; otherwise rows are reduced in partitions.
+        """
+        if indexable(trans):
+            # Built (or extended) off the event loop on first use; the cache lives in this process
+            loop = asyncio.get_running_loop()
+            index = await asyncio.wait_for(loop.run_in_executor(None, time_index, trans), timeout)
+            return {m: index.prefix_expense_total(m) for m in months}
 
-        tasks = [calc_month(m) for m in months]
-        results = await asyncio.gather(*tasks)
+        if isinstance(trans, TransactionStore):
+            ts_col, amounts = trans.string_columns()[1], trans.amounts
+        else:
+            ts_col = [t.ts for t in trans]
+            amounts = [t.amount for t in trans]
+        wanted = frozenset(months)
+        lengths = tuple(sorted({len(m) for m in wanted}))
+        partials = await self._fan_out(
+            _month_expenses,
+            [
+                (ts_col[lo:hi], amounts[lo:hi], lengths, wanted)
+                for lo, hi in self._bounds(len(ts_col))
+            ],
+            timeout,
+        )
+        return {m: sum(p.get(m, 0) for p in partials) for m in months}
 
-        return dict(zip(months, results))
-    
     async def balance_forecast(
-        self, accounts: List["Account"], trans: List["Transaction"]
+        self,
+        accounts: Sequence["Account"],
+        trans: Sequence["Transaction"],
+        timeout: Optional[float] = None,
     ) -> Dict[str, int]:
-        
-        await asyncio.sleep(0.01)
-
-        # Берем текущие балансы. 
-        balances = {a.id: a.balance for a in accounts}
-
-        # Применяем транзакции 
-        for t in trans:
-            if t.account_id in balances:
-                balances[t.account_id] += t.amount
-        
-        return balances
-   
\ No newline at end of file
+        """
+        Current account balances plus the sum of trans per account.
+        """
+        if isinstance(trans, TransactionStore):
+            codes, amounts = trans.account_codes, trans.amounts
+            size = len(trans.account_ids)
+            partials = await self._fan_out(
+                _code_sums,
+                [(codes[lo:hi], amounts[lo:hi], size) for lo, hi in self._bounds(len(trans))],
+                timeout,
+                cpu_bound=False,
+            )
+            sums = dict(zip(trans.account_ids, np.sum(partials, axis=0).tolist()))
+        else:
+            acc_ids = [t.account_id for t in trans]
+            amounts = [t.amount for t in trans]
+            partials = await self._fan_out(
+                _key_sums,
+                [(acc_ids[lo:hi], amounts[lo:hi]) for lo, hi in self._bounds(len(trans))],
+                timeout,
+            )
+            sums = {}
+            for p in partials:
+                for acc_id, v in p.items():
+                    sums[acc_id] = sums.get(acc_id, 0) + v
+
+        return {a.id: a.balance + sums.get(a.id, 0) for a in accounts}
+
+
+# Partition reducers are module-level so a ProcessPoolExecutor can pickle them
+
+
+def _month_expenses(
+    ts: Sequence[str], amounts: Sequence[int], lengths: Tuple[int, ...], wanted: frozenset
+) -> Dict[str, int]:
+    sums: Dict[str, int] = {}
+    for t_ts, amount in zip(ts, amounts):
+        if amount >= 0:
+            continue
+        for n in lengths:
+            # lengths are ascending; a shorter ts cannot have a prefix of length n
+            if n > len(t_ts):
+                break
+            key = t_ts[:n]
+            if key in wanted:
+                sums[key] = sums.get(key, 0) - int(amount)
+    return sums
+
+
+def _key_sums(keys: Sequence[str], amounts: Sequence[int]) -> Dict[str, int]:
+    sums: Dict[str, int] = {}
+    for key, amount in zip(keys, amounts):
+        sums[key] = sums.get(key, 0) + amount
+    return sums
+
+
+def _code_sums(codes: np.ndarray, amounts: np.ndarray, size: int) -> np.ndarray:
+    sums = np.zeros(size, dtype=np.int64)
+    np.add.at(sums, codes, amounts)
+    return sums
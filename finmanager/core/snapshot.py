@@ -0,0 +1,231 @@
+"""
+Binary snapshot format for fast cold start.
+
+Layout of a snapshot file (little-endian):
+
+    magic      8 bytes  b"FMSNAP01"
+    header_len uint64
+    header     UTF-8 JSON: row count, column directory, small collections
+               (accounts, categories, budgets) and the id vocabularies
+    columns    64-byte aligned raw arrays
+
+Transaction columns are amount/epoch (int64), UTC offset and
+account/category codes (int32) and id/ts/note references (int64) into a shared string table,
+which is stored as an offsets array (int64) plus a UTF-8 blob.
+open_snapshot memory-maps the file and wraps the arrays in a
+TransactionStore without copying or decoding rows.
+
+Convert a seed file:
+
+    python -m core.snapshot data/seed.json data/seed.snap
+"""
+import json
+import struct
+import sys
+from dataclasses import asdict
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from core.domain import Account, Budget, Category
+from core.persistent import pvector
+from core.store import TransactionStore
+from core.transforms import load_seed
+
+MAGIC = b"FMSNAP01"
+_ALIGN = 64
+
+
+class _StringTable:
+    """
+    Deduplicating string table; repeated values (ts, notes) are stored once.
+    """
+
+    def __init__(self):
+        self._refs: Dict[str, int] = {}
+        self._parts: List[bytes] = []
+
+    def refs(self, strings: Sequence[str]) -> np.ndarray:
+        refs = self._refs
+        out = np.empty(len(strings), dtype=np.int64)
+        for i, s in enumerate(strings):
+            ref = refs.get(s)
+            if ref is None:
+                ref = refs[s] = len(self._parts)
+                self._parts.append(s.encode("utf-8"))
+            out[i] = ref
+        return out
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        lengths = np.fromiter((len(p) for p in self._parts), np.int64, len(self._parts))
+        offsets = np.zeros(len(self._parts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        blob = np.frombuffer(b"".join(self._parts), dtype=np.uint8)
+        return offsets, blob
+
+
+class _StringColumn(Sequence[str]):
+    """
+    Read-only string column that decodes values from the string table on access.
+    """
+
+    def __init__(self, refs: np.ndarray, offsets: np.ndarray, blob: np.ndarray):
+        self._refs = refs
+        self._offsets = offsets
+        self._blob = memoryview(blob)
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            # Lazy: slicing the refs decodes nothing
+            return _StringColumn(self._refs[i], self._offsets, self._blob)
+        ref = int(self._refs[i])
+        return str(self._blob[self._offsets[ref] : self._offsets[ref + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        # Full scans (indexes, fingerprints) decode each referenced string
+        # once and read refs/offsets as Python ints, not numpy scalars
+        blob, offsets = self._blob, self._offsets.tolist()
+        decoded: Dict[int, str] = {}
+        for ref in self._refs.tolist():
+            value = decoded.get(ref)
+            if value is None:
+                value = decoded[ref] = str(blob[offsets[ref] : offsets[ref + 1]], "utf-8")
+            yield value
+
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+
+def write_snapshot(path: str, state: Dict[str, Any]):
+    """
+    Writes accounts, categories, transactions and budgets of a state dict.
+    """
+    trans = state.get("transactions", ())
+    store = trans if isinstance(trans, TransactionStore) else TransactionStore.from_transactions(trans)
+
+    table = _StringTable()
+    ids, ts, notes = store.string_columns()
+    columns = {
+        "amount": store.amounts,
+        "epoch": store.epochs,
+        "offset": store.offsets,
+        "account_code": store.account_codes,
+        "cat_code": store.cat_codes,
+        "id_ref": table.refs(ids),
+        "ts_ref": table.refs(ts),
+        "note_ref": table.refs(notes),
+    }
+    columns["str_offsets"], columns["str_blob"] = table.arrays()
+
+    # Column offsets are relative to the start of the data section
+    directory = {}
+    offset = 0
+    for name, arr in columns.items():
+        directory[name] = [offset, arr.dtype.str, len(arr)]
+        offset += arr.nbytes + _pad(arr.nbytes)
+
+    header = json.dumps(
+        {
+            "version": 1,
+            "rows": len(store),
+            "columns": directory,
+            "account_ids": store.account_ids,
+            "cat_ids": store.category_ids,
+            "accounts": [asdict(a) for a in state.get("accounts", ())],
+            "categories": [asdict(c) for c in state.get("categories", ())],
+            "budgets": [asdict(b) for b in state.get("budgets", ())],
+        }
+    ).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * _pad(f.tell()))
+        for arr in columns.values():
+            f.write(np.ascontiguousarray(arr).tobytes())
+            f.write(b"\0" * _pad(arr.nbytes))
+
+
+def open_snapshot(
+    path: str,
+) -> Tuple[
+    Tuple[Account, ...],
+    Tuple[Category, ...],
+    TransactionStore,
+    Tuple[Budget, ...],
+]:
+    """
+    Opens a snapshot zero-copy. Same shape as load_seed, but transactions is
+    a TransactionStore over memory-mapped columns.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a FinManager snapshot")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+        data_start = f.tell() + _pad(f.tell())
+
+    # Plain ndarray views of the mapping: indexing a np.memmap subclass is several times slower
+    raw = np.memmap(path, dtype=np.uint8, mode="r").view(np.ndarray)
+    cols = {}
+    for name, (offset, dtype, length) in header["columns"].items():
+        dt = np.dtype(dtype)
+        start = data_start + offset
+        cols[name] = raw[start : start + length * dt.itemsize].view(dt)
+
+    def strings(refs: str) -> _StringColumn:
+        return _StringColumn(cols[refs], cols["str_offsets"], cols["str_blob"])
+
+    store = TransactionStore.from_columns(
+        cols["amount"],
+        cols["epoch"],
+        cols["account_code"],
+        cols["cat_code"],
+        strings("id_ref"),
+        strings("ts_ref"),
+        strings("note_ref"),
+        header["account_ids"],
+        header["cat_ids"],
+        # Snapshots written before the offset column recompute it from ts
+        cols.get("offset"),
+    )
+    accounts = tuple(Account(**item) for item in header["accounts"])
+    categories = tuple(Category(**item) for item in header["categories"])
+    budgets = tuple(Budget(**item) for item in header["budgets"])
+    return accounts, categories, store, budgets
+
+
+def snapshot_state(path: str) -> Dict[str, Any]:
+    """
+    State dict over an opened snapshot. Indexes, budget totals and the
+    fingerprint are left to the caller (core.state_utils.attach_derived);
+    alerts start empty (they are not part of a snapshot).
+    """
+    accs, cats, trans, buds = open_snapshot(path)
+    return {
+        "accounts": pvector(accs),
+        "categories": cats,
+        "transactions": trans,
+        "budgets": buds,
+        "alerts": [],
+    }
+
+
+def convert_seed(seed_path: str, snapshot_path: str):
+    accs, cats, trans, buds = load_seed(seed_path)
+    write_snapshot(
+        snapshot_path,
+        {"accounts": accs, "categories": cats, "transactions": trans, "budgets": buds},
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m core.snapshot <seed.json> <out.snap>")
+    convert_seed(sys.argv[1], sys.argv[2])
+    print(f"Wrote {sys.argv[2]}")
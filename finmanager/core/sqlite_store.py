@@ -0,0 +1,356 @@
+"""
+SQLite storage backend.
+
+SqliteStore persists accounts, categories, transactions and budgets in one
+database file. It mirrors the functional API: load() has the same shape as
+load_seed, and create_transaction / update_transaction / delete_transaction /
+update_account_balance apply the same changes as core.state_utils, including
+the account balances.
+
+The database runs in WAL mode, so readers do not block the writer.
+Transactions are indexed on (account_id, ts) and (cat_id, ts). Every
+statement is a constant SQL string, so sqlite3 prepares each one once and
+reuses it from the connection's statement cache. Bulk inserts use
+executemany, and writes inside `with store.batch():` share one commit.
+
+Predicates from core.predicates (by_category, by_date_range,
+by_amount_range and their &, |, ~ combinations) are translated into WHERE
+clauses. Conjuncts that cannot be translated (opaque callables) are applied
+in Python to the rows the query returns.
+
+Create a database from a seed file:
+
+    python -m core.sqlite_store data/seed.json data/finmanager.db
+"""
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.domain import Account, Budget, Category, Transaction
+from core.predicates import AllOf, AmountBetween, AnyOf, CategoryIs, DateBetween, Not, as_predicate
+from core.transforms import load_seed
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, balance INTEGER NOT NULL, currency TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id TEXT PRIMARY KEY, name TEXT NOT NULL, parent_id TEXT, type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS budgets (
+    id TEXT PRIMARY KEY, cat_id TEXT NOT NULL, "limit" INTEGER NOT NULL, period TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    account_id TEXT NOT NULL,
+    cat_id TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    note TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tx_account_ts ON transactions (account_id, ts);
+CREATE INDEX IF NOT EXISTS tx_cat_ts ON transactions (cat_id, ts);
+"""
+
+_TX_COLUMNS = "id, account_id, cat_id, amount, ts, note"
+_INSERT_TX = f"INSERT INTO transactions ({_TX_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)"
+# Bulk loads replace rows with the same id in place (keeping their seq), so
+# loading the same seed twice leaves the database unchanged
+_UPSERT_TX = (
+    f"{_INSERT_TX} ON CONFLICT (id) DO UPDATE SET account_id = excluded.account_id, "
+    "cat_id = excluded.cat_id, amount = excluded.amount, ts = excluded.ts, note = excluded.note"
+)
+_ADD_BALANCE = "UPDATE accounts SET balance = balance + ? WHERE id = ?"
+
+Predicate = Callable[[Transaction], bool]
+
+
+def _sql(pred: Predicate) -> Optional[Tuple[str, List[Any]]]:
+    """
+    SQL condition and parameters for a predicate tree, or None if some part
+    of it can only be evaluated in Python.
+    """
+    if isinstance(pred, CategoryIs):
+        return "cat_id = ?", [pred.cat_id]
+    if isinstance(pred, DateBetween):
+        return "ts BETWEEN ? AND ?", [pred.start, pred.end]
+    if isinstance(pred, AmountBetween):
+        return "abs(amount) BETWEEN ? AND ?", [pred.min_val, pred.max_val]
+    if isinstance(pred, Not):
+        inner = _sql(pred.part)
+        return (f"NOT ({inner[0]})", inner[1]) if inner else None
+    if isinstance(pred, (AllOf, AnyOf)):
+        parts = [_sql(p) for p in pred.parts]
+        if any(p is None for p in parts):
+            return None
+        if not parts:
+            return ("1", []) if isinstance(pred, AllOf) else ("0", [])
+        op = " AND " if isinstance(pred, AllOf) else " OR "
+        return op.join(f"({c})" for c, _ in parts), [v for _, ps in parts for v in ps]
+    return None
+
+
+def _where(preds: Iterable[Predicate]) -> Tuple[str, List[Any], List[Predicate]]:
+    """
+    Splits the conjunction of preds into a WHERE clause and the conjuncts
+    that must run in Python.
+    """
+    clauses, params, rest = [], [], []
+    for pred in AllOf(as_predicate(p) for p in preds).parts:
+        sql = _sql(pred)
+        if sql is None:
+            rest.append(pred)
+        else:
+            clauses.append(f"({sql[0]})")
+            params.extend(sql[1])
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params, rest
+
+
+class SqliteStore:
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        # Held for the whole outermost batch: threads sharing the connection
+        # do not interleave writes or commit each other's transactions. Reads
+        # take it too, so they never see another thread's uncommitted batch
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups the writes made inside the block into one database transaction.
+        Batches may nest; other threads wait until the outermost one ends.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._conn.rollback()
+                raise
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._conn.commit()
+
+    # --- Loading ---
+
+    def insert_seed(
+        self,
+        accounts: Iterable[Account],
+        categories: Iterable[Category],
+        transactions: Iterable[Transaction],
+        budgets: Iterable[Budget],
+    ):
+        with self.batch():
+            conn = self._conn
+            conn.executemany(
+                "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?, ?)",
+                ((a.id, a.name, a.balance, a.currency) for a in accounts),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO categories VALUES (?, ?, ?, ?)",
+                ((c.id, c.name, c.parent_id, c.type) for c in categories),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO budgets VALUES (?, ?, ?, ?)",
+                ((b.id, b.cat_id, b.limit, b.period) for b in budgets),
+            )
+            self.insert_transactions(transactions)
+
+    def insert_transactions(self, trans: Iterable[Transaction]):
+        """
+        Bulk insert without balance updates (seed rows are already reflected
+        in the account balances). A row whose id exists replaces it.
+        """
+        with self.batch():
+            self._conn.executemany(
+                _UPSERT_TX,
+                ((t.id, t.account_id, t.cat_id, t.amount, t.ts, t.note) for t in trans),
+            )
+
+    def load(
+        self,
+    ) -> Tuple[
+        Tuple[Account, ...],
+        Tuple[Category, ...],
+        Tuple[Transaction, ...],
+        Tuple[Budget, ...],
+    ]:
+        """
+        Same shape as load_seed. Read under the lock, as one consistent view.
+        """
+        with self._lock:
+            return self._load()
+
+    def _load(self):
+        conn = self._conn
+        accounts = tuple(
+            Account(*row) for row in conn.execute("SELECT id, name, balance, currency FROM accounts")
+        )
+        categories = tuple(
+            Category(*row)
+            for row in conn.execute("SELECT id, name, parent_id, type FROM categories")
+        )
+        budgets = tuple(
+            Budget(*row) for row in conn.execute('SELECT id, cat_id, "limit", period FROM budgets')
+        )
+        return accounts, categories, tuple(self.transactions()), budgets
+
+    # --- Queries ---
+
+    def transactions(self, *preds: Predicate) -> Iterator[Transaction]:
+        """
+        Transactions matching every predicate, in insertion order. Known
+        filters run in SQL (using the indexes); others run per returned row.
+        The matching rows are fetched under the lock, so iterating does not
+        hold it.
+        """
+        where, params, rest = _where(preds)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_TX_COLUMNS} FROM transactions{where} ORDER BY seq", params
+            ).fetchall()
+        for row in rows:
+            t = Transaction(*row)
+            if all(pred(t) for pred in rest):
+                yield t
+
+    def count(self, *preds: Predicate) -> int:
+        where, params, rest = _where(preds)
+        if rest:
+            return sum(1 for _ in self.transactions(*preds))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT count(*) FROM transactions{where}", params
+            ).fetchone()[0]
+
+    def account_balance(self, acc_id: str) -> int:
+        """
+        Sum of the account's transaction amounts (as transforms.account_balance).
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT coalesce(sum(amount), 0) FROM transactions WHERE account_id = ?", (acc_id,)
+            ).fetchone()
+        return row[0]
+
+    def expense_by_category(self, *preds: Predicate) -> Dict[str, int]:
+        """
+        Sum of abs(amount) over expenses per category id, grouped in SQL.
+        """
+        where, params, rest = _where(preds)
+        if rest:
+            totals: Dict[str, int] = {}
+            for t in self.transactions(*preds):
+                if t.amount < 0:
+                    totals[t.cat_id] = totals.get(t.cat_id, 0) - t.amount
+            return totals
+        where = where + (" AND " if where else " WHERE ") + "amount < 0"
+        with self._lock:
+            return dict(
+                self._conn.execute(
+                    f"SELECT cat_id, -sum(amount) FROM transactions{where} GROUP BY cat_id", params
+                )
+            )
+
+    def category_report(self, cat_id: str) -> Dict[str, Any]:
+        """
+        Same result as ReportService.category_report, from the (cat_id, ts) index.
+        """
+        with self._lock:
+            total, count = self._conn.execute(
+                "SELECT coalesce(-sum(amount), 0), count(*) FROM transactions "
+                "WHERE cat_id = ? AND amount < 0",
+                (cat_id,),
+            ).fetchone()
+        return {"cat_id": cat_id, "total_expense": total, "transaction_count": count}
+
+    # --- Mutations (same semantics as core.state_utils) ---
+
+    def _get(self, t_id: str) -> Optional[Transaction]:
+        # Only called inside batch(), with the lock held
+        row = self._conn.execute(
+            f"SELECT {_TX_COLUMNS} FROM transactions WHERE id = ?", (t_id,)
+        ).fetchone()
+        return Transaction(*row) if row else None
+
+    def update_account_balance(self, acc_id: str, new_balance: int):
+        with self.batch():
+            self._conn.execute("UPDATE accounts SET balance = ? WHERE id = ?", (new_balance, acc_id))
+
+    def create_transaction(self, t: Transaction):
+        with self.batch():
+            self._conn.execute(_INSERT_TX, (t.id, t.account_id, t.cat_id, t.amount, t.ts, t.note))
+            self._conn.execute(_ADD_BALANCE, (t.amount, t.account_id))
+
+    def update_transaction(self, t_id: str, new_data: Dict):
+        with self.batch():
+            orig = self._get(t_id)
+            if orig is None:
+                return
+            new_t = Transaction(
+                id=orig.id,
+                account_id=new_data.get("account_id", orig.account_id),
+                cat_id=new_data.get("cat_id", orig.cat_id),
+                amount=int(new_data.get("amount", orig.amount)),
+                ts=new_data.get("ts", orig.ts),
+                note=new_data.get("note", orig.note),
+            )
+            self._conn.execute(
+                "UPDATE transactions SET account_id = ?, cat_id = ?, amount = ?, ts = ?, note = ? "
+                "WHERE id = ?",
+                (new_t.account_id, new_t.cat_id, new_t.amount, new_t.ts, new_t.note, t_id),
+            )
+            self._conn.execute(_ADD_BALANCE, (-orig.amount, orig.account_id))
+            self._conn.execute(_ADD_BALANCE, (new_t.amount, new_t.account_id))
+
+    def delete_transaction(self, t_id: str):
+        with self.batch():
+            orig = self._get(t_id)
+            if orig is None:
+                return
+            self._conn.execute("DELETE FROM transactions WHERE id = ?", (t_id,))
+            self._conn.execute(_ADD_BALANCE, (-orig.amount, orig.account_id))
+
+    def mirror(self, mutator: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+        """
+        Wraps a core.state_utils mutator so the same change is also written
+        to the database:
+
+            state = store.mirror(create_transaction)(state, t)
+        """
+        write = getattr(self, mutator.__name__)
+
+        def _mirrored(state: Dict[str, Any], *args, **kwargs) -> Dict[str, Any]:
+            new_state = mutator(state, *args, **kwargs)
+            if new_state is not state:
+                write(*args, **kwargs)
+            return new_state
+
+        return _mirrored
+
+
+def convert_seed(seed_path: str, db_path: str):
+    store = SqliteStore(db_path)
+    store.insert_seed(*load_seed(seed_path))
+    store.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m core.sqlite_store <seed.json> <out.db>")
+    convert_seed(sys.argv[1], sys.argv[2])
+    print(f"Wrote {sys.argv[2]}")
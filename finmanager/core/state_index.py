@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from core.domain import Account, Category, Transaction
+from core.lazy import category_names
+from core.persistent import PMap, PVector, pmap, pvector
+from core.recursion import CategoryTree, category_tree
+from core.store import TransactionStore
+
+
+_EMPTY_IDS: PVector = pvector(())
+
+
+@dataclass(frozen=True, eq=False)
+class StateIndex:
+    """
+    Id-keyed hash indexes over the state collections, kept under
+    state["index"] and maintained by the state_utils mutators:
+
+    tx_pos:     transaction id -> position in state["transactions"]
+    acc_pos:    account id -> position in state["accounts"]
+    accounts:   account id -> Account
+    categories: category id -> Category
+    category_names: category id -> name (core.lazy.category_names)
+    category_tree:  CategoryTree of the categories (core.recursion.category_tree)
+    acc_txs:    account id -> PVector of transaction ids (in insertion order)
+
+    source holds the (transactions, accounts, categories) objects the index
+    was built for, so a state whose collections were replaced by other code
+    is detected and re-indexed instead of being read through a stale index.
+    """
+
+    source: Tuple[Any, Any, Any]
+    tx_pos: PMap
+    acc_pos: PMap
+    accounts: PMap
+    categories: PMap
+    acc_txs: PMap
+    category_names: Dict[str, str]
+    category_tree: CategoryTree
+
+    def matches(self, state: Dict[str, Any]) -> bool:
+        t, a, c = self.source
+        return (
+            t is state.get("transactions", ())
+            and a is state.get("accounts", ())
+            and c is state.get("categories", ())
+        )
+
+
+def tx_positions(trans: Iterable[Transaction]) -> PMap:
+    if isinstance(trans, TransactionStore):
+        # Only the id column is decoded, not whole rows
+        return pmap(zip(trans.string_columns()[0], range(len(trans))))
+    return pmap((t.id, i) for i, t in enumerate(trans))
+
+
+def account_transactions(trans: Iterable[Transaction]) -> PMap:
+    if isinstance(trans, TransactionStore):
+        ids = trans.string_columns()[0]
+        codes = trans.account_codes
+        order = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+        return pmap(
+            (trans.account_ids[codes[order[lo]]], pvector(ids[int(i)] for i in order[lo:hi]))
+            for lo, hi in zip(starts, list(starts[1:]) + [len(order)])
+        )
+    by_acc: Dict[str, list] = {}
+    for t in trans:
+        by_acc.setdefault(t.account_id, []).append(t.id)
+    return pmap((acc_id, pvector(ids)) for acc_id, ids in by_acc.items())
+
+
+def build_index(
+    trans: Sequence[Transaction],
+    accs: Sequence[Account],
+    cats: Sequence[Category],
+) -> StateIndex:
+    """
+    Builds every index in one pass over each collection.
+    """
+    return StateIndex(
+        source=(trans, accs, cats),
+        tx_pos=tx_positions(trans),
+        acc_pos=pmap((a.id, i) for i, a in enumerate(accs)),
+        accounts=pmap((a.id, a) for a in accs),
+        categories=pmap((c.id, c) for c in cats),
+        acc_txs=account_transactions(trans),
+        category_names=category_names(cats),
+        category_tree=category_tree(cats),
+    )
+
+
+def state_index(state: Dict[str, Any]) -> StateIndex:
+    """
+    Returns the state's index, rebuilding it if it is missing or stale.
+    """
+    index = state.get("index")
+    if index is None or not index.matches(state):
+        index = build_index(
+            state.get("transactions", ()),
+            state.get("accounts", ()),
+            state.get("categories", ()),
+        )
+    return index
+
+
+def add_account_tx(acc_txs: PMap, acc_id: str, t_id: str) -> PMap:
+    return acc_txs.set(acc_id, acc_txs.get(acc_id, _EMPTY_IDS).append(t_id))
+
+
+def add_account_txs(acc_txs: PMap, acc_id: str, t_ids: Iterable[str]) -> PMap:
+    return acc_txs.set(acc_id, acc_txs.get(acc_id, _EMPTY_IDS).extend(t_ids))
+
+
+def remove_account_tx(acc_txs: PMap, acc_id: str, t_id: str) -> PMap:
+    ids = acc_txs.get(acc_id)
+    if ids is None:
+        return acc_txs
+    # O(k) in the account's own transaction count
+    return acc_txs.set(acc_id, pvector(i for i in ids if i != t_id))
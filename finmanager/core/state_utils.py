@@ -1,90 +1,192 @@
-from typing import Dict, Any, Tuple
+from dataclasses import replace
+from typing import Dict, Any, Iterable, List, Tuple
+from core.budget_spend import apply_transaction, apply_transactions, build_budget_spend
 from core.domain import Account, Transaction, Category, Budget
+from core.fingerprint import build_fingerprint, update_fingerprint
+from core.persistent import PMap, PVector, pvector
+from core.state_index import StateIndex, add_account_tx, add_account_txs, remove_account_tx, state_index, tx_positions
+from core.views import update_views
 
-# Helper functions to update state immutably
+# Helper functions to update state immutably.
+# "transactions" and "accounts" are PVectors (persistent vectors), so appends and
+# point updates copy O(log N) nodes instead of the whole tuple.
+# state["index"] (see core.state_index) maps ids to positions/objects and is kept
+# consistent by every function here, so lookups by id are O(1) instead of scans.
+# state["version"] is incremented on every mutation, so caches can key on it.
+# state["fingerprint"] (see core.fingerprint) is a content hash updated in O(changed rows).
+# Per-user views registered in state["views"] (see core.views) are updated incrementally.
+
+def attach_derived(state: Dict[str, Any]) -> Dict[str, Any]:
+    # Builds the budget running totals, index and fingerprint of a freshly loaded state
+    # (seed, database or snapshot), so the functions below keep them up to date from then on
+    state = dict(state)
+    state["budget_spend"] = build_budget_spend(state.get("budgets", ()), state.get("transactions", ()))
+    state["index"] = state_index(state)
+    state["fingerprint"] = build_fingerprint(state)
+    return state
+
+def _track_derived(state: Dict[str, Any], new_state: Dict[str, Any], removed=None, added=None, appended=(), acc_ids=()) -> Dict[str, Any]:
+    # Keeps the fingerprint, budget running totals and per-user views (if the state tracks them) in step with a mutation
+    new_state = update_fingerprint(state, new_state, removed=removed, added=added, appended=appended, acc_ids=acc_ids)
+    new_state = update_views(state, new_state, removed=removed, added=added, appended=appended, acc_ids=acc_ids)
+    spend = state.get("budget_spend")
+    if spend is None:
+        return new_state
+    if removed is not None:
+        spend = apply_transaction(spend, removed, sign=-1)
+    if added is not None:
+        spend = apply_transaction(spend, added)
+    if appended:
+        spend = apply_transactions(spend, appended)
+    return {**new_state, "budget_spend": spend}
+
+def _adjust_balance(accounts: PVector, index: StateIndex, acc_id: str, balance_fn) -> Tuple[PVector, PMap]:
+    # Returns the new accounts vector and the new account id -> Account index
+    i = index.acc_pos.get(acc_id)
+    if i is None:
+        return accounts, index.accounts
+    a = accounts[i]
+    new_a = Account(id=a.id, name=a.name, balance=balance_fn(a.balance), currency=a.currency)
+    return accounts.set(i, new_a), index.accounts.set(acc_id, new_a)
+
+def _with_state(state: Dict[str, Any], index: StateIndex, new_transactions: PVector, new_accounts: PVector, **index_changes) -> Dict[str, Any]:
+    # Returns the new state with its index pointing at the new collections
+    index = replace(index, source=(new_transactions, new_accounts, state.get("categories", ())), **index_changes)
+    return {
+        **state,
+        "transactions": new_transactions,
+        "accounts": new_accounts,
+        "index": index,
+        "version": state.get("version", 0) + 1,
+    }
 
 def update_account_balance(state: Dict[str, Any], acc_id: str, new_balance: int) -> Dict[str, Any]:
-    accounts = state.get("accounts", ())
-    new_accounts = tuple(
-        Account(id=a.id, name=a.name, balance=new_balance, currency=a.currency) 
-        if a.id == acc_id else a 
-        for a in accounts
-    )
-    return {**state, "accounts": new_accounts}
+    index = state_index(state)
+    transactions = pvector(state.get("transactions", ()))
+    accounts = pvector(state.get("accounts", ()))
+    new_accounts, accounts_by_id = _adjust_balance(accounts, index, acc_id, lambda _: new_balance)
+    new_state = _with_state(state, index, transactions, new_accounts, accounts=accounts_by_id)
+    return _track_derived(state, new_state, acc_ids=(acc_id,))
 
 def create_transaction(state: Dict[str, Any], t: Transaction) -> Dict[str, Any]:
+    index = state_index(state)
+
     # Update transactions list
-    transactions = state.get("transactions", ())
-    new_transactions = transactions + (t,)
-    
+    transactions = pvector(state.get("transactions", ()))
+    new_transactions = transactions.append(t)
+
     # Update account balance
-    accounts = state.get("accounts", ())
-    # Find account
     # Assuming positive amount adds to balance (income) and negative subtracts (expense)
     # The transaction amount is signed.
-    
-    new_accounts = tuple(
-        Account(id=a.id, name=a.name, balance=a.balance + t.amount, currency=a.currency)
-        if a.id == t.account_id else a
-        for a in accounts
+    accounts = pvector(state.get("accounts", ()))
+    new_accounts, accounts_by_id = _adjust_balance(accounts, index, t.account_id, lambda b: b + t.amount)
+
+    new_state = _with_state(
+        state, index, new_transactions, new_accounts,
+        tx_pos=index.tx_pos.set(t.id, len(transactions)),
+        accounts=accounts_by_id,
+        acc_txs=add_account_tx(index.acc_txs, t.account_id, t.id),
     )
-    
-    return {**state, "transactions": new_transactions, "accounts": new_accounts}
+    return _track_derived(state, new_state, added=t)
+
+def create_transactions(state: Dict[str, Any], trans: Iterable[Transaction]) -> Dict[str, Any]:
+    """
+    Same result as calling create_transaction for each transaction in order,
+    as one mutation: the transactions are appended in one pass, each account
+    balance is adjusted once by the sum of its amounts, and budget totals and
+    views are updated once for the whole batch.
+    """
+    trans = list(trans)
+    if not trans:
+        return state
+    index = state_index(state)
+    transactions = pvector(state.get("transactions", ()))
+    new_transactions = transactions.extend(trans)
+
+    tx_pos = index.tx_pos
+    deltas: Dict[str, int] = {}
+    ids_by_acc: Dict[str, List[str]] = {}
+    for i, t in enumerate(trans, len(transactions)):
+        tx_pos = tx_pos.set(t.id, i)
+        deltas[t.account_id] = deltas.get(t.account_id, 0) + t.amount
+        ids_by_acc.setdefault(t.account_id, []).append(t.id)
+
+    acc_txs = index.acc_txs
+    for acc_id, ids in ids_by_acc.items():
+        acc_txs = add_account_txs(acc_txs, acc_id, ids)
+
+    new_accounts = pvector(state.get("accounts", ()))
+    for acc_id, delta in deltas.items():
+        new_accounts, accounts_by_id = _adjust_balance(new_accounts, index, acc_id, lambda b, d=delta: b + d)
+        index = replace(index, accounts=accounts_by_id)
+
+    new_state = _with_state(
+        state, index, new_transactions, new_accounts,
+        tx_pos=tx_pos,
+        acc_txs=acc_txs,
+    )
+    return _track_derived(state, new_state, appended=trans)
 
 def update_transaction(state: Dict[str, Any], t_id: str, new_data: Dict) -> Dict[str, Any]:
-    transactions = state.get("transactions", ())
-    
+    index = state_index(state)
+    transactions = pvector(state.get("transactions", ()))
+
     # Find original transaction to adjust balance
-    orig_t = next((t for t in transactions if t.id == t_id), None)
-    if not orig_t:
+    pos = index.tx_pos.get(t_id)
+    if pos is None:
         return state
+    orig_t = transactions[pos]
 
     new_amount = int(new_data.get("amount", orig_t.amount))
-    diff = new_amount - orig_t.amount
-    
+
     # Update transaction
-    new_transactions = tuple(
-        Transaction(
-            id=t.id,
-            account_id=new_data.get("account_id", t.account_id),
-            cat_id=new_data.get("cat_id", t.cat_id),
-            amount=new_amount,
-            ts=new_data.get("ts", t.ts),
-            note=new_data.get("note", t.note)
-        ) if t.id == t_id else t
-        for t in transactions
+    new_t = Transaction(
+        id=orig_t.id,
+        account_id=new_data.get("account_id", orig_t.account_id),
+        cat_id=new_data.get("cat_id", orig_t.cat_id),
+        amount=new_amount,
+        ts=new_data.get("ts", orig_t.ts),
+        note=new_data.get("note", orig_t.note)
     )
-    
+    new_transactions = transactions.set(pos, new_t)
+
     # Update Account Balance
-    # If account changed, it's more complex, but assuming account_id doesn't change for now based on usage.
-    # If account_id changed, we'd need to subtract from old and add to new.
-    # The current usage in main.py doesn't seem to allow changing account_id in update_transaction (only amount and note).
-    
-    accounts = state.get("accounts", ())
-    new_accounts = tuple(
-        Account(id=a.id, name=a.name, balance=a.balance + diff, currency=a.currency)
-        if a.id == orig_t.account_id else a
-        for a in accounts
-    )
+    # If account_id changed, subtract from the old account and add to the new one.
+    accounts = pvector(state.get("accounts", ()))
+    acc_txs = index.acc_txs
+    if new_t.account_id == orig_t.account_id:
+        diff = new_amount - orig_t.amount
+        new_accounts, accounts_by_id = _adjust_balance(accounts, index, orig_t.account_id, lambda b: b + diff)
+    else:
+        new_accounts, accounts_by_id = _adjust_balance(accounts, index, orig_t.account_id, lambda b: b - orig_t.amount)
+        index = replace(index, accounts=accounts_by_id)
+        new_accounts, accounts_by_id = _adjust_balance(new_accounts, index, new_t.account_id, lambda b: b + new_amount)
+        acc_txs = add_account_tx(remove_account_tx(acc_txs, orig_t.account_id, t_id), new_t.account_id, t_id)
 
-    return {**state, "transactions": new_transactions, "accounts": new_accounts}
+    new_state = _with_state(state, index, new_transactions, new_accounts, accounts=accounts_by_id, acc_txs=acc_txs)
+    return _track_derived(state, new_state, removed=orig_t, added=new_t)
 
 def delete_transaction(state: Dict[str, Any], t_id: str) -> Dict[str, Any]:
-    transactions = state.get("transactions", ())
-    
+    index = state_index(state)
+    transactions = pvector(state.get("transactions", ()))
+
     # Find transaction to revert balance
-    t_to_del = next((t for t in transactions if t.id == t_id), None)
-    if not t_to_del:
+    pos = index.tx_pos.get(t_id)
+    if pos is None:
         return state
-        
-    new_transactions = tuple(t for t in transactions if t.id != t_id)
-    
+    t_to_del = transactions[pos]
+
+    # Removing from the middle shifts later items (and their positions), so this stays O(N)
+    new_transactions = transactions.delete(pos)
+
     # Revert balance (subtract amount)
-    accounts = state.get("accounts", ())
-    new_accounts = tuple(
-        Account(id=a.id, name=a.name, balance=a.balance - t_to_del.amount, currency=a.currency)
-        if a.id == t_to_del.account_id else a
-        for a in accounts
+    accounts = pvector(state.get("accounts", ()))
+    new_accounts, accounts_by_id = _adjust_balance(accounts, index, t_to_del.account_id, lambda b: b - t_to_del.amount)
+
+    new_state = _with_state(
+        state, index, new_transactions, new_accounts,
+        tx_pos=tx_positions(new_transactions),
+        accounts=accounts_by_id,
+        acc_txs=remove_account_tx(index.acc_txs, t_to_del.account_id, t_id),
     )
-    
-    return {**state, "transactions": new_transactions, "accounts": new_accounts}
+    return _track_derived(state, new_state, removed=t_to_del)
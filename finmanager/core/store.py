@@ -0,0 +1,343 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.dates import MISSING_EPOCH, datetime_to_epoch, parse_ts, ts_offset, utc_offset
+from core.domain import Transaction
+
+
+_NUMERIC = ("amount", "epoch", "offset", "account_code", "cat_code")
+
+
+def _offsets(ts: Sequence[str]) -> np.ndarray:
+    # Only timestamps with a zone suffix ("Z", "+hh:mm", "-hh:mm" after the
+    # date) can have an offset; the others are not parsed
+    out = np.zeros(len(ts), dtype=np.int32)
+    for i, s in enumerate(ts):
+        tail = s[10:] if isinstance(s, str) else ""
+        if "Z" in tail or "+" in tail or "-" in tail:
+            out[i] = ts_offset(s)
+    return out
+
+
+class _Columns:
+    """
+    Growable column buffers shared by every TransactionStore view.
+    Rows are only ever appended, so a view of the first n rows stays valid
+    when the buffer grows.
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.amount = np.zeros(capacity, dtype=np.int64)
+        self.epoch = np.zeros(capacity, dtype=np.int64)
+        # UTC offset (seconds) of each timestamp, 0 for naive or unparseable ones
+        self.offset = np.zeros(capacity, dtype=np.int32)
+        self.account_code = np.zeros(capacity, dtype=np.int32)
+        self.cat_code = np.zeros(capacity, dtype=np.int32)
+        self.ids: List[str] = []
+        self.ts: List[str] = []
+        self.notes: List[str] = []
+        self.account_ids: List[str] = []
+        self.account_lookup: Dict[str, int] = {}
+        self.cat_ids: List[str] = []
+        self.cat_lookup: Dict[str, int] = {}
+        self.fill = 0
+
+    def _grow(self, needed: int):
+        capacity = max(needed, 2 * len(self.amount), 16)
+        for name in _NUMERIC:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self.fill] = old[: self.fill]
+            setattr(self, name, new)
+
+    def _code(self, vocab: List[str], lookup: Dict[str, int], key: str) -> int:
+        code = lookup.get(key)
+        if code is None:
+            code = len(vocab)
+            vocab.append(key)
+            lookup[key] = code
+        return code
+
+    @staticmethod
+    def from_arrays(
+        amount: np.ndarray,
+        epoch: np.ndarray,
+        account_code: np.ndarray,
+        cat_code: np.ndarray,
+        ids: Sequence[str],
+        ts: Sequence[str],
+        notes: Sequence[str],
+        account_ids: List[str],
+        cat_ids: List[str],
+        offset: Optional[np.ndarray] = None,
+    ) -> "_Columns":
+        # Wraps existing (possibly read-only, memory-mapped) arrays without copying
+        cols = _Columns(0)
+        cols.amount, cols.epoch = amount, epoch
+        cols.offset = offset if offset is not None else _offsets(ts)
+        cols.account_code, cols.cat_code = account_code, cat_code
+        cols.ids, cols.ts, cols.notes = ids, ts, notes
+        cols.account_ids = list(account_ids)
+        cols.account_lookup = {a: i for i, a in enumerate(cols.account_ids)}
+        cols.cat_ids = list(cat_ids)
+        cols.cat_lookup = {c: i for i, c in enumerate(cols.cat_ids)}
+        cols.fill = len(amount)
+        return cols
+
+    def append(self, t: Transaction):
+        if not isinstance(self.ids, list):
+            # Read-only string columns are materialized on the first write
+            self.ids = list(self.ids[: self.fill])
+            self.ts = list(self.ts[: self.fill])
+            self.notes = list(self.notes[: self.fill])
+        if self.fill == len(self.amount):
+            self._grow(self.fill + 1)
+        i = self.fill
+        self.amount[i] = t.amount
+        dt = parse_ts(t.ts)
+        self.epoch[i] = datetime_to_epoch(dt) if dt is not None else MISSING_EPOCH
+        self.offset[i] = utc_offset(dt) if dt is not None else 0
+        self.account_code[i] = self._code(
+            self.account_ids, self.account_lookup, t.account_id
+        )
+        self.cat_code[i] = self._code(self.cat_ids, self.cat_lookup, t.cat_id)
+        self.ids.append(t.id)
+        self.ts.append(t.ts)
+        self.notes.append(t.note)
+        self.fill += 1
+
+    def copy(self, length: int) -> "_Columns":
+        cols = _Columns(max(length, 16))
+        for name in _NUMERIC:
+            getattr(cols, name)[:length] = getattr(self, name)[:length]
+        cols.ids = list(self.ids[:length])
+        cols.ts = list(self.ts[:length])
+        cols.notes = list(self.notes[:length])
+        cols.account_ids = list(self.account_ids)
+        cols.account_lookup = dict(self.account_lookup)
+        cols.cat_ids = list(self.cat_ids)
+        cols.cat_lookup = dict(self.cat_lookup)
+        cols.fill = length
+        return cols
+
+
+class TransactionStore(Sequence[Transaction]):
+    """
+    Immutable columnar view over transactions.
+
+    Amounts and epoch timestamps are NumPy arrays, account and category ids
+    are dictionary-encoded int codes. It behaves like Tuple[Transaction, ...]
+    (len, indexing, iteration, +), so it can be passed to functions in
+    core.transforms, core.service and core.lazy, which switch to vectorized
+    reductions when they receive a store.
+    """
+
+    def __init__(self, columns: _Columns | None = None, length: int | None = None):
+        self._cols = columns if columns is not None else _Columns()
+        self._len = self._cols.fill if length is None else length
+
+    @staticmethod
+    def from_transactions(trans: Iterable[Transaction]) -> "TransactionStore":
+        return TransactionStore().extend(trans)
+
+    @staticmethod
+    def from_columns(
+        amount: np.ndarray,
+        epoch: np.ndarray,
+        account_code: np.ndarray,
+        cat_code: np.ndarray,
+        ids: Sequence[str],
+        ts: Sequence[str],
+        notes: Sequence[str],
+        account_ids: List[str],
+        cat_ids: List[str],
+        offset: Optional[np.ndarray] = None,
+    ) -> "TransactionStore":
+        """
+        Builds a store over existing column arrays (e.g. a memory-mapped
+        snapshot) without copying them. Codes index into account_ids/cat_ids.
+        Without an offset column, UTC offsets are recomputed from ts.
+        """
+        return TransactionStore(
+            _Columns.from_arrays(
+                amount, epoch, account_code, cat_code,
+                ids, ts, notes, account_ids, cat_ids, offset,
+            )
+        )
+
+    # --- Immutable updates ---
+
+    def _writable_columns(self) -> _Columns:
+        # Appending past another view's rows would overwrite them, so a view
+        # that is not the tip of its buffer copies before appending.
+        if self._len == self._cols.fill:
+            return self._cols
+        return self._cols.copy(self._len)
+
+    def append(self, t: Transaction) -> "TransactionStore":
+        cols = self._writable_columns()
+        cols.append(t)
+        return TransactionStore(cols, cols.fill)
+
+    def extend(self, trans: Iterable[Transaction]) -> "TransactionStore":
+        cols = self._writable_columns()
+        for t in trans:
+            cols.append(t)
+        return TransactionStore(cols, cols.fill)
+
+    def is_prefix_of(self, other: "TransactionStore") -> bool:
+        """
+        True if other was derived from this store by appends (same buffer,
+        at least as long). Rows below the buffer fill never change: O(1).
+        """
+        return (
+            isinstance(other, TransactionStore)
+            and other._cols is self._cols
+            and self._len <= other._len
+        )
+
+    # --- Tuple-compatible view ---
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(self._len)))
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("TransactionStore index out of range")
+        cols = self._cols
+        return Transaction(
+            id=cols.ids[i],
+            account_id=cols.account_ids[cols.account_code[i]],
+            cat_id=cols.cat_ids[cols.cat_code[i]],
+            amount=int(cols.amount[i]),
+            ts=cols.ts[i],
+            note=cols.notes[i],
+        )
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for i in range(self._len):
+            yield self[i]
+
+    def __add__(self, other):
+        return tuple(self) + tuple(other)
+
+    def __radd__(self, other):
+        return tuple(other) + tuple(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, (tuple, TransactionStore)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"TransactionStore(len={self._len})"
+
+    # --- Columns (read-only views, no copies) ---
+
+    def _view(self, arr: np.ndarray) -> np.ndarray:
+        view = arr[: self._len]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def amounts(self) -> np.ndarray:
+        return self._view(self._cols.amount)
+
+    @property
+    def epochs(self) -> np.ndarray:
+        return self._view(self._cols.epoch)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        return self._view(self._cols.offset)
+
+    @property
+    def wall_epochs(self) -> np.ndarray:
+        """
+        Wall-clock time of each row as epoch seconds (epoch + UTC offset),
+        MISSING_EPOCH where ts cannot be parsed. Calendar periods bucket on
+        this, like period_key does on the ts string.
+        """
+        epochs = self.epochs
+        return np.where(epochs == MISSING_EPOCH, MISSING_EPOCH, epochs + self.offsets)
+
+    @property
+    def account_codes(self) -> np.ndarray:
+        return self._view(self._cols.account_code)
+
+    @property
+    def cat_codes(self) -> np.ndarray:
+        return self._view(self._cols.cat_code)
+
+    @property
+    def account_ids(self) -> List[str]:
+        return self._cols.account_ids
+
+    @property
+    def category_ids(self) -> List[str]:
+        return self._cols.cat_ids
+
+    def slice(self, start: int, stop: int) -> "TransactionStore":
+        """
+        Store over rows start <= i < stop. Numeric columns are views of
+        this store's arrays, not copies.
+        """
+        start, stop, _ = slice(start, stop).indices(self._len)
+        stop = max(start, stop)
+        cols = self._cols
+        return TransactionStore.from_columns(
+            cols.amount[start:stop], cols.epoch[start:stop],
+            cols.account_code[start:stop], cols.cat_code[start:stop],
+            cols.ids[start:stop], cols.ts[start:stop], cols.notes[start:stop],
+            cols.account_ids, cols.cat_ids, cols.offset[start:stop],
+        )
+
+    def string_columns(self) -> Tuple[Sequence[str], Sequence[str], Sequence[str]]:
+        """
+        Returns the (ids, ts, notes) string columns, trimmed to this view.
+        """
+        cols, n = self._cols, self._len
+        return cols.ids[:n], cols.ts[:n], cols.notes[:n]
+
+    # --- Vectorized reductions ---
+
+    def account_mask(self, acc_id: str) -> np.ndarray:
+        code = self._cols.account_lookup.get(acc_id)
+        if code is None:
+            return np.zeros(self._len, dtype=bool)
+        return self.account_codes == code
+
+    def category_mask(self, cat_id: str) -> np.ndarray:
+        code = self._cols.cat_lookup.get(cat_id)
+        if code is None:
+            return np.zeros(self._len, dtype=bool)
+        return self.cat_codes == code
+
+    def expense_mask(self) -> np.ndarray:
+        return self.amounts < 0
+
+    def total(self, mask: np.ndarray | None = None) -> int:
+        amounts = self.amounts if mask is None else self.amounts[mask]
+        return int(amounts.sum())
+
+    def expense_by_category(self) -> Dict[str, int]:
+        """
+        Sum of abs(amount) over expenses, per category id, in one pass.
+        """
+        amounts = self.amounts
+        weights = np.where(amounts < 0, -amounts, 0)
+        sums = np.bincount(
+            self.cat_codes, weights=weights, minlength=len(self._cols.cat_ids)
+        )
+        return {
+            cat_id: int(v)
+            for cat_id, v in zip(self._cols.cat_ids, np.rint(sums).astype(np.int64))
+            if v
+        }
@@ -0,0 +1,199 @@
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.dates import MISSING_EPOCH, wall_epoch
+from core.domain import Transaction
+from core.memo import extends
+from core.persistent import PVector
+from core.store import TransactionStore
+
+
+class TimeIndex:
+    """
+    Timestamp-sorted index over a transaction sequence.
+
+    Every row's timestamp is parsed once into wall-clock epoch seconds (the
+    local time of the row read as UTC, see TransactionStore.wall_epochs), so
+    calendar windows agree with period_key for naive and offset timestamps
+    alike. Rows are ordered by (epoch, position), so a time window is one
+    contiguous slice found by binary search (np.searchsorted): O(log N + k)
+    instead of comparing every row's ts string. A prefix sum of expenses in
+    time order makes the expense total of any window O(log N).
+
+    Rows whose ts cannot be parsed (MISSING_EPOCH) sort first and are never
+    inside a window.
+
+    String queries (date_range, prefix_expense_total) keep the exact
+    semantics of comparing ts strings, so they use a second order, by ts
+    string, built on first use.
+    """
+
+    def __init__(self, source: Sequence[Transaction], epochs: np.ndarray, amounts: np.ndarray):
+        self.source = source
+        self.epochs = epochs
+        self.amounts = amounts
+        self.order = np.argsort(epochs, kind="stable")
+        self.sorted_epochs = epochs[self.order]
+        self.expenses = np.where(amounts < 0, -amounts, 0)
+        self.expense_prefix = np.concatenate(([0], np.cumsum(self.expenses[self.order])))
+        # Number of unparseable rows at the front of the order
+        self.missing = int(np.searchsorted(self.sorted_epochs, MISSING_EPOCH, side="right"))
+        self._ts_order: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def _columns(trans: Sequence[Transaction]) -> Tuple[np.ndarray, np.ndarray]:
+        if isinstance(trans, TransactionStore):
+            return trans.wall_epochs, np.array(trans.amounts)
+        epochs = np.fromiter((wall_epoch(t.ts) for t in trans), np.int64, len(trans))
+        amounts = np.fromiter((t.amount for t in trans), np.int64, len(trans))
+        return epochs, amounts
+
+    @staticmethod
+    def build(trans: Sequence[Transaction]) -> "TimeIndex":
+        return TimeIndex(trans, *TimeIndex._columns(trans))
+
+    def extend(self, trans: Sequence[Transaction]) -> "TimeIndex":
+        """
+        Index for trans, which is this index's source plus appended rows:
+        only the new rows are parsed.
+        """
+        epochs, amounts = TimeIndex._columns(trans[len(self.source):])
+        return TimeIndex(
+            trans,
+            np.concatenate((self.epochs, epochs)),
+            np.concatenate((self.amounts, amounts)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    @property
+    def latest_epoch(self) -> Optional[int]:
+        if self.missing == len(self.epochs):
+            return None
+        return int(self.sorted_epochs[-1])
+
+    def _bounds(self, lo: int, hi: int) -> Tuple[int, int]:
+        # Sorted positions of lo <= epoch < hi
+        i = max(int(np.searchsorted(self.sorted_epochs, lo, side="left")), self.missing)
+        j = max(int(np.searchsorted(self.sorted_epochs, hi, side="left")), i)
+        return i, j
+
+    def window(self, lo: int, hi: int) -> np.ndarray:
+        """
+        Row positions with lo <= epoch < hi, in time order.
+        """
+        i, j = self._bounds(lo, hi)
+        return self.order[i:j]
+
+    def expense_total(self, lo: int, hi: int) -> int:
+        """
+        Sum of abs(amount) over expenses with lo <= epoch < hi, in O(log N).
+        """
+        i, j = self._bounds(lo, hi)
+        return int(self.expense_prefix[j] - self.expense_prefix[i])
+
+    def _by_ts(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (order, sorted ts, expense prefix sum) by ts string. Concurrent
+        # first calls may both build it; the results are identical
+        if self._ts_order is None:
+            if isinstance(self.source, TransactionStore):
+                ts = np.array(self.source.string_columns()[1], dtype=str)
+            else:
+                ts = np.array([t.ts for t in self.source], dtype=str)
+            order = np.argsort(ts, kind="stable")
+            prefix = np.concatenate(([0], np.cumsum(self.expenses[order])))
+            self._ts_order = order, ts[order], prefix
+        return self._ts_order
+
+    def _ts_bounds(self, start: str, end: str) -> Tuple[int, int]:
+        # Positions in ts order of start <= ts <= end
+        _, sorted_ts, _ = self._by_ts()
+        i = int(np.searchsorted(sorted_ts, start, side="left"))
+        j = max(int(np.searchsorted(sorted_ts, end, side="right")), i)
+        return i, j
+
+    def date_range(self, start: str, end: str) -> np.ndarray:
+        """
+        Row positions (in sequence order) with start <= ts <= end, compared
+        as strings exactly like by_date_range, in O(log N + k).
+        """
+        i, j = self._ts_bounds(start, end)
+        return np.sort(self._by_ts()[0][i:j])
+
+    def prefix_expense_total(self, prefix: str) -> int:
+        """
+        Sum of abs(amount) over expenses whose ts starts with prefix, in
+        O(log N). Strings starting with prefix are exactly those in
+        [prefix, prefix with its last character incremented).
+        """
+        if not prefix:
+            return int(self.expenses.sum())
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        _, sorted_ts, prefix_sum = self._by_ts()
+        i = int(np.searchsorted(sorted_ts, prefix, side="left"))
+        j = int(np.searchsorted(sorted_ts, upper, side="left"))
+        return int(prefix_sum[j] - prefix_sum[i])
+
+
+def month_window(month: str) -> Tuple[int, int]:
+    """
+    [start, end) wall-clock epochs of a "YYYY-MM" month.
+    """
+    year, mon = int(month[:4]), int(month[5:7])
+    start = calendar.timegm((year, mon, 1, 0, 0, 0))
+    end = calendar.timegm((year + mon // 12, mon % 12 + 1, 1, 0, 0, 0))
+    return start, end
+
+
+def period_window(key: str, period: str) -> Optional[Tuple[int, int]]:
+    """
+    [start, end) wall-clock epochs of a budget period key (see core.dates.period_key).
+    """
+    if period == "month":
+        return month_window(key)
+    if period == "week":
+        monday = date.fromisoformat(key)
+        start = calendar.timegm(monday.timetuple())
+        return start, start + int(timedelta(days=7).total_seconds())
+    return None
+
+
+def indexable(trans: Sequence[Transaction]) -> bool:
+    # Immutable sequences only: the index is cached by object identity
+    return isinstance(trans, (tuple, PVector, TransactionStore))
+
+
+_cache: "OrderedDict[int, TimeIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 4
+
+
+def time_index(trans: Sequence[Transaction]) -> TimeIndex:
+    """
+    Cached TimeIndex for an immutable transaction sequence. A sequence that
+    extends the most recently indexed one by appends reuses its parsed rows.
+    """
+    with _cache_lock:
+        index = _cache.get(id(trans))
+        if index is not None and index.source is trans:
+            _cache.move_to_end(id(trans))
+            return index
+        base = next(reversed(_cache.values()), None)
+
+    if base is not None and extends(base.source, trans):
+        index = base.extend(trans)
+    else:
+        index = TimeIndex.build(trans)
+
+    with _cache_lock:
+        # The entry keeps trans alive, so its id cannot be reused while cached
+        _cache[id(trans)] = index
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,172 @@
+"""
+Streaming top-K counters over (key, weight) pairs.
+
+  TopK          exact totals per key; top() selects the K largest with a
+                heap (heapq.nlargest) in O(n log K) instead of sorting all keys
+  SpaceSaving   approximate heavy hitters in bounded memory: at most
+                `capacity` counters. A new key replaces the smallest counter
+                and inherits its count as error, so estimates never
+                under-count and over-count by at most that error
+                (Metwally et al., weighted form)
+  CountMinTopK  Count-Min sketch (depth x width counters, conservative
+                update) for the estimates plus a K-entry candidate set;
+                estimates never under-count, and over-count by at most
+                e*N/width (N: total weight) with probability 1 - e**-depth
+
+All three have add(key, weight) and top() -> [(key, total)] in descending
+order, so they are interchangeable in stream_top_k.
+"""
+import heapq
+import random
+from operator import itemgetter
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+Pair = Tuple[Hashable, int]
+
+_PRIME = (1 << 61) - 1
+
+
+class TopK:
+    def __init__(self, k: int):
+        self.k = k
+        self.totals: Dict[Hashable, int] = {}
+
+    def add(self, key: Hashable, weight: int = 1):
+        self.totals[key] = self.totals.get(key, 0) + weight
+
+    def top(self) -> List[Pair]:
+        return heapq.nlargest(self.k, self.totals.items(), key=itemgetter(1))
+
+
+class SpaceSaving:
+    def __init__(self, k: int, capacity: Optional[int] = None):
+        self.k = k
+        self.capacity = max(capacity or 10 * k, k)
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        # Min-heap of (count, key); entries go stale when a count grows and
+        # are skipped (and compacted) lazily
+        self._heap: List[Tuple[int, Any]] = []
+
+    def add(self, key: Hashable, weight: int = 1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+        elif len(counts) < self.capacity:
+            counts[key] = weight
+            self.errors[key] = 0
+        else:
+            floor, victim = self._pop_min()
+            del counts[victim], self.errors[victim]
+            counts[key] = floor + weight
+            self.errors[key] = floor
+        heapq.heappush(self._heap, (counts[key], _Key(key)))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, _Key(k)) for k, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[int, Hashable]:
+        while True:
+            count, wrapped = heapq.heappop(self._heap)
+            if self.counts.get(wrapped.key) == count:
+                return count, wrapped.key
+
+    def error(self, key: Hashable) -> int:
+        """
+        Upper bound of the over-count in key's estimate.
+        """
+        return self.errors.get(key, 0)
+
+    def top(self) -> List[Pair]:
+        return heapq.nlargest(self.k, self.counts.items(), key=itemgetter(1))
+
+
+class CountMinTopK:
+    def __init__(self, k: int, width: int = 2048, depth: int = 4, seed: int = 0):
+        self.k = k
+        self.width = width
+        # Plain lists: per-cell updates are faster than on a NumPy array
+        self.table = [[0] * width for _ in range(depth)]
+        # One hash() per key, spread over the rows by independent universal
+        # hashes (a*h + b) mod p; hash((salt, key)) collides in every row at once
+        rng = random.Random(seed)
+        self._coeffs = tuple((rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(depth))
+        self.candidates: Dict[Hashable, int] = {}
+
+    def _cells(self, key: Hashable) -> List[int]:
+        h = hash(key)
+        return [(a * h + b) % _PRIME % self.width for a, b in self._coeffs]
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[c] for row, c in zip(self.table, self._cells(key)))
+
+    def add(self, key: Hashable, weight: int = 1):
+        # Conservative update: cells are raised only up to the new estimate,
+        # which keeps the over-count from collisions much smaller
+        cells = list(zip(self.table, self._cells(key)))
+        est = min(row[c] for row, c in cells) + weight
+        for row, c in cells:
+            if row[c] < est:
+                row[c] = est
+        candidates = self.candidates
+        if key in candidates or len(candidates) < self.k:
+            candidates[key] = est
+            return
+        # Candidate set is tiny (K): a linear min is cheaper than a heap here
+        low = min(candidates, key=candidates.__getitem__)
+        if est > candidates[low]:
+            del candidates[low]
+            candidates[key] = est
+
+    def top(self) -> List[Pair]:
+        return heapq.nlargest(self.k, self.candidates.items(), key=itemgetter(1))
+
+
+class _Key:
+    # Heap entries compare by count only; keys need not be orderable
+    __slots__ = ("key",)
+
+    def __init__(self, key: Hashable):
+        self.key = key
+
+    def __lt__(self, other: "_Key") -> bool:
+        return False
+
+
+def counter(k: int, method: str = "exact", capacity: Optional[int] = None):
+    """
+    method: "exact" (TopK), "space_saving" or "count_min".
+    capacity is SpaceSaving's number of counters / the Count-Min width.
+    """
+    if method == "exact":
+        return TopK(k)
+    if method == "space_saving":
+        return SpaceSaving(k, capacity)
+    if method == "count_min":
+        return CountMinTopK(k, width=capacity or 2048)
+    raise ValueError(f"Unknown top-k method: {method}")
+
+
+def stream_top_k(
+    pairs: Iterable[Optional[Pair]],
+    k: int,
+    every: Optional[int] = None,
+    method: str = "exact",
+    capacity: Optional[int] = None,
+) -> Iterator[List[Pair]]:
+    """
+    Feeds (key, weight) pairs into a top-K counter and yields the current
+    top K every `every` items and once at the end. None items are rows
+    that count towards `every` without contributing (e.g. income rows).
+    """
+    acc = counter(k, method, capacity)
+    add = acc.add
+    seen = 0
+    for pair in pairs:
+        seen += 1
+        if pair is not None:
+            add(*pair)
+        if every and seen % every == 0:
+            yield acc.top()
+    if not every or seen % every or not seen:
+        yield acc.top()
@@ -1,9 +1,16 @@
 import json
+from collections import defaultdict
 from functools import reduce
-from typing import Any, Dict, Tuple
+from operator import attrgetter
+from typing import Any, Container, Dict, Iterable, List, Mapping, Optional, Tuple
 
+import numpy as np
+
+from core.dates import MISSING_EPOCH, parse_ts
 from core.domain import Account, Budget, Category, Transaction
 from core.ftypes import Either, Maybe
+from core.predicates import AmountBetween, CategoryIs, DateBetween
+from core.store import TransactionStore
 
 
 def load_seed(
@@ -43,6 +50,8 @@ def update_budget(
 
 
 def account_balance(trans: Tuple[Transaction, ...], acc_id: str) -> int:
+    if isinstance(trans, TransactionStore):
+        return trans.total(trans.account_mask(acc_id))
     return reduce(
         lambda acc, t: acc + t.amount,
         filter(lambda t: t.account_id == acc_id, trans),
@@ -50,31 +59,30 @@ def account_balance(trans: Tuple[Transaction, ...], acc_id: str) -> int:
     )
 
 
-def by_category(cat_id: str):
-    def _filter(t: Transaction) -> bool:
-        return t.cat_id == cat_id
-
-    return _filter
+# The filters are Predicate objects (see core.predicates): callables that can
+# also be combined with & / |, fused, vectorized over a TransactionStore and
+# translated by storage backends.
 
 
-def by_date_range(start: str, end: str):
-    def _filter(t: Transaction) -> bool:
-        return start <= t.ts <= end
+def by_category(cat_id: str) -> CategoryIs:
+    return CategoryIs(cat_id)
 
-    return _filter
 
+def by_date_range(start: str, end: str) -> DateBetween:
+    return DateBetween(start, end)
 
-def by_amount_range(min_val: int, max_val: int):
-    def _filter(t: Transaction) -> bool:
-        return min_val <= abs(t.amount) <= max_val
 
-    return _filter
+def by_amount_range(min_val: int, max_val: int) -> AmountBetween:
+    return AmountBetween(min_val, max_val)
 
 
 # Lab 4 Functions
 
 
 def safe_category(cats: Tuple[Category, ...], cat_id: str) -> Maybe[Category]:
+    # An id-keyed mapping (e.g. StateIndex.categories) gives an O(1) lookup
+    if isinstance(cats, Mapping):
+        return Maybe(cats.get(cat_id))
     found = next((c for c in cats if c.id == cat_id), None)
     return Maybe(found)
 
@@ -82,8 +90,16 @@ def safe_category(cats: Tuple[Category, ...], cat_id: str) -> Maybe[Category]:
 def validate_transaction(
     t: Transaction, accs: Tuple[Account, ...], cats: Tuple[Category, ...]
 ) -> Either[Dict[str, str], Transaction]:
+    """
+    accs and cats may be tuples or id-keyed mappings (StateIndex.accounts /
+    StateIndex.categories); mappings make both checks O(1).
+    """
     # Check account exists
-    if not any(a.id == t.account_id for a in accs):
+    if isinstance(accs, Mapping):
+        account_found = t.account_id in accs
+    else:
+        account_found = any(a.id == t.account_id for a in accs)
+    if not account_found:
         return Either.left({"error": f"Account {t.account_id} not found"})
 
     # Check category exists
@@ -93,6 +109,152 @@ def validate_transaction(
     return Either.right(t)
 
 
+# Checks of validate_transactions, in the order their errors are reported
+VALIDATION_CHECKS = (
+    "unknown_account",
+    "unknown_category",
+    "invalid_amount",
+    "sign_mismatch",
+    "duplicate_id",
+    "invalid_ts",
+)
+
+# Category status codes: unknown, income (amount >= 0), expense (amount <= 0), other
+_UNKNOWN, _INCOME, _EXPENSE, _OTHER = range(4)
+
+
+def _category_status(cats) -> Dict[str, int]:
+    values = cats.values() if isinstance(cats, Mapping) else cats
+    status = defaultdict(int)  # missing ids map to _UNKNOWN
+    for c in values:
+        status[c.id] = {"income": _INCOME, "expense": _EXPENSE}.get(c.type, _OTHER)
+    return status
+
+
+def _duplicates(ids: List[str], existing_ids: Optional[Container[str]]) -> np.ndarray:
+    # Later occurrences of an id in the batch, and ids already in the ledger
+    dup = np.zeros(len(ids), dtype=bool)
+    if existing_ids is None:
+        if len(set(ids)) == len(ids):
+            return dup
+        existing_ids = ()
+    seen = set()
+    for i, tx_id in enumerate(ids):
+        if tx_id in seen or tx_id in existing_ids:
+            dup[i] = True
+        seen.add(tx_id)
+    return dup
+
+
+def _valid_amount(amount: Any) -> bool:
+    # Amounts are integer cents; bool is an int subclass but not an amount
+    return isinstance(amount, int) and not isinstance(amount, bool)
+
+
+def validate_transactions(
+    batch: Iterable[Transaction],
+    accs: Tuple[Account, ...],
+    cats: Tuple[Category, ...],
+    existing_ids: Optional[Container[str]] = None,
+) -> Tuple[List[Either[Dict[str, Any], Transaction]], Dict[str, int]]:
+    """
+    Validates a batch (e.g. an imported bank statement) and returns one
+    Either per row, in order, plus a summary: the number of rows, of valid
+    rows and of rows failing each check in VALIDATION_CHECKS.
+
+    Rows fail on an unknown account or category, an amount that is not an
+    int, an amount whose sign does not match the category type
+    (income >= 0, expense <= 0), an id seen
+    earlier in the batch or in existing_ids (e.g. StateIndex.tx_pos), or
+    a ts that is not an ISO-8601 timestamp. A Left holds every failure of
+    its row: {"error": first message, "errors": [messages]}.
+
+    accs and cats may be tuples or id-keyed mappings, as for
+    validate_transaction. Id sets are built once and each check runs over
+    the batch columns; a TransactionStore batch is checked on its codes and
+    epoch column, with one lookup per distinct account/category.
+    """
+    acc_ids = set(accs.keys() if isinstance(accs, Mapping) else (a.id for a in accs))
+    status = _category_status(cats)
+
+    if isinstance(batch, TransactionStore):
+        rows = list(batch)
+        ids = list(batch.string_columns()[0])
+        known_acc = np.array([a in acc_ids for a in batch.account_ids], dtype=bool)
+        known_acc = known_acc[batch.account_codes]
+        cat_status = np.array([status[c] for c in batch.category_ids], dtype=np.int8)
+        cat_status = cat_status[batch.cat_codes]
+        amounts = batch.amounts
+        bad_amount = np.zeros(len(rows), dtype=bool)
+        bad_ts = batch.epochs == MISSING_EPOCH
+    else:
+        rows = list(batch)
+        n = len(rows)
+        ids = list(map(attrgetter("id"), rows))
+        acc_col = map(attrgetter("account_id"), rows)
+        cat_col = map(attrgetter("cat_id"), rows)
+        known_acc = np.fromiter(map(acc_ids.__contains__, acc_col), dtype=bool, count=n)
+        cat_status = np.fromiter(map(status.__getitem__, cat_col), dtype=np.int8, count=n)
+        raw = list(map(attrgetter("amount"), rows))
+        bad_amount = ~np.fromiter(map(_valid_amount, raw), dtype=bool, count=n)
+        # Invalid amounts count as 0 so they are not also reported as sign mismatches
+        amounts = np.fromiter(
+            (0 if bad else a for a, bad in zip(raw, bad_amount.tolist())), dtype=np.int64, count=n
+        )
+        # Only whether ts parses matters here: epochs are not computed
+        bad_ts = np.fromiter(
+            (parse_ts(ts) is None for ts in map(attrgetter("ts"), rows)), dtype=bool, count=n
+        )
+
+    failed = {
+        "unknown_account": ~known_acc,
+        "unknown_category": cat_status == _UNKNOWN,
+        "invalid_amount": bad_amount,
+        "sign_mismatch": ((cat_status == _INCOME) & (amounts < 0))
+        | ((cat_status == _EXPENSE) & (amounts > 0)),
+        "duplicate_id": _duplicates(ids, existing_ids),
+        "invalid_ts": bad_ts,
+    }
+    invalid = np.zeros(len(rows), dtype=bool)
+    for mask in failed.values():
+        invalid |= mask
+
+    # One Either per row, built in a single pass; failing rows are rare, so
+    # their masks are read as Python lists at those rows only
+    bad = np.flatnonzero(invalid)
+    checks = {name: failed[name][bad].tolist() for name in VALIDATION_CHECKS}
+    income = (cat_status[bad] == _INCOME).tolist()
+    errors = {}
+    for k, i in enumerate(bad.tolist()):
+        t = rows[i]
+        messages = []
+        if checks["unknown_account"][k]:
+            messages.append(f"Account {t.account_id} not found")
+        if checks["unknown_category"][k]:
+            messages.append(f"Category {t.cat_id} not found")
+        if checks["invalid_amount"][k]:
+            messages.append(f"Invalid amount {t.amount!r}")
+        if checks["sign_mismatch"][k]:
+            kind = "income" if income[k] else "expense"
+            messages.append(f"Amount {t.amount} does not match {kind} category {t.cat_id}")
+        if checks["duplicate_id"][k]:
+            messages.append(f"Duplicate transaction id {t.id}")
+        if checks["invalid_ts"][k]:
+            messages.append(f"Invalid timestamp {t.ts!r}")
+        errors[i] = {"error": messages[0], "errors": messages}
+    if not errors:
+        results = [Either(t, True) for t in rows]
+    else:
+        results = [
+            Either(t, True) if i not in errors else Either(errors[i], False)
+            for i, t in enumerate(rows)
+        ]
+
+    summary = {"rows": len(rows), "valid": len(rows) - int(invalid.sum())}
+    summary.update((name, int(failed[name].sum())) for name in VALIDATION_CHECKS)
+    return results, summary
+
+
 def check_budget(
     b: Budget, trans: Tuple[Transaction, ...]
 ) -> Either[Dict[str, Any], Budget]:
@@ -102,7 +264,12 @@ def check_budget(
     # Note: in a real app we'd handle hierarchy here or rely on pre-filtered/aggregated data.
     # Let's just check exact category match for simplicity unless recursion is required here too.
 
-    spent = sum(abs(t.amount) for t in trans if t.cat_id == b.cat_id and t.amount < 0)
+    if isinstance(trans, TransactionStore):
+        spent = -trans.total(trans.category_mask(b.cat_id) & trans.expense_mask())
+    else:
+        spent = sum(
+            abs(t.amount) for t in trans if t.cat_id == b.cat_id and t.amount < 0
+        )
 
     if spent > b.limit:
         return Either.left(
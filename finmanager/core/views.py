@@ -0,0 +1,150 @@
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from core.domain import Transaction
+from core.persistent import PMap, PVector, pmap, pvector
+from core.state_index import state_index
+
+
+@dataclass(frozen=True, eq=False)
+class UserView:
+    """
+    Materialized view of the state restricted to a set of account ids:
+    the allowed accounts and their transactions, both in state order.
+    Registered views live in state["views"] (a PMap keyed by view_key) and
+    are kept in step by the state_utils mutators, so a non-admin page reads
+    its own rows instead of filtering the whole ledger on every rerun.
+
+    source is the state["transactions"] object the view was derived from.
+    """
+
+    account_ids: Tuple[str, ...]
+    accounts: PVector
+    transactions: PVector
+    tx_pos: PMap
+    source: Any
+
+
+def view_key(account_ids: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(sorted(set(account_ids)))
+
+
+def build_view(state: Dict[str, Any], account_ids: Iterable[str]) -> UserView:
+    """
+    Builds a view from the account -> transactions index: O(own rows log own rows),
+    independent of the size of the ledger.
+    """
+    key = view_key(account_ids)
+    index = state_index(state)
+    all_trans = state.get("transactions", ())
+    all_accounts = state.get("accounts", ())
+
+    positions = sorted(index.tx_pos[t_id] for acc_id in key for t_id in index.acc_txs.get(acc_id, ()))
+    transactions = pvector(all_trans[p] for p in positions)
+    acc_positions = sorted(index.acc_pos[acc_id] for acc_id in key if acc_id in index.acc_pos)
+    return UserView(
+        account_ids=key,
+        accounts=pvector(all_accounts[p] for p in acc_positions),
+        transactions=transactions,
+        tx_pos=pmap((t.id, i) for i, t in enumerate(transactions)),
+        source=all_trans,
+    )
+
+
+def register_view(state: Dict[str, Any], account_ids: Iterable[str]) -> Dict[str, Any]:
+    """
+    Returns the state with a maintained view for account_ids.
+    """
+    key = view_key(account_ids)
+    views = state.get("views") or pmap()
+    current = views.get(key)
+    if current is not None and current.source is state.get("transactions", ()):
+        return state
+    return {**state, "views": views.set(key, build_view(state, key))}
+
+
+def user_view(state: Dict[str, Any], account_ids: Iterable[str]) -> UserView:
+    """
+    The registered view for account_ids, or a freshly built one if it is
+    missing or was derived from other transactions.
+    """
+    key = view_key(account_ids)
+    view = (state.get("views") or pmap()).get(key)
+    if view is None or view.source is not state.get("transactions", ()):
+        view = build_view(state, key)
+    return view
+
+
+def _update_view(
+    view: UserView,
+    new_state: Dict[str, Any],
+    removed: Optional[Transaction],
+    added: Optional[Transaction],
+    appended: Sequence[Transaction] = (),
+) -> UserView:
+    ids = view.account_ids
+    in_old = removed is not None and removed.account_id in ids
+    in_new = added is not None and added.account_id in ids
+    transactions, tx_pos = view.transactions, view.tx_pos
+
+    for t in appended:
+        if t.account_id in ids:
+            tx_pos = tx_pos.set(t.id, len(transactions))
+            transactions = transactions.append(t)
+
+    if in_old and in_new:
+        transactions = transactions.set(tx_pos[removed.id], added)
+    elif in_new and removed is None:
+        tx_pos = tx_pos.set(added.id, len(transactions))
+        transactions = transactions.append(added)
+    elif in_old:
+        # Deleted, or moved to an account outside the view: O(own rows)
+        transactions = transactions.delete(tx_pos[removed.id])
+        tx_pos = pmap((t.id, i) for i, t in enumerate(transactions))
+    elif in_new:
+        # Moved in from another account: it belongs at its global position
+        return build_view(new_state, ids)
+
+    index = new_state["index"]
+    accounts = pvector(index.accounts[a.id] for a in view.accounts)
+    return replace(
+        view,
+        accounts=accounts,
+        transactions=transactions,
+        tx_pos=tx_pos,
+        source=new_state["transactions"],
+    )
+
+
+def update_views(
+    state: Dict[str, Any],
+    new_state: Dict[str, Any],
+    removed: Optional[Transaction] = None,
+    added: Optional[Transaction] = None,
+    acc_ids: Iterable[str] = (),
+    appended: Sequence[Transaction] = (),
+) -> Dict[str, Any]:
+    """
+    Carries the registered views of state over to new_state after one
+    mutation: removed/added transactions (an update passes both), a batch
+    of appended transactions, and accounts whose balance changed. Views the
+    mutation does not touch are only re-pointed at the new transactions.
+    """
+    views = state.get("views")
+    if not views:
+        return new_state
+
+    touched = set(acc_ids)
+    touched.update(t.account_id for t in (removed, added) if t is not None)
+    touched.update(t.account_id for t in appended)
+    new_views = views
+    for key, view in views.items():
+        if view.source is not state.get("transactions", ()):
+            # Stale (transactions replaced outside state_utils): rebuild
+            view = build_view(new_state, key)
+        elif touched.isdisjoint(key):
+            view = replace(view, source=new_state["transactions"])
+        else:
+            view = _update_view(view, new_state, removed, added, appended)
+        new_views = new_views.set(key, view)
+    return {**new_state, "views": new_views}
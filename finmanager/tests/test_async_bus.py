@@ -0,0 +1,161 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.async_bus import BLOCK, COALESCE, DROP_OLDEST, AsyncEventBus
+from core.domain import Event
+
+
+def _event(i, name="E", **payload):
+    return Event(f"e{i}", "ts", name, payload)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_block_others():
+    bus = AsyncEventBus()
+    release = asyncio.Event()
+    fast, slow = [], []
+
+    async def slow_handler(e):
+        await release.wait()
+        slow.append(e.id)
+
+    bus.subscribe("E", slow_handler)
+    bus.subscribe("E", lambda e: fast.append(e.id))
+
+    for i in range(3):
+        await bus.publish(_event(i))
+    while len(fast) < 3:
+        await asyncio.sleep(0.01)
+    assert fast == ["e0", "e1", "e2"] and slow == []
+
+    release.set()
+    await bus.join()
+    assert slow == ["e0", "e1", "e2"]
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_and_block():
+    bus = AsyncEventBus()
+    gate = asyncio.Event()
+    dropped, blocked = [], []
+
+    async def slow_drop(e):
+        await gate.wait()
+        dropped.append(e.id)
+
+    async def slow_block(e):
+        await gate.wait()
+        blocked.append(e.id)
+
+    bus.subscribe("E", slow_drop, maxsize=2, policy=DROP_OLDEST)
+    bus.subscribe("B", slow_block, maxsize=1, policy=BLOCK)
+
+    await bus.publish(_event(0))
+    await asyncio.sleep(0.01)
+    for i in range(1, 5):
+        await bus.publish(_event(i))
+    # e0 is being handled, e1 and e2 were dropped for e3 and e4
+    assert bus.stats()[("E", 0, "slow_drop")].dropped == 2
+
+    await bus.publish(_event(0, "B"))
+    await asyncio.sleep(0.01)
+    await bus.publish(_event(1, "B"))
+    third = asyncio.create_task(bus.publish(_event(2, "B")))
+    await asyncio.sleep(0.05)
+    assert not third.done()  # queue full: the publisher waits
+
+    gate.set()
+    await third
+    await bus.join()
+    assert dropped == ["e0", "e3", "e4"]
+    assert blocked == ["e0", "e1", "e2"]
+    assert bus.stats()[("B", 0, "slow_block")].max_depth == 1
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_coalesce_keeps_latest_per_key():
+    bus = AsyncEventBus()
+    gate = asyncio.Event()
+    seen = []
+
+    async def handler(e):
+        await gate.wait()
+        seen.append((e.payload["acc"], e.id))
+
+    bus.subscribe("E", handler, policy=COALESCE, key=lambda e: e.payload["acc"])
+    await bus.publish(_event(0, acc="a"))
+    await asyncio.sleep(0.01)  # e0 is in the handler
+    for i, acc in enumerate("ababa", 1):
+        await bus.publish(_event(i, acc=acc))
+
+    gate.set()
+    await bus.join()
+    assert seen == [("a", "e0"), ("a", "e5"), ("b", "e4")]
+    assert bus.stats()[("E", 0, "handler")].coalesced == 3
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_errors_are_isolated_and_counted():
+    errors = []
+    bus = AsyncEventBus(on_error=lambda name, e, exc: errors.append((name, e.id, str(exc))))
+    ok = []
+
+    def flaky(e):
+        if e.id == "e1":
+            raise ValueError("boom")
+        ok.append(e.id)
+
+    bus.subscribe("E", flaky)
+    for i in range(3):
+        await bus.publish(_event(i))
+    await bus.join()
+
+    assert ok == ["e0", "e2"]
+    assert errors == [("E", "e1", "boom")]
+    stats = bus.stats()[("E", 0, "flaky")]
+    assert (stats.delivered, stats.errors, stats.depth) == (2, 1, 0)
+    assert stats.max_latency >= stats.mean_latency > 0
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_sync_handlers_run_concurrently_in_executor():
+    bus = AsyncEventBus()
+    barrier = threading.Barrier(3, timeout=5)
+    bus.subscribe("E", lambda e: barrier.wait(), concurrency=3)
+    for i in range(3):
+        await bus.publish(_event(i))
+    await bus.join()  # would time out if the handlers ran one at a time
+    assert bus.stats()[("E", 0, "<lambda>")].errors == 0
+    await bus.close()
+
+
+@pytest.mark.asyncio
+async def test_stats_per_subscription_and_failing_reporter():
+    def broken_reporter(name, e, exc):
+        raise RuntimeError("reporter down")
+
+    bus = AsyncEventBus(on_error=broken_reporter)
+    seen = []
+    bus.subscribe("E", lambda e: 1 / 0)
+    bus.subscribe("E", lambda e: seen.append(e.id))
+    for i in range(3):
+        await bus.publish(_event(i))
+    await bus.join()
+
+    stats = bus.stats()
+    failing, ok = stats[("E", 0, "<lambda>")], stats[("E", 1, "<lambda>")]
+    assert (failing.errors, failing.report_errors, failing.delivered) == (3, 3, 0)
+    assert (ok.errors, ok.delivered) == (0, 3)
+    assert seen == ["e0", "e1", "e2"]
+    await bus.close()
+
+
+def test_subscribe_validates_policy():
+    with pytest.raises(ValueError):
+        AsyncEventBus().subscribe("E", print, policy="lifo")
@@ -0,0 +1,55 @@
+from core.budget_report import budget_report, bucket_expenses
+from core.domain import Budget, Category, Transaction
+from core.service import BudgetService
+from core.store import TransactionStore
+
+
+TRANS = (
+    Transaction("t1", "a1", "food", -10, "2024-01-31T23:00:00", "n"),
+    Transaction("t2", "a1", "food", -20, "2024-02-05T10:00:00", "n"),  # Monday
+    Transaction("t3", "a1", "food", -30, "2024-02-11T10:00:00", "n"),  # Sunday
+    Transaction("t4", "a1", "cafe", -5, "2024-02-11T12:00:00", "n"),
+    Transaction("t5", "a1", "food", 100, "2024-02-11T12:00:00", "n"),  # income
+    Transaction("t6", "a1", "food", -7, "ts", "n"),  # undatable
+)
+
+BUDGETS = (
+    Budget("month", "food", 40, "month"),
+    Budget("week", "food", 100, "week"),
+    Budget("all", "food", 100, "m"),
+    Budget("none", "other", 10, "month"),
+)
+
+
+def test_buckets_by_period():
+    buckets, latest = bucket_expenses(TRANS)
+    assert latest == "2024-02-11T12:00:00"
+    assert buckets["month"]["food"] == {"2024-01": 10, "2024-02": 50}
+    assert buckets["week"]["food"] == {"2024-01-29": 10, "2024-02-05": 50}
+    assert buckets["all"]["food"] == {"all": 67}
+
+
+def test_report_honours_periods():
+    rep = budget_report(BUDGETS, TRANS)
+    assert rep["month"] == {"limit": 40, "spent": 50, "status": "OVER", "period": "2024-02"}
+    assert rep["week"]["spent"] == 50 and rep["week"]["period"] == "2024-02-05"
+    assert rep["all"]["spent"] == 67
+    assert rep["none"]["spent"] == 0
+
+    earlier = budget_report(BUDGETS, TRANS, as_of="2024-01-15")
+    assert earlier["month"]["spent"] == 10 and earlier["month"]["status"] == "OK"
+    assert earlier["week"]["spent"] == 0
+
+
+def test_report_rollup_and_store_match():
+    cats = (
+        Category("food", "Food", None, "expense"),
+        Category("cafe", "Cafe", "food", "expense"),
+    )
+    rep = BudgetService([], []).monthly_report(BUDGETS, TRANS, categories=cats)
+    assert rep["month"]["spent"] == 55
+    assert rep["all"]["spent"] == 72
+
+    store = TransactionStore.from_transactions(TRANS)
+    assert budget_report(BUDGETS, store) == budget_report(BUDGETS, TRANS)
+    assert budget_report(BUDGETS, store, categories=cats) == rep
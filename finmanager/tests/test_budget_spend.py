@@ -0,0 +1,66 @@
+from core.budget_spend import build_budget_spend, verify_budget_spend
+from core.domain import Account, Budget, Transaction
+from core.frp import Event, check_budget_handler
+from core.state_utils import create_transaction, delete_transaction, update_transaction
+
+
+ACCOUNTS = (Account("a1", "n", 1000, "USD"),)
+
+
+def _publish(bus, state, t):
+    return bus.publish(Event(t.id, t.ts, "TRANSACTION_ADDED", {"transaction": t}), state)
+
+
+def test_incremental_matches_rebuild(make_bus, make_state):
+    budgets = (Budget("b1", "c1", 1000, "month"), Budget("b2", "c1", 1000, "week"))
+    bus = make_bus()
+    state = make_state(budgets, ACCOUNTS)
+    for i in range(20):
+        t = Transaction(f"t{i}", "a1", "c1", -10 * (i + 1), f"2023-0{1 + i % 3}-1{i % 10}", "n")
+        state = _publish(bus, state, t)
+
+    assert verify_budget_spend(state)
+    assert state["budget_spend"].totals == build_budget_spend(
+        budgets, state["transactions"]
+    ).totals
+
+
+def test_alerts_are_per_period(make_bus, make_state):
+    budgets = (Budget("b1", "c1", 100, "month"),)
+    bus = make_bus()
+    state = make_state(budgets, ACCOUNTS)
+
+    state = _publish(bus, state, Transaction("t1", "a1", "c1", -80, "2023-01-10", "n"))
+    state = _publish(bus, state, Transaction("t2", "a1", "c1", -80, "2023-02-10", "n"))
+    assert state["alerts"] == []  # 160 in total, but 80 per month
+
+    state = _publish(bus, state, Transaction("t3", "a1", "c1", -30, "2023-02-11", "n"))
+    assert state["alerts"] == ["Budget Alert: b1 exceeded! Limit 100, Spent 110"]
+
+
+def test_state_utils_keep_totals(make_state):
+    budgets = (Budget("b1", "c1", 100, "month"),)
+    state = make_state(budgets, ACCOUNTS)
+    state = create_transaction(state, Transaction("t1", "a1", "c1", -50, "2023-01-10", "n"))
+    state = create_transaction(state, Transaction("t2", "a1", "c1", -20, "2023-01-11", "n"))
+    state = update_transaction(state, "t1", {"amount": -70, "ts": "2023-02-01"})
+    assert verify_budget_spend(state)
+    assert state["budget_spend"].totals == {"b1": {"2023-01": 20, "2023-02": 70}}
+
+    state = delete_transaction(state, "t2")
+    assert verify_budget_spend(state)
+    assert state["budget_spend"].totals == {"b1": {"2023-02": 70}}
+
+
+def test_stale_totals_are_rebuilt():
+    budgets = (Budget("b1", "c1", 10, "month"),)
+    t = Transaction("t1", "a1", "c1", -50, "2023-01-10", "n")
+    state = {
+        "transactions": (t,),
+        "budgets": budgets,
+        "budget_spend": build_budget_spend((), ()),  # built for other budgets
+    }
+
+    new_state = check_budget_handler(Event("e1", "ts", "TRANSACTION_ADDED", {"transaction": t}), state)
+    assert len(new_state["alerts"]) == 1
+    assert new_state["budget_spend"].budgets is budgets
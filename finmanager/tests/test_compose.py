@@ -0,0 +1,41 @@
+from core.compose import compose, compose_map, pipe, pipe_batch
+
+
+def inc(x):
+    return x + 1
+
+
+def double(x):
+    return x * 2
+
+
+def neg(x):
+    return -x
+
+
+def test_nested_compositions_are_flattened():
+    inner = compose(inc, double)
+    outer = compose(neg, inner, compose(double, inc))
+    assert outer._composed == (inc, double, double, inc, neg)
+    for x in range(-3, 4):
+        assert outer(x) == neg(inc(double(double(inc(x)))))
+        assert compose(outer, outer)(x) == outer(outer(x))
+
+
+def test_short_compositions():
+    assert compose(inc) is inc
+    assert compose(inc, double)(3) == 7
+    assert compose(inc, double, neg)(3) == -5
+    assert compose(compose())(4) == 4
+
+
+def test_pipe_runs_compositions():
+    assert pipe(3, compose(inc, double), neg) == -7
+    assert pipe(3) == 3
+
+
+def test_batch_forms_match_per_element():
+    xs = list(range(10))
+    assert compose_map(inc, double, neg)(xs) == [compose(inc, double, neg)(x) for x in xs]
+    assert compose_map()(xs) == xs
+    assert pipe_batch(iter(xs), inc, compose(double, neg)) == [double(neg(inc(x))) for x in xs]
@@ -0,0 +1,81 @@
+import pytest
+
+from core.budget_spend import verify_budget_spend
+from core.domain import Account, Budget, Event, Transaction
+from core.state_index import build_index
+from core.state_utils import create_transaction, create_transactions
+from core.views import register_view
+
+
+ACCOUNTS = (Account("a1", "n", 1000, "USD"), Account("a2", "n", 500, "USD"))
+BUDGETS = (Budget("b1", "c1", 100, "month"), Budget("b2", "c1", 150, "week"))
+FIRST = Transaction("t0", "a1", "c1", -90, "2023-01-02", "n")
+
+
+@pytest.fixture
+def fresh(make_state):
+    return lambda: register_view(make_state(BUDGETS, ACCOUNTS, (FIRST,)), ["a2"])
+
+
+def _events(n):
+    return [
+        Event(
+            f"e{i}", "ts", "TRANSACTION_ADDED",
+            {"transaction": Transaction(f"t{i + 1}", f"a{1 + i % 2}", f"c{1 + i % 3 // 2}", -7 * (i + 1) if i % 5 else 40, f"2023-01-{1 + i % 28:02d}", "n")},
+        )
+        for i in range(n)
+    ]
+
+
+def test_batch_matches_per_event(make_bus, fresh):
+    bus = make_bus()
+    events = _events(40)
+    sequential = fresh()
+    for e in events:
+        sequential = bus.publish(e, sequential)
+    batched = bus.publish_batch(events, fresh())
+
+    assert tuple(batched["transactions"]) == tuple(sequential["transactions"])
+    assert tuple(batched["accounts"]) == tuple(sequential["accounts"])
+    assert batched["alerts"] == sequential["alerts"]
+    assert len(batched["alerts"]) > 0
+    assert batched["budget_spend"].totals == sequential["budget_spend"].totals
+    assert verify_budget_spend(batched)
+
+    view, expected = batched["views"][("a2",)], sequential["views"][("a2",)]
+    assert tuple(view.transactions) == tuple(expected.transactions)
+    assert tuple(view.accounts) == tuple(expected.accounts)
+    assert view.source is batched["transactions"]
+
+
+def test_create_transactions_keeps_index(fresh):
+    trans = [e.payload["transaction"] for e in _events(10)]
+    state = create_transactions(fresh(), trans)
+    index = state["index"]
+    rebuilt = build_index(state["transactions"], state["accounts"], ())
+    assert index.matches(state)
+    assert dict(index.tx_pos.items()) == dict(rebuilt.tx_pos.items())
+    assert {k: tuple(v) for k, v in index.acc_txs.items()} == {
+        k: tuple(v) for k, v in rebuilt.acc_txs.items()
+    }
+    assert dict(index.accounts.items()) == dict(rebuilt.accounts.items())
+
+    one_by_one = fresh()
+    for t in trans:
+        one_by_one = create_transaction(one_by_one, t)
+    assert tuple(state["accounts"]) == tuple(one_by_one["accounts"])
+    assert create_transactions(state, []) is state
+
+
+def test_mixed_events_and_plain_handlers(make_bus, fresh):
+    bus = make_bus()
+    seen = []
+    bus.subscribe("OTHER", lambda e, state: {**state, "other": seen.append(e.id) or len(seen)})
+    events = _events(3)
+    events.insert(1, Event("x1", "ts", "OTHER", {}))
+    events.append(Event("x2", "ts", "OTHER", {}))
+
+    state = bus.publish_batch(events, fresh())
+    assert seen == ["x1", "x2"]
+    assert state["other"] == 2
+    assert [t.id for t in state["transactions"]] == ["t0", "t1", "t2", "t3"]
@@ -0,0 +1,93 @@
+from core.domain import Account, Budget, Category, Transaction
+from core.fingerprint import build_fingerprint, state_fingerprint
+from core.memo import memoize_on_state
+from core.state_utils import (
+    create_transaction,
+    create_transactions,
+    delete_transaction,
+    update_account_balance,
+    update_transaction,
+)
+
+
+def _state():
+    state = {
+        "accounts": (Account("a1", "n", 100, "USD"), Account("a2", "n", 0, "USD")),
+        "categories": (Category("c1", "Food", None, "expense"),),
+        "transactions": (Transaction("t0", "a1", "c1", -5, "2023-01-01", "n"),),
+        "budgets": (Budget("b1", "c1", 50, "month"),),
+    }
+    return {**state, "fingerprint": build_fingerprint(state)}
+
+
+def _t(i, acc="a1", amount=-10):
+    return Transaction(f"t{i}", acc, "c1", amount, "2023-01-02", "n")
+
+
+def test_mutators_keep_fingerprint():
+    state = _state()
+    state = create_transaction(state, _t(1))
+    state = create_transactions(state, [_t(2, "a2"), _t(3)])
+    state = update_transaction(state, "t1", {"amount": -20, "account_id": "a2"})
+    state = update_account_balance(state, "a1", 7)
+    state = delete_transaction(state, "t2")
+
+    fp = state["fingerprint"]
+    assert fp.matches(state)
+    assert fp.key == build_fingerprint(state).key
+
+
+def test_equal_contents_equal_fingerprints():
+    base = _state()
+    one = create_transaction(create_transaction(base, _t(1)), _t(2, "a2"))
+    other = create_transaction(create_transactions(base, [_t(1), _t(9)]), _t(2, "a2"))
+    other = delete_transaction(other, "t9")
+    assert one["version"] != other["version"]
+    assert one["fingerprint"].key == other["fingerprint"].key
+    assert one["fingerprint"].key != base["fingerprint"].key
+
+
+def test_fingerprint_is_opt_in_and_rebuilt_when_stale():
+    plain = {"accounts": (Account("a1", "n", 0, "USD"),), "transactions": ()}
+    assert "fingerprint" not in create_transaction(plain, _t(1))
+
+    state = _state()
+    replaced = {**state, "transactions": state["transactions"] + (_t(5),)}
+    assert state_fingerprint(replaced).key == build_fingerprint(replaced).key
+
+
+def test_memoize_on_state():
+    calls = []
+
+    @memoize_on_state(maxsize=2)
+    def total(state, sign=1):
+        calls.append(1)
+        return sign * sum(t.amount for t in state["transactions"])
+
+    state = _state()
+    assert total(state) == -5
+    assert total({**state}) == -5  # same contents, other dict
+    assert total(state, sign=-1) == 5
+    assert len(calls) == 2
+
+    state = create_transaction(state, _t(1))
+    assert total(state) == -15
+    assert total.stats() == {"hits": 1, "misses": 3, "evictions": 1, "size": 2}
+    assert total.__name__ == "total"
+
+    total.clear()
+    assert total.stats()["size"] == 0
+
+
+def test_memoize_on_state_ttl():
+    calls = []
+
+    @memoize_on_state(ttl=0)
+    def count(state):
+        calls.append(1)
+        return len(state["transactions"])
+
+    state = _state()
+    count(state)
+    count(state)
+    assert len(calls) == 2 and count.hits == 0
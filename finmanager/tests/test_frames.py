@@ -0,0 +1,44 @@
+from core.domain import Account, Category, Transaction
+from core.frames import TransactionFrames
+from core.persistent import pvector
+from core.state_utils import create_transaction, update_transaction
+from core.store import TransactionStore
+
+
+def _state():
+    return {
+        "accounts": (Account("a1", "A", 0, "USD"), Account("a2", "B", 0, "USD")),
+        "categories": (Category("c1", "Food", None, "expense"),),
+        "transactions": pvector(
+            Transaction(f"t{i}", f"a{i % 2 + 1}", "c1", -i, "2024-01-01", "n") for i in range(5)
+        ),
+    }
+
+
+def test_frame_cached_and_appended():
+    frames = TransactionFrames()
+    state = _state()
+    df = frames.frame(state)
+    assert list(df["id"]) == [f"t{i}" for i in range(5)]
+    assert set(df["category_name"]) == {"Food"}
+    assert frames.frame(state) is df and frames.hits == 1
+
+    state = create_transaction(state, Transaction("t5", "a1", "zz", -9, "2024-01-02", "n"))
+    df2 = frames.frame(state)
+    assert frames.appends == 1 and frames.rebuilds == 1
+    assert len(df2) == 6 and df2["amount"].iloc[-1] == -9
+    assert df2["category_name"].isna().iloc[-1]
+
+    state = update_transaction(state, "t0", {"amount": -100})
+    assert frames.frame(state)["amount"].iloc[0] == -100
+    assert frames.rebuilds == 2
+
+    mine = frames.for_accounts(state, ["a2"])
+    assert list(mine["id"]) == ["t1", "t3"]
+
+
+def test_frame_from_store_matches_rows():
+    state = _state()
+    store_state = {**state, "transactions": TransactionStore.from_transactions(state["transactions"])}
+    expected = TransactionFrames().frame(state)
+    assert TransactionFrames().frame(store_state).equals(expected)
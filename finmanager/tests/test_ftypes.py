@@ -0,0 +1,50 @@
+import pickle
+
+from core.domain import Account, Category, Transaction
+from core.ftypes import Either, Maybe, Nothing, partition, sequence, traverse
+from core.transforms import validate_transaction
+
+
+def test_nothing_is_a_singleton():
+    assert Maybe.nothing() is Nothing
+    assert Maybe(None) is Nothing
+    assert Maybe.just(1).map(lambda x: None) is Nothing
+    assert pickle.loads(pickle.dumps(Nothing)) is Nothing
+    assert Maybe.just(2) == Maybe(2) and Maybe(2) is not Maybe(2)
+
+
+def test_short_circuits_return_the_receiver():
+    calls = []
+    left = Either.left("err")
+    assert left.map(calls.append) is left
+    assert left.bind(calls.append) is left
+    assert Nothing.map(calls.append) is Nothing
+    assert Nothing.bind(calls.append) is Nothing
+    assert calls == []
+    assert Either.right(2).bind(lambda x: Either.right(x + 1)) == Either.right(3)
+
+
+def test_slots():
+    for value in (Maybe(1), Either.right(1)):
+        assert not hasattr(value, "__dict__")
+
+
+def test_batch_validation():
+    accs = (Account("a1", "n", 0, "c"),)
+    cats = (Category("c1", "n", None, "t"),)
+    trans = [
+        Transaction("t1", "a1", "c1", 1, "ts", "n"),
+        Transaction("t2", "miss", "c1", 1, "ts", "n"),
+        Transaction("t3", "a1", "c1", 1, "ts", "n"),
+        Transaction("t4", "a1", "miss", 1, "ts", "n"),
+    ]
+    results = [validate_transaction(t, accs, cats) for t in trans]
+
+    valid, errors = partition(results)
+    assert valid == [trans[0], trans[2]]
+    assert [e["error"] for e in errors] == ["Account miss not found", "Category miss not found"]
+
+    assert sequence(results) == Either.left(errors)
+    assert traverse(trans, lambda t: validate_transaction(t, accs, cats)) == Either.left(errors)
+    assert traverse(valid, lambda t: validate_transaction(t, accs, cats)) == Either.right(valid)
+    assert sequence([]) == Either.right([])
@@ -1,5 +1,7 @@
 from core.domain import Category, Transaction
-from core.recursion import flatten_categories, sum_expenses_recursive
+from core.recursion import CategoryTree, category_tree, flatten_categories, sum_expenses_recursive
+from core.state_index import build_index
+from core.store import TransactionStore
 from core.transforms import by_amount_range, by_category, by_date_range
 
 
@@ -55,6 +57,17 @@ def test_recursion_sum():
     # Sum for c2 should include only c2 = -50
     assert sum_expenses_recursive(cats, trans, "c2") == -50
 
+
+def test_category_tree_built_once_per_object():
+    cats = (Category("c1", "Root", None, "expense"), Category("c2", "Child", "c1", "expense"))
+    tree = category_tree(cats)
+    assert category_tree(cats) is tree
+    assert build_index((), (), cats).category_tree is tree
+    trans = (Transaction("1", "a", "c2", -50, "ts", "n"),)
+    # A tree passed in is used as is, whatever cats says
+    assert sum_expenses_recursive((), trans, "c1", tree=tree) == -50
+    assert flatten_categories((), "c1", tree=tree) == cats
+
 def test_recursion_flatten_empty():
     # Test flattening when category has no children
     c1 = Category("c1", "Root", None, "expense")
@@ -72,3 +85,47 @@ def test_recursion_sum_no_match():
     
     # Should be 0
     assert sum_expenses_recursive(cats, trans, "c1") == 0
+
+def test_category_tree_index():
+    cats = (
+        Category("food", "Food", None, "expense"),
+        Category("groc", "Groceries", "food", "expense"),
+        Category("rest", "Restaurants", "food", "expense"),
+        Category("cafe", "Cafe", "rest", "expense"),
+        Category("fun", "Fun", None, "expense"),
+        Category("lost", "Orphan", "missing", "expense"),
+    )
+    tree = CategoryTree(cats)
+
+    assert tree.order[: tree.top_level_count] == ["food", "groc", "rest", "cafe", "fun"]
+    assert tree.subtree("rest") == ["rest", "cafe"]
+    assert tree.ancestors["cafe"] == ("cafe", "rest", "food")
+    assert tree.is_ancestor("food", "cafe") and not tree.is_ancestor("fun", "cafe")
+    assert [c.id for c in flatten_categories(cats)] == ["food", "groc", "rest", "cafe", "fun"]
+    assert [c.id for c in flatten_categories(cats, "lost")] == ["lost"]
+
+    trans = (
+        Transaction("1", "a", "groc", -10, "ts", "n"),
+        Transaction("2", "a", "cafe", -5, "ts", "n"),
+        Transaction("3", "a", "food", -1, "ts", "n"),
+        Transaction("4", "a", "fun", -7, "ts", "n"),
+    )
+    totals = tree.rollup(trans)
+    assert totals["food"] == -16 and totals["rest"] == -5 and totals["fun"] == -7
+    assert tree.rollup(TransactionStore.from_transactions(trans)) == totals
+
+def test_recursion_deep_tree():
+    # Far deeper than the default recursion limit
+    depth = 5000
+    cats = tuple(
+        Category(f"c{i}", f"n{i}", f"c{i - 1}" if i else None, "expense") for i in range(depth)
+    )
+    trans = (Transaction("t", "a", f"c{depth - 1}", -3, "ts", "n"),)
+
+    assert len(flatten_categories(cats, "c0")) == depth
+    assert sum_expenses_recursive(cats, trans, "c0") == -3
+
+def test_recursion_parent_cycle():
+    cats = (Category("a", "A", "b", "expense"), Category("b", "B", "a", "expense"))
+    assert flatten_categories(cats) == ()
+    assert {c.id for c in flatten_categories(cats, "a")} == {"a", "b"}
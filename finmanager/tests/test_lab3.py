@@ -1,51 +1,37 @@
-import time
+from concurrent.futures import ThreadPoolExecutor
 
 from core.domain import Transaction
-from core.memo import forecast_expenses
+from core.memo import ExpenseStats, ForecastEngine, default_engine, forecast_expenses
+from core.persistent import pvector
+from core.store import TransactionStore
 
 
 def test_forecast_memoization():
     t1 = Transaction("1", "acc1", "c1", -100, "ts", "n")
     t2 = Transaction("2", "acc1", "c1", -200, "ts", "n")
     trans = (t1, t2)
+    default_engine.clear()
 
-    # First call - slow
-    start = time.perf_counter()
+    # First call - computes statistics
     res1 = forecast_expenses("c1", trans, 1)
-    end = time.perf_counter()
-    dur1 = end - start
-
     assert res1 == 150  # (100+200)/2 * 1
-    assert dur1 >= 0.1  # Should simulate delay
+    assert default_engine.misses == 1
 
-    # Second call - fast
-    start = time.perf_counter()
+    # Second call - cached (keyed on the sequence, not on its hash)
     res2 = forecast_expenses("c1", trans, 1)
-    end = time.perf_counter()
-    dur2 = end - start
-
     assert res2 == 150
-    assert dur2 < 0.01  # Should be instant
+    assert default_engine.hits == 1
 
-    # Different args - slow again
-    start = time.perf_counter()
+    # Different period - same statistics, still cached
     res3 = forecast_expenses("c1", trans, 2)
-    end = time.perf_counter()
-    dur3 = end - start
-
     assert res3 == 300  # 150 * 2
-    assert dur3 >= 0.1
+    assert default_engine.misses == 1
 
 def test_forecast_empty_transactions():
     # If no transactions match, should return 0
     trans = ()
-    start = time.perf_counter()
     res = forecast_expenses("c1", trans, 1)
-    end = time.perf_counter()
-    
     assert res == 0
-    # Even if result is 0, simulate delay applies if not cached
-    assert (end - start) >= 0.1
 
 def test_forecast_no_matching_category():
     t1 = Transaction("1", "acc1", "c2", -100, "ts", "n")
@@ -70,3 +56,81 @@ def test_forecast_calculation_logic():
     
     res = forecast_expenses("c1", trans, 3)
     assert res == 600
+
+def _monthly(n_months, cat="c1"):
+    return tuple(
+        Transaction(f"t{m}_{i}", "a", cat, -(m + 1) * 10, f"2023-{m + 1:02d}-1{i}", "n")
+        for m in range(n_months)
+        for i in range(2)
+    )
+
+def test_forecast_methods():
+    engine = ForecastEngine()
+    trans = _monthly(6)  # monthly totals 20, 40, ..., 120
+
+    assert engine.monthly_totals("c1", trans)["2023-06"] == 120
+    # Last 3 months: (80 + 100 + 120) / 3 = 100 per month
+    assert engine.forecast("c1", trans, 2, method="moving_average") == 200
+    # No July/August history yet: seasonal falls back to the moving average
+    assert engine.forecast("c1", trans, 2, method="seasonal") == 200
+
+    last_year = tuple(
+        Transaction(f"p{i}", "a", "c1", -50, "2022-07-05", "n") for i in range(2)
+    )
+    assert engine.forecast("c1", last_year + trans, 1, method="seasonal") == 100
+
+def test_forecast_incremental_and_bounded():
+    engine = ForecastEngine(maxsize=2)
+    trans = pvector(_monthly(3))
+    assert engine.forecast("c1", trans, 1) == 20
+
+    more = trans.append(Transaction("x", "a", "c1", -100, "2023-03-20", "n"))
+    assert engine.forecast("c1", more, 1) == 31  # 220 / 7
+    assert engine.incremental == 1
+    assert engine.stats(more).totals == ForecastEngine().stats(tuple(more)).totals
+
+    engine.forecast("c1", (), 1)
+    engine.forecast("c1", _monthly(1), 1)
+    assert len(engine._cache) == 2  # LRU bound
+
+def test_forecast_store_matches_tuple():
+    trans = _monthly(4) + (Transaction("u", "a", "c2", -7, "ts", "n"),)
+    store = TransactionStore.from_transactions(trans)
+    a, b = ForecastEngine().stats(trans), ForecastEngine().stats(store)
+    assert a.totals == b.totals
+    assert a.monthly == b.monthly
+    assert a.last_month == b.last_month == "2023-04"
+
+def test_forecast_ttl():
+    engine = ForecastEngine(ttl=0)
+    trans = _monthly(1)
+    engine.stats(trans)
+    engine.stats(trans)
+    assert engine.hits == 0 and engine.misses == 2
+
+
+def test_forecast_engine_shared_across_threads():
+    engine = ForecastEngine(maxsize=2)
+    seqs = [_monthly(n, cat="c1") for n in range(1, 7)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(engine.stats, seqs * 20))
+
+    expected = [ForecastEngine().stats(s).totals for s in seqs]
+    assert [r.totals for r in results] == expected * 20
+    assert engine.hits + engine.misses == 120
+    assert len(engine._cache) <= 2
+
+
+def test_store_ingest_keeps_pre_1970_months():
+    trans = (
+        Transaction("1", "acc1", "c1", -10, "1969-12-31T23:00:00", "n"),
+        Transaction("2", "acc1", "c1", -20, "1950-06-01", "n"),
+        Transaction("3", "acc1", "c1", -40, "2024-03-31T22:00:00-05:00", "n"),
+        Transaction("4", "acc1", "c1", -80, "bad", "n"),
+    )
+    rows, columns = ExpenseStats(), ExpenseStats()
+    rows.ingest(trans)
+    columns.ingest_store(TransactionStore.from_transactions(trans))
+    assert columns.monthly == rows.monthly == {"c1": {"1969-12": 10, "1950-06": 20, "2024-03": 40}}
+    assert columns.totals == rows.totals == {"c1": (150, 4)}
+    assert columns.last_month == rows.last_month == "2024-03"
@@ -64,3 +64,58 @@ async def test_async_ignore_income():
     months = ["2023-01"]
     res = await rs.expenses_by_month(trans, months)
     assert res["2023-01"] == 0
+
+def _ledger(n):
+    return [
+        Transaction(f"t{i}", f"a{i % 3}", "c", (i % 7) - 5, f"2023-0{i % 4 + 1}-01", "n")
+        for i in range(n)
+    ]
+
+@pytest.mark.asyncio
+async def test_async_partitions_match_serial(monkeypatch):
+    import core.service
+    from concurrent.futures import ProcessPoolExecutor
+    from core.domain import Account
+    from core.store import TransactionStore
+
+    monkeypatch.setattr(core.service, "MIN_PARTITION_ROWS", 10)
+    trans = _ledger(100)
+    accounts = [Account("a0", "n", 10, "USD"), Account("a1", "n", 0, "USD")]
+    months = ["2023-01", "2023-02", "2023-05"]
+    serial = ReportService({}, partitions=1)
+    expected = await serial.expenses_by_month(trans, months)
+    expected_bal = await serial.balance_forecast(accounts, trans)
+    assert expected_bal == {
+        a.id: a.balance + sum(t.amount for t in trans if t.account_id == a.id)
+        for a in accounts
+    }
+
+    with ProcessPoolExecutor(2) as pool:
+        rs = ReportService({}, executor=pool, partitions=4)
+        assert await rs.expenses_by_month(trans, months) == expected
+        assert await rs.balance_forecast(accounts, trans) == expected_bal
+
+    store = TransactionStore.from_transactions(trans)
+    rs = ReportService({}, partitions=4)
+    assert await rs.expenses_by_month(store, months) == expected
+    assert await rs.balance_forecast(accounts, store) == expected_bal
+
+@pytest.mark.asyncio
+async def test_async_timeout():
+    rs = ReportService({})
+    with pytest.raises(asyncio.TimeoutError):
+        await rs.expenses_by_month(_ledger(1000), ["2023-01"], timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_month_and_day_prefixes_agree_on_list_and_tuple():
+    trans = (
+        Transaction("t1", "a", "c", -10, "2024-01", "short ts"),
+        Transaction("t2", "a", "c", -20, "2024-01-05", "n"),
+        Transaction("t3", "a", "c", -40, "2024-01-05T10:00:00", "n"),
+    )
+    months = ["2024-01", "2024-01-05", "2024"]
+    rs = ReportService({})
+    expected = {"2024-01": 70, "2024-01-05": 60, "2024": 70}
+    assert await rs.expenses_by_month(list(trans), months) == expected
+    assert await rs.expenses_by_month(trans, months) == expected
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from core.domain import Account, Transaction
+from core.ledger import Ledger
+from core.state_utils import create_transaction
+from core.views import register_view
+
+
+def _ledger():
+    return Ledger({"accounts": (Account("a1", "n", 0, "USD"),), "transactions": ()}, history=3)
+
+
+def test_snapshots_are_immutable_versions():
+    ledger = _ledger()
+    before = ledger.snapshot()
+    assert ledger.version == 0
+
+    after = ledger.update(create_transaction, Transaction("t1", "a1", "c", -5, "ts", "n"))
+    assert ledger.version > 0 and ledger.snapshot() is after
+    assert len(before["transactions"]) == 0
+    assert ledger.snapshot(0) is before
+
+    # A no-op update does not create a version
+    state = ledger.update(register_view, ["a1"])
+    assert ledger.update(register_view, ["a1"]) is state
+
+    for i in range(3):
+        ledger.update(create_transaction, Transaction(f"x{i}", "a1", "c", -1, "ts", "n"))
+    with pytest.raises(KeyError):
+        ledger.snapshot(0)
+
+
+def test_concurrent_writers_are_serialized():
+    ledger = _ledger()
+
+    def writer(w):
+        for i in range(50):
+            ledger.update(create_transaction, Transaction(f"{w}_{i}", "a1", "c", -1, "ts", "n"))
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    state = ledger.snapshot()
+    assert len(state["transactions"]) == 200
+    assert state["accounts"][0].balance == -200
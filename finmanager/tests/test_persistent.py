@@ -0,0 +1,95 @@
+from core.domain import Account, Transaction
+from core.persistent import PMap, PVector, pvector
+from core.state_utils import create_transaction, delete_transaction, update_transaction
+
+
+def test_pvector_append_and_share():
+    v1 = PVector(range(100))
+    v2 = v1.append(100)
+    v3 = v1.set(50, "x")
+
+    assert len(v1) == 100 and len(v2) == 101
+    assert list(v2) == list(range(101))
+    assert v3[50] == "x" and v1[50] == 50  # original unchanged
+    assert v1 == tuple(range(100))
+    assert tuple(range(100)) == v1
+    assert v1[-1] == 99
+    assert v1[10:13] == (10, 11, 12)
+
+
+def test_pvector_large():
+    n = 40000  # deeper than two trie levels
+    v = pvector(())
+    for i in range(n):
+        v = v.append(i)
+    assert len(v) == n
+    assert all(v[i] == i for i in range(0, n, 997))
+    assert list(v.delete(0))[:3] == [1, 2, 3]
+
+
+def test_pvector_bulk_extend():
+    v = pvector(range(5))
+    for n in (27, 1, 32, 1000, 40000):
+        v = v.extend(range(len(v), len(v) + n))
+        assert list(v) == list(range(len(v)))
+    assert v.extend(()) is v
+    assert all(v[i] == i for i in range(0, len(v), 613))
+
+
+def test_pmap_set_remove():
+    m1 = PMap({"a": 1, "b": 2})
+    m2 = m1.set("c", 3).remove("a")
+
+    assert dict(m1.items()) == {"a": 1, "b": 2}
+    assert m2 == {"b": 2, "c": 3}
+    assert "a" not in m2 and len(m2) == 2
+    assert m2.discard("missing") is m2
+
+
+def test_pmap_hash_collisions():
+    class Key:
+        def __init__(self, k):
+            self.k = k
+
+        def __hash__(self):
+            return 1
+
+        def __eq__(self, other):
+            return isinstance(other, Key) and other.k == self.k
+
+    m = PMap()
+    for i in range(10):
+        m = m.set(Key(i), i)
+    m = m.remove(Key(3))
+    assert len(m) == 9
+    assert m.get(Key(4)) == 4
+    assert Key(3) not in m
+
+    bulk = PMap((Key(i), i) for i in range(10))
+    assert len(bulk) == 10 and bulk[Key(7)] == 7
+    assert dict(bulk.remove(Key(3)).items()) == dict(m.items())
+
+
+def test_pmap_bulk_build_matches_sets():
+    pairs = [(i * 7919 % 5000, i) for i in range(20000)]  # repeated keys: last value wins
+    bulk = PMap(pairs)
+    expected = dict(pairs)
+    assert len(bulk) == len(expected)
+    assert all(bulk[k] == v for k, v in expected.items())
+    assert dict(bulk.set("x", 1).remove("x").items()) == expected
+
+
+def test_state_utils_keep_old_versions():
+    acc = Account("a1", "n", 100, "USD")
+    s0 = {"transactions": (), "accounts": (acc,)}
+    t = Transaction("t1", "a1", "c1", -10, "2023-01-01", "n")
+
+    s1 = create_transaction(s0, t)
+    s2 = update_transaction(s1, "t1", {"amount": -30})
+    s3 = delete_transaction(s2, "t1")
+
+    assert isinstance(s1["transactions"], PVector)
+    assert s0["transactions"] == () and s0["accounts"][0].balance == 100
+    assert s1["transactions"][0].amount == -10 and s1["accounts"][0].balance == 90
+    assert s2["transactions"][0].amount == -30 and s2["accounts"][0].balance == 70
+    assert len(s3["transactions"]) == 0 and s3["accounts"][0].balance == 100
@@ -0,0 +1,72 @@
+import pytest
+
+from core.domain import Transaction
+from core.lazy import iter_transactions
+from core.predicates import AllOf, Opaque, Predicate, select
+from core.sqlite_store import SqliteStore, _where
+from core.store import TransactionStore
+from core.transforms import by_amount_range, by_category, by_date_range
+
+
+TRANS = tuple(
+    Transaction(f"t{i}", "a1", f"c{i % 3}", (i - 10) * 5, f"2024-01-{i % 28 + 1:02d}T10:00:00", "n")
+    for i in range(30)
+) + (
+    Transaction("bad", "a1", "c0", -20, "ts", "n"),
+    # Formats whose string order differs from their time order
+    Transaction("frac", "a1", "c1", -15, "2024-01-05T10:00:00.250", "n"),
+    Transaction("offset", "a1", "c2", -25, "2024-01-20T23:00:00-05:00", "n"),
+    Transaction("basic", "a1", "c0", -35, "20240110T100000", "n"),
+    Transaction("space", "a1", "c1", -45, "2024-01-05 09:00:00", "n"),
+)
+
+PREDS = [
+    by_category("c1"),
+    by_date_range("2024-01-05", "2024-01-20"),
+    by_amount_range(10, 30),
+    by_category("c0") & by_amount_range(15, 50),
+    by_category("c2") | ~by_date_range("2024-01-03", "2024-01-25"),
+    (lambda t: t.amount > 0) & by_category("c1"),
+    by_date_range("2023", "zz"),
+    by_date_range("2024-01-05T10:00:00", "2024-01-05T10:00:00"),
+    by_date_range("2024-01-05T00:00:00", "2024-01-20T23:59:59"),
+]
+
+
+def test_predicates_agree_on_every_path():
+    store = TransactionStore.from_transactions(TRANS)
+    for pred in PREDS:
+        expected = tuple(t for t in TRANS if pred(t))
+        assert tuple(filter(pred.compile(), TRANS)) == expected, pred
+        assert tuple(t for t, m in zip(TRANS, pred.mask(store)) if m) == expected, pred
+        assert select(TRANS, pred) == expected
+        assert select(store, pred) == expected
+        assert tuple(iter_transactions(store, pred)) == expected
+
+
+def test_combinators_flatten_and_wrap_callables():
+    pred = by_category("c1") & by_amount_range(1, 2) & (lambda t: True)
+    assert isinstance(pred, AllOf) and len(pred.parts) == 3
+    assert isinstance(pred.parts[2], Opaque)
+    assert select(TRANS) == TRANS
+
+
+def test_predicate_is_abstract():
+    with pytest.raises(TypeError):
+        Predicate()
+
+    class Incomplete(Predicate):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_sql_translation():
+    store = SqliteStore()
+    store.insert_transactions(TRANS)
+    for pred in PREDS:
+        assert tuple(store.transactions(pred)) == tuple(t for t in TRANS if pred(t)), pred
+
+    where, params, rest = _where([by_category("c1") | by_amount_range(1, 5), lambda t: True])
+    assert "OR" in where and params == ["c1", 1, 5] and len(rest) == 1
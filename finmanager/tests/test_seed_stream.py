@@ -0,0 +1,60 @@
+import json
+
+from core.lazy import iter_transactions_from_file, lazy_top_categories
+from core.seed_stream import stream_transactions
+from core.transforms import load_seed
+
+
+def _rows(n):
+    return [
+        {
+            "id": f"t{i}",
+            "account_id": "a1",
+            "cat_id": "c1" if i % 2 else "c2",
+            "amount": -i,
+            "ts": f"2023-01-{i % 28 + 1:02d}",
+            "note": "n",
+        }
+        for i in range(n)
+    ]
+
+
+def test_stream_matches_load_seed():
+    _, _, trans, _ = load_seed("data/seed.json")
+    assert tuple(stream_transactions("data/seed.json")) == trans
+
+
+def test_stream_json_array_across_chunks(tmp_path):
+    rows = _rows(5000)  # larger than one read chunk
+    path = tmp_path / "tx.json"
+    path.write_text(json.dumps(rows, indent=2))
+
+    streamed = list(stream_transactions(str(path)))
+    assert len(streamed) == 5000
+    assert streamed[-1].id == "t4999"
+    assert streamed[1234].amount == -1234
+
+
+def test_stream_ndjson_limit_and_window(tmp_path):
+    path = tmp_path / "tx.ndjson"
+    path.write_text("\n".join(json.dumps(r) for r in _rows(100)) + "\n")
+
+    assert len(list(stream_transactions(str(path), limit=7))) == 7
+    window = list(stream_transactions(str(path), start="2023-01-05", end="2023-01-06"))
+    assert {t.ts for t in window} == {"2023-01-05", "2023-01-06"}
+    assert len(window) == 8
+    assert [t.id for t in stream_transactions(str(path), start="2023-01-28", limit=2)] == [
+        "t27",
+        "t55",
+    ]
+
+
+def test_iter_transactions_from_file(tmp_path):
+    path = tmp_path / "tx.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in _rows(10)))
+
+    it = iter_transactions_from_file(str(path), lambda t: t.cat_id == "c1")
+    assert [t.id for t in it] == ["t1", "t3", "t5", "t7", "t9"]
+
+    top = list(lazy_top_categories(iter_transactions_from_file(str(path)), (), 1))
+    assert top == [("c1", 25)]
@@ -0,0 +1,73 @@
+from core.budget_spend import build_budget_spend
+from core.domain import Budget, Transaction
+from core.fingerprint import build_fingerprint
+from core.snapshot import convert_seed, open_snapshot, snapshot_state, write_snapshot
+from core.store import TransactionStore
+from core.transforms import account_balance, load_seed
+
+
+def test_snapshot_roundtrip_seed(tmp_path):
+    path = str(tmp_path / "seed.snap")
+    convert_seed("data/seed.json", path)
+
+    accs, cats, trans, buds = load_seed("data/seed.json")
+    s_accs, s_cats, s_trans, s_buds = open_snapshot(path)
+
+    assert (s_accs, s_cats, s_buds) == (accs, cats, buds)
+    assert isinstance(s_trans, TransactionStore)
+    assert tuple(s_trans) == trans
+    assert account_balance(s_trans, "acc1") == account_balance(trans, "acc1")
+
+
+def test_snapshot_columns_are_memory_mapped(tmp_path):
+    path = str(tmp_path / "s.snap")
+    trans = tuple(
+        Transaction(f"t{i}", "a1", "c1", -i, "2023-01-01", "same note") for i in range(50)
+    )
+    write_snapshot(path, {"transactions": trans})
+
+    _, _, store, _ = open_snapshot(path)
+    assert store.amounts.base is not None  # a view into the mapped file
+    assert not store.amounts.flags.writeable
+    assert store[49] == trans[49]
+
+
+def test_snapshot_store_append_copies_on_write(tmp_path):
+    path = str(tmp_path / "s.snap")
+    t = Transaction("t1", "a1", "c1", -5, "2023-01-01", "n")
+    write_snapshot(path, {"transactions": (t,)})
+
+    _, _, store, _ = open_snapshot(path)
+    t2 = Transaction("t2", "a2", "c1", -7, "2023-01-02", "n2")
+    grown = store.append(t2)
+
+    assert tuple(grown) == (t, t2)
+    assert tuple(store) == (t,)
+
+
+def test_snapshot_empty(tmp_path):
+    path = str(tmp_path / "empty.snap")
+    write_snapshot(path, {})
+    accs, cats, store, buds = open_snapshot(path)
+    assert len(store) == 0 and accs == () and buds == ()
+
+
+def test_snapshot_store_budget_spend_and_fingerprint_match_rows(tmp_path):
+    path = str(tmp_path / "s.snap")
+    trans = tuple(
+        Transaction(f"t{i}", f"a{i % 2}", f"c{i % 3}", -10 * i + 25, ts, "n")
+        for i, ts in enumerate(
+            ["2023-01-31T23:30:00-05:00", "2023-02-01", "bad", "2023-02-06T08:00:00"] * 5
+        )
+    )
+    budgets = (
+        Budget("b1", "c0", 100, "month"),
+        Budget("b2", "c1", 100, "week"),
+        Budget("b3", "c2", 100, "year"),
+    )
+    write_snapshot(path, {"transactions": trans, "budgets": budgets})
+    state = snapshot_state(path)
+
+    rebuilt = build_budget_spend(budgets, state["transactions"])
+    assert rebuilt.totals == build_budget_spend(budgets, trans).totals
+    assert build_fingerprint(state).key == build_fingerprint({**state, "transactions": trans}).key
@@ -0,0 +1,120 @@
+import threading
+
+from core.domain import Account, Budget, Category, Transaction
+from core.service import ReportService
+from core.sqlite_store import SqliteStore
+from core.state_utils import (
+    create_transaction,
+    delete_transaction,
+    update_account_balance,
+    update_transaction,
+)
+from core.transforms import account_balance, by_amount_range, by_category, by_date_range
+
+
+ACCOUNTS = (Account("a1", "A", 100, "USD"), Account("a2", "B", 0, "USD"))
+CATEGORIES = (Category("c1", "Food", None, "expense"), Category("c2", "Pay", None, "income"))
+BUDGETS = (Budget("b1", "c1", 50, "month"),)
+TRANS = tuple(
+    Transaction(f"t{i}", f"a{i % 2 + 1}", f"c{i % 2 + 1}", (i - 5) * 10, f"2024-01-{i + 1:02d}", "n")
+    for i in range(10)
+)
+
+
+def _store(tmp_path):
+    store = SqliteStore(str(tmp_path / "fm.db"))
+    store.insert_seed(ACCOUNTS, CATEGORIES, TRANS, BUDGETS)
+    return store
+
+
+def test_load_roundtrip_and_wal(tmp_path):
+    store = _store(tmp_path)
+    assert store.load() == (ACCOUNTS, CATEGORIES, TRANS, BUDGETS)
+    mode = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_filters_pushed_down(tmp_path):
+    store = _store(tmp_path)
+    preds = [by_category("c1"), by_date_range("2024-01-03", "2024-01-09"), by_amount_range(10, 30)]
+    expected = [t for t in TRANS if all(p(t) for p in preds)]
+    assert list(store.transactions(*preds)) == expected
+    assert store.count(*preds) == len(expected)
+
+    # Opaque predicates still work, applied in Python
+    odd = lambda t: int(t.id[1:]) % 4 == 0
+    assert list(store.transactions(by_category("c1"), odd)) == [
+        t for t in TRANS if t.cat_id == "c1" and odd(t)
+    ]
+
+    plan = store._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE cat_id = ? AND ts BETWEEN ? AND ?",
+        ("c1", "a", "b"),
+    ).fetchall()
+    assert "tx_cat_ts" in str(plan)
+
+
+def test_reports_match_in_memory(tmp_path):
+    store = _store(tmp_path)
+    assert store.account_balance("a1") == account_balance(TRANS, "a1")
+    assert store.category_report("c1") == ReportService({}).category_report("c1", TRANS)
+    assert store.expense_by_category() == {"c1": 90, "c2": 60}
+    assert store.expense_by_category(by_date_range("2024-01-01", "2024-01-02")) == {"c1": 50, "c2": 40}
+
+
+def test_mirrored_mutations_match_state(tmp_path):
+    store = _store(tmp_path)
+    state = {"accounts": ACCOUNTS, "categories": CATEGORIES, "transactions": TRANS}
+
+    with store.batch():
+        state = store.mirror(create_transaction)(state, Transaction("n1", "a1", "c1", -7, "2024-02-01", "n"))
+        state = store.mirror(update_transaction)(state, "t0", {"amount": -1, "account_id": "a2"})
+        state = store.mirror(delete_transaction)(state, "t3")
+        state = store.mirror(update_account_balance)(state, "a2", 42)
+        state = store.mirror(delete_transaction)(state, "missing")
+
+    accounts, _, trans, _ = SqliteStore(store.path).load()
+    assert accounts == tuple(state["accounts"])
+    assert trans == tuple(state["transactions"])
+
+
+def test_seed_load_is_idempotent(tmp_path):
+    store = _store(tmp_path)
+    store.insert_seed(ACCOUNTS, CATEGORIES, TRANS, BUDGETS)
+    assert store.load() == (ACCOUNTS, CATEGORIES, TRANS, BUDGETS)
+
+
+def test_concurrent_batches(tmp_path):
+    store = _store(tmp_path)
+
+    def write(k):
+        for i in range(20):
+            with store.batch():
+                store.create_transaction(Transaction(f"w{k}_{i}", "a2", "c2", 1, "2024-02-01", "n"))
+
+    threads = [threading.Thread(target=write, args=(k,)) for k in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert store.count() == len(TRANS) + 80
+    assert store._batch_depth == 0
+
+
+def test_readers_do_not_see_uncommitted_batch(tmp_path):
+    store = _store(tmp_path)
+    in_batch, counted = threading.Event(), []
+
+    def read():
+        in_batch.wait()
+        counted.append(store.count())
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    with store.batch():
+        store.create_transaction(Transaction("x", "a1", "c1", -1, "2024-02-01", "n"))
+        in_batch.set()
+        reader.join(0.2)  # blocked on the store lock until the batch commits
+        assert reader.is_alive()
+    reader.join()
+    assert counted == [len(TRANS) + 1]
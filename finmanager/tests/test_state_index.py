@@ -0,0 +1,90 @@
+from core.domain import Account, Category, Transaction
+from core.state_index import build_index, state_index
+from core.state_utils import (
+    create_transaction,
+    delete_transaction,
+    update_account_balance,
+    update_transaction,
+)
+from core.transforms import safe_category, validate_transaction
+
+
+def _state():
+    accs = (Account("a1", "n1", 100, "USD"), Account("a2", "n2", 0, "USD"))
+    cats = (Category("c1", "Food", None, "expense"),)
+    return {"transactions": (), "accounts": accs, "categories": cats}
+
+
+def _assert_consistent(state):
+    index = state["index"]
+    fresh = build_index(state["transactions"], state["accounts"], state["categories"])
+    assert index.matches(state)
+    assert index.tx_pos == fresh.tx_pos
+    assert index.acc_pos == fresh.acc_pos
+    assert index.accounts == fresh.accounts
+    assert index.categories == fresh.categories
+    assert {k: tuple(v) for k, v in index.acc_txs.items() if len(v)} == {
+        k: tuple(v) for k, v in fresh.acc_txs.items()
+    }
+
+
+def test_mutators_keep_index_consistent():
+    state = _state()
+    for i in range(10):
+        t = Transaction(f"t{i}", "a1" if i % 2 else "a2", "c1", -i, "2023-01-01", "n")
+        state = create_transaction(state, t)
+        _assert_consistent(state)
+
+    state = update_transaction(state, "t3", {"amount": -30, "note": "x"})
+    _assert_consistent(state)
+    state = delete_transaction(state, "t4")
+    _assert_consistent(state)
+    state = update_account_balance(state, "a2", 500)
+    _assert_consistent(state)
+
+    assert state["index"].tx_pos["t5"] == 4
+    assert state["index"].accounts["a2"].balance == 500
+    assert tuple(state["index"].acc_txs["a1"]) == ("t1", "t3", "t5", "t7", "t9")
+
+
+def test_update_moves_transaction_between_accounts():
+    state = create_transaction(_state(), Transaction("t1", "a1", "c1", -40, "ts", "n"))
+    state = update_transaction(state, "t1", {"account_id": "a2"})
+
+    _assert_consistent(state)
+    assert state["index"].accounts["a1"].balance == 100
+    assert state["index"].accounts["a2"].balance == -40
+    assert tuple(state["index"].acc_txs["a2"]) == ("t1",)
+
+
+def test_stale_index_is_rebuilt():
+    state = create_transaction(_state(), Transaction("t1", "a1", "c1", -1, "ts", "n"))
+    replaced = {**state, "transactions": (Transaction("x", "a1", "c1", -1, "ts", "n"),)}
+
+    assert not state["index"].matches(replaced)
+    assert "x" in state_index(replaced).tx_pos
+    assert update_transaction(replaced, "t1", {"amount": 5}) is replaced  # not found
+
+
+def test_validate_with_index_mappings():
+    index = state_index(_state())
+    t_ok = Transaction("t1", "a1", "c1", -1, "ts", "n")
+    t_bad = Transaction("t2", "a1", "missing", -1, "ts", "n")
+
+    assert validate_transaction(t_ok, index.accounts, index.categories).is_right()
+    assert "Category" in validate_transaction(
+        t_bad, index.accounts, index.categories
+    ).unwrap()["error"]
+    assert safe_category(index.categories, "c1").get_or_else(None).name == "Food"
+
+
+def test_index_of_store_matches_tuple():
+    from core.store import TransactionStore
+
+    trans = tuple(Transaction(f"t{i}", f"a{i % 3}", "c1", -i, "2023-01-01", "n") for i in range(50))
+    from_store = build_index(TransactionStore.from_transactions(trans), (), ())
+    from_tuple = build_index(trans, (), ())
+    assert dict(from_store.tx_pos.items()) == dict(from_tuple.tx_pos.items())
+    assert {k: tuple(v) for k, v in from_store.acc_txs.items()} == {
+        k: tuple(v) for k, v in from_tuple.acc_txs.items()
+    }
@@ -0,0 +1,69 @@
+from core.domain import Budget, Category, Transaction
+from core.lazy import lazy_top_categories
+from core.service import BudgetService, ReportService
+from core.store import TransactionStore
+from core.transforms import account_balance, check_budget
+
+
+def _sample():
+    return (
+        Transaction("t1", "a1", "c1", -100, "2023-01-01", "n1"),
+        Transaction("t2", "a1", "c2", 250, "2023-01-02", "n2"),
+        Transaction("t3", "a2", "c1", -50, "2023-02-01", "n3"),
+        Transaction("t4", "a2", "c2", -80, "ts", "n4"),
+    )
+
+
+def test_store_tuple_view():
+    trans = _sample()
+    store = TransactionStore.from_transactions(trans)
+
+    assert len(store) == 4
+    assert store[0] == trans[0]
+    assert store[-1] == trans[-1]
+    assert store[1:3] == trans[1:3]
+    assert tuple(store) == trans
+    assert store == trans
+    assert store + (trans[0],) == trans + (trans[0],)
+
+
+def test_store_columns():
+    store = TransactionStore.from_transactions(_sample())
+
+    assert store.amounts.tolist() == [-100, 250, -50, -80]
+    assert store.epochs[0] == 1672531200  # 2023-01-01T00:00:00Z
+    assert store.account_codes.tolist() == [0, 0, 1, 1]
+    assert store.category_ids == ["c1", "c2"]
+
+
+def test_store_append_is_immutable():
+    trans = _sample()
+    base = TransactionStore.from_transactions(trans[:2])
+    left = base.append(trans[2])
+    right = base.append(trans[3])  # branches from the same base
+
+    assert len(base) == 2
+    assert tuple(left) == trans[:3]
+    assert tuple(right) == trans[:2] + (trans[3],)
+
+
+def test_store_matches_tuple_functions():
+    trans = _sample()
+    store = TransactionStore.from_transactions(trans)
+    b = Budget("b1", "c1", 120, "month")
+
+    assert account_balance(store, "a1") == account_balance(trans, "a1")
+    assert account_balance(store, "missing") == 0
+    assert check_budget(b, store) == check_budget(b, trans)
+    assert BudgetService([], []).monthly_report((b,), store) == BudgetService(
+        [], []
+    ).monthly_report((b,), trans)
+    rs = ReportService({})
+    assert rs.category_report("c1", store) == rs.category_report("c1", trans)
+
+
+def test_store_top_categories():
+    cats = (Category("c1", "Food", None, "expense"), Category("c2", "Fun", None, "expense"))
+    store = TransactionStore.from_transactions(_sample())
+
+    assert list(lazy_top_categories(store, cats, 2)) == [("Food", 150), ("Fun", 80)]
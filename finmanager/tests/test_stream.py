@@ -0,0 +1,124 @@
+import json
+import operator
+
+import pytest
+
+from core.dates import period_key
+from core.domain import Transaction
+from core.lazy import Stream, iter_transactions_from_file
+from core.store import TransactionStore
+from core.transforms import by_amount_range, by_category, by_date_range
+
+TRANS = tuple(
+    Transaction(
+        f"t{i}", f"a{i % 2}", f"c{i % 3}", (i - 40) * 5,
+        f"2024-{i % 3 + 1:02d}-{i % 28 + 1:02d}T10:00:00", f"n{i % 4}",
+    )
+    for i in range(100)
+) + (Transaction("bad", "a1", "c0", -20, "ts", "n"),)
+
+
+def _sources():
+    # Small chunks so every path crosses chunk boundaries. An iterator can
+    # only be streamed once, so each source is a factory
+    store = TransactionStore.from_transactions(TRANS)
+    return [
+        lambda: Stream(TRANS, chunk_size=7),
+        lambda: Stream(iter(TRANS), chunk_size=7),
+        lambda: Stream(store, chunk_size=7),
+    ]
+
+
+def _group(rows, key, value):
+    out = {}
+    for t in rows:
+        out[key(t)] = out.get(key(t), 0) + value(t)
+    return out
+
+
+def test_filter_map_stages_match_plain_python():
+    pred = by_category("c1") | by_amount_range(0, 30)
+    expected = [t.amount * 2 for t in TRANS if pred(t) and t.amount < 0 if t.amount * 2 < -50]
+    for source in _sources():
+        out = (
+            source().filter(pred)
+            .filter(lambda t: t.amount < 0)
+            .map(lambda t: t.amount)
+            .map(lambda a: a * 2)
+            .filter(lambda a: a < -50)
+            .collect()
+        )
+        assert out == expected
+
+
+def test_stages_are_lazy_and_immutable():
+    seen = []
+    base = Stream(TRANS).map(lambda t: seen.append(t) or t)
+    filtered = base.filter(by_category("c0"))
+    assert seen == []
+    assert filtered.count() == sum(t.cat_id == "c0" for t in TRANS)
+    assert base.count() == len(TRANS)
+
+
+def test_group_reduce_agrees_across_sources():
+    food = by_date_range("2024-01-01", "2024-02-15")
+    rows = [t for t in TRANS if food(t)]
+    for source in _sources():
+        def s():
+            return source().filter(food)
+
+        assert s().group_reduce("cat_id") == _group(rows, lambda t: t.cat_id, lambda t: 1)
+        assert s().group_reduce("account_id", "amount") == _group(rows, lambda t: t.account_id, lambda t: t.amount)
+        spent = _group([t for t in rows if t.amount < 0], lambda t: t.cat_id, lambda t: -t.amount)
+        assert s().group_reduce("cat_id", "spent") == spent
+        assert s().group_reduce("note", "amount", max) == {
+            n: max(t.amount for t in rows if t.note == n) for n in {t.note for t in rows}
+        }
+        assert s().sum() == sum(t.amount for t in rows)
+        assert s().sum("spent") == sum(-t.amount for t in rows if t.amount < 0)
+
+
+@pytest.mark.parametrize("period", ["month", "week"])
+def test_windowed_group_reduce(period):
+    expected = {}
+    for t in TRANS:
+        w = period_key(t.ts, period)
+        if w is not None and t.amount < 0:
+            by_cat = expected.setdefault(w, {})
+            by_cat[t.cat_id] = by_cat.get(t.cat_id, 0) - t.amount
+    for source in _sources():
+        assert source().window(period).group_reduce("cat_id", "spent") == expected
+        pairs = source().window(period).collect()
+        assert len(pairs) == len(TRANS) - 1
+        assert all(w == period_key(t.ts, period) for w, t in pairs)
+
+
+def test_window_keys_follow_wall_clock_on_every_source():
+    rows = (
+        Transaction("z", "a1", "c0", -1, "2024-03-31T23:30:00-05:00", "n"),
+        Transaction("e", "a1", "c0", -2, "2024-04-01T00:30:00+02:00", "n"),
+        Transaction("u", "a1", "c1", -4, "2024-04-01T00:00:00Z", "n"),
+    )
+    store = TransactionStore.from_transactions(rows)
+    for source in (rows, store):
+        assert Stream(source).window("month").group_reduce("cat_id", "spent") == {
+            "2024-03": {"c0": 1}, "2024-04": {"c0": 2, "c1": 4},
+        }
+        assert [w for w, _ in Stream(source).window("week")] == [period_key(t.ts, "week") for t in rows]
+
+
+def test_window_is_the_last_stage():
+    with pytest.raises(ValueError):
+        Stream(TRANS).window("month").filter(by_category("c0"))
+    with pytest.raises(ValueError):
+        Stream(TRANS).window("year")
+    with pytest.raises(ValueError):
+        Stream(TRANS).window("month").sum()
+
+
+def test_stream_over_file_source(tmp_path):
+    path = tmp_path / "tx.ndjson"
+    path.write_text("\n".join(json.dumps(t.__dict__) for t in TRANS[:-1]))
+    s = Stream(iter_transactions_from_file(str(path)), chunk_size=16)
+    by_cat = s.filter(by_category("c2")).group_reduce("cat_id", "amount", operator.add)
+    assert by_cat == {"c2": sum(t.amount for t in TRANS if t.cat_id == "c2")}
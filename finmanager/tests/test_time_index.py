@@ -0,0 +1,98 @@
+import asyncio
+import random
+
+from core.budget_report import budget_report
+from core.dates import ts_to_epoch
+from core.domain import Budget, Transaction
+from core.persistent import pvector
+from core.service import ReportService
+from core.store import TransactionStore
+from core.time_index import TimeIndex, month_window, time_index
+from core.transforms import by_date_range
+
+
+def _ledger(n, seed=1):
+    rnd = random.Random(seed)
+    trans = [
+        Transaction(
+            f"t{i}", "a1", f"c{i % 3}", rnd.randint(-100, 50),
+            f"2024-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T{rnd.randint(0, 23):02d}:00:00", "n",
+        )
+        for i in range(n)
+    ]
+    return tuple(trans + [Transaction("bad", "a1", "c0", -1, "ts", "n")])
+
+
+def test_windows_match_scan():
+    trans = _ledger(500)
+    index = TimeIndex.build(trans)
+    lo, hi = month_window("2024-03")
+    in_march = [i for i, t in enumerate(trans) if lo <= ts_to_epoch(t.ts) < hi]
+    assert sorted(index.window(lo, hi).tolist()) == in_march
+    assert index.expense_total(lo, hi) == sum(-trans[i].amount for i in in_march if trans[i].amount < 0)
+    assert index.latest_epoch == max(ts_to_epoch(t.ts) for t in trans)
+
+    pred = by_date_range("2024-02-10T00:00:00", "2024-05-01T05:00:00")
+    assert index.date_range(pred.start, pred.end).tolist() == [
+        i for i, t in enumerate(trans) if pred(t)
+    ]
+
+
+def test_cached_index_extends_on_append():
+    trans = pvector(_ledger(50))
+    first = time_index(trans)
+    assert time_index(trans) is first
+
+    longer = trans.append(Transaction("new", "a1", "c0", -5, "2025-01-01T00:00:00", "n"))
+    index = time_index(longer)
+    assert index.source is longer and len(index) == len(longer)
+    assert index.latest_epoch == ts_to_epoch("2025-01-01T00:00:00")
+
+
+def test_month_and_budget_queries_use_index():
+    trans = _ledger(300)
+    months = [f"2024-{m:02d}" for m in range(1, 13)]
+    rs = ReportService({})
+    indexed = asyncio.run(rs.expenses_by_month(trans, months))
+    # A list is not indexable and takes the partitioned scan
+    assert indexed == asyncio.run(rs.expenses_by_month(list(trans), months))
+
+    budgets = (Budget("m", "c1", 100, "month"), Budget("w", "c2", 100, "week"), Budget("a", "c0", 9, "x"))
+    for as_of in (None, "2024-06-15T00:00:00"):
+        assert budget_report(budgets, trans, as_of) == budget_report(budgets, list(trans), as_of)
+
+
+MIXED = (
+    Transaction("utc", "a1", "c1", -10, "2024-03-31T23:30:00Z", "n"),
+    Transaction("east", "a1", "c1", -20, "2024-04-01T01:00:00+02:00", "n"),
+    Transaction("west", "a1", "c2", -40, "2024-03-31T22:00:00-05:00", "n"),
+    Transaction("micro", "a1", "c1", -80, "2024-03-31T23:59:59.500000", "n"),
+    Transaction("space", "a1", "c2", -160, "2024-04-01 00:00:00", "n"),
+    Transaction("basic", "a1", "c1", -320, "20240401T000000", "n"),
+    Transaction("bad", "a1", "c2", -640, "2024-04-xx", "n"),
+    Transaction("plain", "a1", "c2", -5, "2024-04-02T08:00:00", "n"),
+)
+
+
+def test_list_and_index_agree_on_mixed_timestamps():
+    store = TransactionStore.from_transactions(MIXED)
+    # Columns without an offset array (older snapshots) recompute it from ts
+    reopened = TransactionStore.from_columns(
+        store.amounts, store.epochs, store.account_codes, store.cat_codes,
+        *store.string_columns(), store.account_ids, store.category_ids,
+    )
+    assert reopened.offsets.tolist() == store.offsets.tolist()
+
+    rs = ReportService({})
+    months = ["2024-03", "2024-04", "2024-04-xx", "2024"]
+    budgets = (Budget("m", "c1", 100, "month"), Budget("w", "c2", 100, "week"), Budget("a", "c2", 9, "x"))
+    ranges = [("2024-03-31T23:59:59", "2024-03-31T23:59:59"), ("2024-04-01", "2024-04-01T01"), ("2024-03", "2024-05")]
+    expected_months = asyncio.run(rs.expenses_by_month(list(MIXED), months))
+    for source in (MIXED, store, reopened):
+        assert asyncio.run(rs.expenses_by_month(source, months)) == expected_months
+        for as_of in (None, "2024-03-31T12:00:00", "2024-04-01T00:30:00+09:00"):
+            assert budget_report(budgets, source, as_of) == budget_report(budgets, list(MIXED), as_of)
+        index = TimeIndex.build(source)
+        for start, end in ranges:
+            pred = by_date_range(start, end)
+            assert index.date_range(start, end).tolist() == [i for i, t in enumerate(MIXED) if pred(t)]
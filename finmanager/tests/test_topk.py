@@ -0,0 +1,84 @@
+import random
+from operator import attrgetter
+
+import pytest
+
+from core.domain import Category, Transaction
+from core.lazy import category_names, lazy_top_categories, lazy_top_k
+from core.state_index import build_index
+from core.topk import CountMinTopK, SpaceSaving, TopK, stream_top_k
+
+
+def _zipf_pairs(n, keys, seed=1):
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) ** 1.2 for i in range(keys)]
+    return [(f"k{i}", rng.randint(1, 10)) for i in rng.choices(range(keys), weights, k=n)]
+
+
+def _exact(pairs):
+    totals = {}
+    for key, w in pairs:
+        totals[key] = totals.get(key, 0) + w
+    return totals
+
+
+def test_exact_top_k_matches_sort():
+    pairs = _zipf_pairs(5000, 300)
+    acc = TopK(5)
+    for p in pairs:
+        acc.add(*p)
+    expected = sorted(_exact(pairs).items(), key=lambda kv: kv[1], reverse=True)[:5]
+    assert acc.top() == expected
+
+
+@pytest.mark.parametrize("acc", [SpaceSaving(5, capacity=50), CountMinTopK(5, width=512)])
+def test_approximate_heavy_hitters(acc):
+    pairs = _zipf_pairs(20000, 5000)
+    for p in pairs:
+        acc.add(*p)
+    exact = _exact(pairs)
+    top = acc.top()
+    true_top = {k for k, _ in sorted(exact.items(), key=lambda kv: kv[1], reverse=True)[:3]}
+    assert true_top <= {k for k, _ in top}
+    # Estimates never under-count
+    assert all(est >= exact[k] for k, est in top)
+
+
+def test_space_saving_memory_and_error_bound():
+    acc = SpaceSaving(3, capacity=20)
+    pairs = _zipf_pairs(10000, 2000)
+    for p in pairs:
+        acc.add(*p)
+    exact = _exact(pairs)
+    assert len(acc.counts) == 20
+    for key, est in acc.counts.items():
+        assert exact[key] <= est <= exact[key] + acc.error(key)
+
+
+def test_stream_snapshots():
+    pairs = [("a", 1), None, ("b", 5), ("a", 3), None]
+    snapshots = list(stream_top_k(pairs, 1, every=2))
+    assert snapshots == [[("a", 1)], [("b", 5)], [("b", 5)]]
+    assert list(stream_top_k(pairs[:4], 1, every=2)) == [[("a", 1)], [("b", 5)]]
+    assert list(stream_top_k([], 2, every=10)) == [[]]
+
+
+def test_lazy_top_k_by_note():
+    trans = [
+        Transaction(f"t{i}", "a", "c1", -amount, "2023-01-01", note)
+        for i, (note, amount) in enumerate([("cafe", 5), ("rent", 900), ("cafe", 7), ("bus", 2)])
+    ] + [Transaction("t9", "a", "c1", 1000, "2023-01-01", "salary")]
+    *progress, final = lazy_top_k(iter(trans), 2, key=attrgetter("note"), every=2)
+    assert progress == [[("rent", 900), ("cafe", 5)], [("rent", 900), ("cafe", 12)]]
+    assert final == [("rent", 900), ("cafe", 12)]
+
+
+def test_category_names_cached():
+    cats = (Category("c1", "Food", None, "expense"),)
+    assert category_names(cats) is category_names(cats)
+    trans = (Transaction("t1", "a", "c1", -5, "ts", "n"), Transaction("t2", "a", "c2", -9, "ts", "n"))
+    assert list(lazy_top_categories(trans, cats, 5)) == [("c2", 9), ("Food", 5)]
+    # Keyed by identity: an equal copy is a different categories object
+    assert category_names(tuple(list(cats))) is not category_names(cats)
+    assert list(lazy_top_categories(trans, cats, 1, names={"c2": "Fuel"})) == [("Fuel", 9)]
+    assert build_index((), (), cats).category_names == {"c1": "Food"}
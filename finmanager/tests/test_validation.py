@@ -0,0 +1,90 @@
+from core.domain import Account, Category, Transaction
+from core.ftypes import Either
+from core.persistent import pmap
+from core.store import TransactionStore
+from core.transforms import VALIDATION_CHECKS, validate_transaction, validate_transactions
+
+ACCS = (Account("a1", "n", 0, "USD"), Account("a2", "n", 0, "USD"))
+CATS = (
+    Category("food", "Food", None, "expense"),
+    Category("salary", "Salary", None, "income"),
+    Category("misc", "Misc", None, "other"),
+)
+
+BATCH = (
+    Transaction("t1", "a1", "food", -50, "2024-01-02T10:00:00", "ok"),
+    Transaction("t2", "a2", "salary", 900, "2024-01-03", "ok"),
+    Transaction("t3", "nope", "food", -5, "2024-01-04", "unknown account"),
+    Transaction("t4", "a1", "nope", -5, "2024-01-04", "unknown category"),
+    Transaction("t5", "a1", "food", 20, "2024-01-04", "expense with income sign"),
+    Transaction("t6", "a1", "salary", -20, "2024-01-04", "income with expense sign"),
+    Transaction("t1", "a1", "misc", 7, "2024-01-05", "duplicate id"),
+    Transaction("t8", "a2", "misc", -7, "yesterday", "bad ts"),
+    Transaction("t9", "nope", "food", 3, "", "three failures"),
+)
+
+
+def _errors(results):
+    return [r.unwrap()["errors"] if r.is_left() else [] for r in results]
+
+
+def test_bulk_validation_rows_and_summary():
+    results, summary = validate_transactions(BATCH, ACCS, CATS)
+    assert [r.is_right() for r in results] == [True, True] + [False] * 7
+    assert results[0] == Either.right(BATCH[0])
+    errors = _errors(results)
+    assert errors[2] == ["Account nope not found"]
+    assert errors[3] == ["Category nope not found"]
+    assert errors[4] == ["Amount 20 does not match expense category food"]
+    assert errors[5] == ["Amount -20 does not match income category salary"]
+    assert errors[6] == ["Duplicate transaction id t1"]
+    assert errors[7] == ["Invalid timestamp 'yesterday'"]
+    assert errors[8] == [
+        "Account nope not found",
+        "Amount 3 does not match expense category food",
+        "Invalid timestamp ''",
+    ]
+    assert results[8].unwrap()["error"] == "Account nope not found"
+    assert summary == {
+        "rows": 9, "valid": 2, "unknown_account": 2, "unknown_category": 1,
+        "invalid_amount": 0, "sign_mismatch": 3, "duplicate_id": 1, "invalid_ts": 2,
+    }
+    assert set(VALIDATION_CHECKS) < set(summary)
+
+
+def test_bulk_validation_agrees_with_single_row_checks():
+    results, _ = validate_transactions(BATCH, ACCS, CATS)
+    for t, r in zip(BATCH, results):
+        single = validate_transaction(t, ACCS, CATS)
+        if single.is_left():
+            assert r.is_left() and r.unwrap()["error"] == single.unwrap()["error"]
+
+
+def test_store_batch_and_mappings():
+    accs = {a.id: a for a in ACCS}
+    cats = {c.id: c for c in CATS}
+    expected = validate_transactions(BATCH, ACCS, CATS)
+    assert validate_transactions(TransactionStore.from_transactions(BATCH), accs, cats) == expected
+    assert validate_transactions([], ACCS, CATS) == ([], dict.fromkeys(("rows", "valid") + VALIDATION_CHECKS, 0))
+
+
+def test_existing_ids_are_duplicates():
+    existing = pmap({"t2": 0})
+    results, summary = validate_transactions(BATCH[:2], ACCS, CATS, existing_ids=existing)
+    assert _errors(results) == [[], ["Duplicate transaction id t2"]]
+    assert summary["duplicate_id"] == 1
+
+
+def test_amounts_must_be_ints():
+    rows = [
+        Transaction(f"x{i}", "a1", "misc", amount, "2024-01-02", "n")
+        for i, amount in enumerate(["-5", -5.5, None, True, 0, -7])
+    ]
+    results, summary = validate_transactions(rows, ACCS, CATS)
+    assert _errors(results) == [
+        ["Invalid amount '-5'"], ["Invalid amount -5.5"], ["Invalid amount None"],
+        ["Invalid amount True"], [], [],
+    ]
+    assert summary["invalid_amount"] == 4 and summary["valid"] == 2
+    bad_sign = Transaction("y", "a1", "food", "5", "2024-01-02", "n")
+    assert _errors(validate_transactions([bad_sign], ACCS, CATS)[0]) == [["Invalid amount '5'"]]
@@ -0,0 +1,60 @@
+from core.domain import Account, Event, Transaction
+from core.frp import StateEventBus, on_transaction_added
+from core.state_utils import (
+    create_transaction,
+    delete_transaction,
+    update_account_balance,
+    update_transaction,
+)
+from core.views import build_view, register_view, user_view
+
+
+def _state():
+    accounts = tuple(Account(f"a{i}", "n", 0, "USD") for i in range(3))
+    trans = tuple(
+        Transaction(f"t{i}", f"a{i % 3}", "c", -i, "2024-01-01", "n") for i in range(9)
+    )
+    return {"accounts": accounts, "categories": (), "transactions": trans}
+
+
+def _assert_fresh(state, acc_ids):
+    view = state["views"][tuple(sorted(acc_ids))]
+    expected = build_view(state, acc_ids)
+    assert view.source is state["transactions"]
+    assert tuple(view.transactions) == tuple(expected.transactions)
+    assert tuple(view.accounts) == tuple(expected.accounts)
+    assert view.tx_pos == expected.tx_pos
+    assert tuple(view.transactions) == tuple(
+        t for t in state["transactions"] if t.account_id in acc_ids
+    )
+
+
+def test_view_maintained_by_mutators():
+    mine = ["a2", "a0"]
+    state = register_view(_state(), mine)
+    assert [t.id for t in user_view(state, mine).transactions] == ["t0", "t2", "t3", "t5", "t6", "t8"]
+
+    steps = [
+        lambda s: create_transaction(s, Transaction("n1", "a0", "c", -5, "2024-01-02", "n")),
+        lambda s: create_transaction(s, Transaction("n2", "a1", "c", -5, "2024-01-02", "n")),
+        lambda s: update_transaction(s, "t3", {"amount": -50}),
+        lambda s: update_transaction(s, "t1", {"account_id": "a2"}),  # moves in
+        lambda s: update_transaction(s, "t6", {"account_id": "a1"}),  # moves out
+        lambda s: delete_transaction(s, "t0"),
+        lambda s: update_account_balance(s, "a2", 999),
+    ]
+    for step in steps:
+        state = step(state)
+        _assert_fresh(state, mine)
+
+    assert [a.balance for a in user_view(state, mine).accounts] == [-5 + 6 - 50 + 3, 999]
+
+
+def test_view_maintained_by_bus():
+    bus = StateEventBus()
+    bus.subscribe("TRANSACTION_ADDED", on_transaction_added)
+    state = register_view(_state(), ["a1"])
+    t = Transaction("n1", "a1", "c", -7, "2024-01-02", "n")
+    state = bus.publish(Event("e1", t.ts, "TRANSACTION_ADDED", {"transaction": t}), state)
+    _assert_fresh(state, ["a1"])
+    assert user_view(state, ["a1"]).transactions[-1] == t